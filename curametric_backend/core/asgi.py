@@ -13,4 +13,9 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
+# uvicorn core.asgi:application --workers N
+# GoogleLoginView y UploadWoundPhotoView son async y esperan la red sin ocupar
+# el proceso; las vistas de DRF siguen siendo síncronas y bajo ASGI Django las
+# ejecuta en un solo hilo por proceso (ver manage.py benchmark_asgi).
+
 application = get_asgi_application()
@@ -0,0 +1,61 @@
+"""
+Conexiones a PostgreSQL en producción.
+
+Sin esta configuración cada petición abría una conexión nueva (TCP, TLS y
+autenticación) y la cerraba al terminar. Hay dos modos, más un ajuste:
+
+- Persistentes (por defecto): cada hilo reutiliza su conexión durante
+  DB_CONN_MAX_AGE segundos. Con DB_CONN_HEALTH_CHECKS se comprueba antes de
+  reutilizarla, por si el servidor la cerró.
+- DB_POOL: un pool de psycopg 3 en cada proceso (Django 5.1+, requiere
+  psycopg[pool]). Las conexiones se prestan por petición, así que un proceso
+  nunca tiene más de DB_POOL_MAX_SIZE abiertas.
+- DB_PGBOUNCER: detrás de PgBouncer en modo transacción. Se desactivan los
+  cursores del lado del servidor, porque no sobreviven entre transacciones
+  (los usa iterator() en la exportación).
+
+Cada proceso de gunicorn (WEB_CONCURRENCY) usa a lo más una conexión por hilo
+(GUNICORN_THREADS) más una por hilo de subida de fotos (PHOTO_UPLOAD_WORKERS).
+Ese es el tamaño del pool por defecto. Si DB_MAX_CONNECTIONS está definido,
+procesos × conexiones por proceso no puede superarlo.
+
+Bajo ASGI (core/asgi.py) Django recomienda no usar conexiones persistentes:
+ahí conviene DB_POOL o DB_CONN_MAX_AGE=0.
+"""
+import importlib.util
+
+from django.core.exceptions import ImproperlyConfigured
+
+
+def connections_per_process(threads, background_threads):
+    return max(1, threads) + max(0, background_threads)
+
+
+def configure_connections(
+    database, *, conn_max_age, health_checks, pool=False, pool_max_size=None, pool_timeout=10,
+    pgbouncer=False, workers=1, threads=1, background_threads=0, max_connections=None,
+):
+    """Completa el diccionario de DATABASES['default'] según el modo elegido."""
+    per_process = pool_max_size or connections_per_process(threads, background_threads)
+    if max_connections and workers * per_process > max_connections:
+        raise ImproperlyConfigured(
+            f'{workers} procesos × {per_process} conexiones superan DB_MAX_CONNECTIONS={max_connections}.'
+        )
+
+    database['CONN_HEALTH_CHECKS'] = health_checks
+    if pool:
+        if importlib.util.find_spec('psycopg_pool') is None:
+            raise ImproperlyConfigured('DB_POOL requiere psycopg 3 con el pool instalado: pip install "psycopg[pool]".')
+        # Con pool Django exige CONN_MAX_AGE = 0: la conexión vuelve al pool al terminar la petición
+        database['CONN_MAX_AGE'] = 0
+        database.setdefault('OPTIONS', {})['pool'] = {
+            'min_size': 1,
+            'max_size': per_process,
+            'timeout': pool_timeout,
+        }
+    else:
+        database['CONN_MAX_AGE'] = conn_max_age
+
+    if pgbouncer:
+        database['DISABLE_SERVER_SIDE_CURSORS'] = True
+    return database
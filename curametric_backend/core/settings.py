@@ -1,8 +1,11 @@
 from pathlib import Path
 from datetime import timedelta
+import importlib.util
 import os
 import environ
 
+from .database import configure_connections
+
 env = environ.Env()
 environ.Env.read_env()
 
@@ -23,6 +26,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt',
     'curametric_wound_api',
@@ -39,14 +43,114 @@ FTP_USER = env('FTP_USER')
 FTP_PASS = env('FTP_PASS')
 FTP_MEDIA_PATH = env('FTP_MEDIA_PATH')
 FTP_BASE_URL = env('FTP_BASE_URL')
+FTP_POOL_SIZE = env.int('FTP_POOL_SIZE', default=4)
+FTP_POOL_MAX_IDLE = env.int('FTP_POOL_MAX_IDLE', default=60)
+
+# Subida de fotos en segundo plano (staging local + pool de hilos)
+PHOTO_STAGING_ROOT = env('PHOTO_STAGING_ROOT', default=str(BASE_DIR / 'photo_staging'))
+PHOTO_UPLOAD_WORKERS = env.int('PHOTO_UPLOAD_WORKERS', default=2)
+PHOTO_UPLOAD_MAX_ATTEMPTS = env.int('PHOTO_UPLOAD_MAX_ATTEMPTS', default=5)
+PHOTO_UPLOAD_RETRY_BASE_SECONDS = env.int('PHOTO_UPLOAD_RETRY_BASE_SECONDS', default=30)
+PHOTO_MAX_UPLOAD_SIZE = env.int('PHOTO_MAX_UPLOAD_SIZE', default=25 * 1024 * 1024)
+PHOTO_UPLOAD_BLOCK_SIZE = env.int('PHOTO_UPLOAD_BLOCK_SIZE', default=64 * 1024)
+CHUNKED_UPLOAD_EXPIRY_HOURS = env.int('CHUNKED_UPLOAD_EXPIRY_HOURS', default=24)
+# Archivos en staging sin PhotoUpload (su transacción se revirtió) que process_photo_uploads borra
+PHOTO_STAGING_ORPHAN_MINUTES = env.int('PHOTO_STAGING_ORPHAN_MINUTES', default=60)
+
+# Versiones reducidas de las fotos (lado mayor en píxeles), generadas en un pool de procesos
+PHOTO_RENDITION_SIZES = {'screen': 1280, 'thumb': 320}
+PHOTO_RENDITION_FORMAT = env('PHOTO_RENDITION_FORMAT', default='WEBP')
+PHOTO_RENDITION_QUALITY = env.int('PHOTO_RENDITION_QUALITY', default=80)
+PHOTO_PROCESSING_WORKERS = env.int('PHOTO_PROCESSING_WORKERS', default=2)
 
 DEFAULT_FILE_STORAGE = 'storages.backends.ftp.FTPStorage'
 FTP_STORAGE_LOCATION = f'ftp://{FTP_USER}:{FTP_PASS}@{FTP_HOST}{FTP_MEDIA_PATH}'
 
+# JWT_STATELESS_AUTH: el usuario sale de los claims del token, sin consultar la
+# base en cada petición; el User completo se carga desde una caché TTL si hace falta
+JWT_STATELESS_AUTH = env.bool('JWT_STATELESS_AUTH', default=False)
+AUTH_USER_CACHE_SECONDS = env.int('AUTH_USER_CACHE_SECONDS', default=60)
+AUTH_USER_CACHE_SIZE = env.int('AUTH_USER_CACHE_SIZE', default=1024)
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
+        'curametric_wound_api.authentication.StatelessJWTAuthentication'
+        if JWT_STATELESS_AUTH else
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
+    # Misma salida que JSONRenderer, generada con orjson
+    'DEFAULT_RENDERER_CLASSES': (
+        'curametric_wound_api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+        # MessagePack (Accept: application/msgpack) solo si está instalado
+        *(['curametric_wound_api.renderers.MessagePackRenderer'] if importlib.util.find_spec('msgpack') else []),
+    ),
+}
+
+# Compresión de respuestas bajo /api/ (brotli si está instalado, si no gzip)
+API_COMPRESSION_PREFIX = env.str('API_COMPRESSION_PREFIX', default='/api/')
+API_COMPRESSION_MIN_SIZE = env.int('API_COMPRESSION_MIN_SIZE', default=1024)
+API_COMPRESSION_GZIP_LEVEL = env.int('API_COMPRESSION_GZIP_LEVEL', default=6)
+API_COMPRESSION_BROTLI_QUALITY = env.int('API_COMPRESSION_BROTLI_QUALITY', default=5)
+
+# Listado de curaciones desde values() con CompactSerializer (mismo JSON que WoundCareSerializer)
+API_COMPACT_LISTS = env.bool('API_COMPACT_LISTS', default=True)
+
+# Paginación por cursor (opcional vía ?page_size= / ?cursor=)
+API_PAGE_SIZE = env.int('API_PAGE_SIZE', default=50)
+API_MAX_PAGE_SIZE = env.int('API_MAX_PAGE_SIZE', default=500)
+
+# Sincronización en lote (máximo de elementos por petición, sumando todas las secciones)
+BULK_SYNC_MAX_ITEMS = env.int('BULK_SYNC_MAX_ITEMS', default=500)
+
+# Sincronización incremental (máximo de filas por modelo en cada respuesta)
+SYNC_PAGE_SIZE = env.int('SYNC_PAGE_SIZE', default=500)
+# Segundos que se retienen los cambios recientes: más que la transacción más larga
+DELTA_SYNC_LAG = env.int('DELTA_SYNC_LAG', default=30)
+
+# Trayectoria de cicatrización: reducción semanal de área (%) bajo la cual una herida se marca estancada
+TRAJECTORY_STALLED_WEEKLY_REDUCTION = env.float('TRAJECTORY_STALLED_WEEKLY_REDUCTION', default=10.0)
+
+# Cola de curaciones pendientes: días hacia adelante que cuentan como próximas
+DUE_CARE_UPCOMING_DAYS = env.int('DUE_CARE_UPCOMING_DAYS', default=7)
+
+# Exportación de curaciones: filas leídas por bloque desde el cursor de la base de datos
+EXPORT_CHUNK_SIZE = env.int('EXPORT_CHUNK_SIZE', default=2000)
+
+# Conexiones a PostgreSQL en producción (ver core/database.py)
+DB_CONN_MAX_AGE = env.int('DB_CONN_MAX_AGE', default=600)
+DB_CONN_HEALTH_CHECKS = env.bool('DB_CONN_HEALTH_CHECKS', default=True)
+DB_POOL = env.bool('DB_POOL', default=False)
+DB_POOL_MAX_SIZE = env.int('DB_POOL_MAX_SIZE', default=0)  # 0 = hilos de gunicorn + hilos de subida de fotos
+DB_POOL_TIMEOUT = env.int('DB_POOL_TIMEOUT', default=10)
+DB_PGBOUNCER = env.bool('DB_PGBOUNCER', default=False)
+DB_MAX_CONNECTIONS = env.int('DB_MAX_CONNECTIONS', default=0)  # 0 = sin límite que verificar
+# Procesos e hilos de gunicorn (los lee también gunicorn.conf.py)
+WEB_CONCURRENCY = env.int('WEB_CONCURRENCY', default=1)
+GUNICORN_THREADS = env.int('GUNICORN_THREADS', default=1)
+
+# Login con Google: certificados de firma y tokens ya verificados en caché
+GOOGLE_CERTS_URL = env.str('GOOGLE_CERTS_URL', default='https://www.googleapis.com/oauth2/v1/certs')
+GOOGLE_TOKEN_CACHE_SECONDS = env.int('GOOGLE_TOKEN_CACHE_SECONDS', default=300)
+GOOGLE_TOKEN_CACHE_SIZE = env.int('GOOGLE_TOKEN_CACHE_SIZE', default=1024)
+
+# Caché de respuestas por usuario. Solo con API_CACHE_REDIS_URL (configurar
+# maxmemory-policy allkeys-lru): la invalidación tiene que llegar a todos los
+# workers y a process_photo_uploads. Sin Redis no se guarda nada (DummyCache);
+# una caché en memoria de cada proceso serviría registros clínicos desactualizados.
+API_CACHE_TIMEOUT = env.int('API_CACHE_TIMEOUT', default=300)
+API_CACHE_REDIS_URL = env.str('API_CACHE_REDIS_URL', default='')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'api': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': API_CACHE_REDIS_URL,
+        'KEY_PREFIX': 'api',
+    } if API_CACHE_REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    },
 }
 
 SIMPLE_JWT = {
@@ -64,7 +168,9 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 
 MIDDLEWARE = [
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    # WhiteNoise con soporte async (ver curametric_wound_api/middleware.py)
+    'curametric_wound_api.middleware.AsyncWhiteNoiseMiddleware',
+    'curametric_wound_api.compression.ApiCompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -153,6 +259,19 @@ if not DEBUG:
         "default": env.db("DATABASE_URL"),
     }
     DATABASES["default"]["ATOMIC_REQUESTS"] = True
+    configure_connections(
+        DATABASES["default"],
+        conn_max_age=DB_CONN_MAX_AGE,
+        health_checks=DB_CONN_HEALTH_CHECKS,
+        pool=DB_POOL,
+        pool_max_size=DB_POOL_MAX_SIZE,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pgbouncer=DB_PGBOUNCER,
+        workers=WEB_CONCURRENCY,
+        threads=GUNICORN_THREADS,
+        background_threads=PHOTO_UPLOAD_WORKERS,
+        max_connections=DB_MAX_CONNECTIONS,
+    )
     
 else:
     ALLOWED_HOSTS = env.list('ALLOWED_HOSTS_DEV')
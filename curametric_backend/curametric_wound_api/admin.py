@@ -1,14 +1,20 @@
 from django.contrib import admin
 from django.contrib.auth.models import User
 from django.contrib.auth.admin import UserAdmin
-from .models import Patient, Wound, WoundCare
+from .search import MIN_QUERY_LENGTH, search_patients
+from .models import Patient, Wound, WoundCare, PhotoUpload, StoredPhoto, ChunkedUpload, DeletionLog, WoundSummary
 
 @admin.register(Patient)
 class PatientAdmin(admin.ModelAdmin):
     list_display = ('first_name', 'last_name', 'rut','dob', 'created_at', 'updated_at', 'created_by', 'updated_by')
-    search_fields = ('first_name', 'last_name')
+    search_fields = ('search_name',)
     list_filter = ('created_at', 'updated_at')
 
+    def get_search_results(self, request, queryset, search_term):
+        if len(search_term.strip()) < MIN_QUERY_LENGTH:
+            return super().get_search_results(request, queryset, search_term)
+        return search_patients(queryset, search_term), False
+
 @admin.register(Wound)
 class WoundAdmin(admin.ModelAdmin):
     list_display = ('patient', 'wound_location', 'wound_origin', 'wound_origin_date', 'created_at', 'updated_at', 'created_by', 'updated_by')
@@ -17,6 +23,35 @@ class WoundAdmin(admin.ModelAdmin):
 
 @admin.register(WoundCare)
 class WoundCareAdmin(admin.ModelAdmin):
-    list_display = ('wound', 'care_date', 'wound_heigh', 'wound_width', 'wound_depth', 'created_at', 'updated_at', 'created_by', 'updated_by')
+    list_display = ('wound', 'care_date', 'wound_height', 'wound_width', 'wound_depth', 'created_at', 'updated_at', 'created_by', 'updated_by')
     search_fields = ('wound__patient__first_name', 'wound__patient__last_name', 'wound__wound_location')
-    list_filter = ('created_at', 'updated_at')
\ No newline at end of file
+    list_filter = ('created_at', 'updated_at')
+
+@admin.register(PhotoUpload)
+class PhotoUploadAdmin(admin.ModelAdmin):
+    list_display = ('wound_care', 'filename', 'status', 'attempts', 'next_attempt_at', 'created_at', 'updated_at')
+    list_filter = ('status', 'created_at')
+
+
+@admin.register(StoredPhoto)
+class StoredPhotoAdmin(admin.ModelAdmin):
+    list_display = ('sha256', 'remote_path', 'size', 'created_at')
+    search_fields = ('sha256',)
+
+
+@admin.register(ChunkedUpload)
+class ChunkedUploadAdmin(admin.ModelAdmin):
+    list_display = ('id', 'wound_care', 'filename', 'offset', 'total_size', 'status', 'updated_at')
+    list_filter = ('status',)
+
+
+@admin.register(DeletionLog)
+class DeletionLogAdmin(admin.ModelAdmin):
+    list_display = ('model_name', 'object_id', 'created_by', 'deleted_at')
+    list_filter = ('model_name',)
+
+
+@admin.register(WoundSummary)
+class WoundSummaryAdmin(admin.ModelAdmin):
+    list_display = ('wound', 'care_count', 'last_care_date', 'next_care_date', 'latest_area', 'area_reduction_percent', 'updated_at')
+    list_filter = ('next_care_date',)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CurametricWoundApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'curametric_wound_api'
+
+    def ready(self):
+        from . import db_metrics, signals  # noqa: F401
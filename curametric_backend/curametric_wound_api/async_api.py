@@ -0,0 +1,81 @@
+"""
+Base para las vistas asíncronas de la API (login con Google y subida de fotos).
+
+DRF 3.15 no tiene vistas async: APIView se ejecuta entera en un hilo, así que
+bajo ASGI una vista que espera la red ocupa ese hilo igual que un worker WSGI.
+AsyncAPIView es una View de Django con `async def` que conserva lo que esas
+dos vistas usaban de APIView:
+
+- autenticación con REST_FRAMEWORK['DEFAULT_AUTHENTICATION_CLASSES'] (un
+  token inválido responde 401 igual que en DRF; sin token sigue siendo anónimo)
+  y APIClient.force_authenticate en las pruebas;
+- permission_classes: 401 sin credenciales, 403 si no alcanza el permiso;
+- cuerpo JSON o de formulario en `await self.read_data(request)`;
+- sin CSRF y fuera de ATOMIC_REQUESTS (Django no lo admite en vistas async;
+  cada vista abre sus propias transacciones).
+
+El ORM se usa con sus métodos async (aget, acreate...) o, para bloques con
+varias consultas, con sync_to_async dentro de transaction.atomic.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.db import transaction
+from django.http import JsonResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import APIException, NotAuthenticated, ParseError, PermissionDenied
+from rest_framework.settings import api_settings
+
+
+class AsyncAPIView(View):
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    permission_classes = api_settings.DEFAULT_PERMISSION_CLASSES
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        return csrf_exempt(transaction.non_atomic_requests(super().as_view(**initkwargs)))
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            request.user, request.auth = await self.authenticate(request)
+            self.check_permissions(request)
+            return await super().dispatch(request, *args, **kwargs)
+        except APIException as exc:
+            return self.exception_response(exc)
+
+    async def authenticate(self, request):
+        # Igual que rest_framework.request.Request con APIClient.force_authenticate
+        force_user = getattr(request, '_force_auth_user', None)
+        force_token = getattr(request, '_force_auth_token', None)
+        if force_user is not None or force_token is not None:
+            return force_user or AnonymousUser(), force_token
+        for authentication_class in self.authentication_classes:
+            # Los autenticadores de DRF solo leen request.META y pueden consultar al usuario
+            result = await sync_to_async(authentication_class().authenticate)(request)
+            if result is not None:
+                return result
+        return AnonymousUser(), None
+
+    def check_permissions(self, request):
+        for permission in [permission_class() for permission_class in self.permission_classes]:
+            if not permission.has_permission(request, self):
+                if not request.user.is_authenticated and self.authentication_classes:
+                    raise NotAuthenticated()
+                raise PermissionDenied(getattr(permission, 'message', None))
+
+    def exception_response(self, exc):
+        response = JsonResponse({"detail": exc.detail}, status=exc.status_code)
+        if exc.status_code == 401 and self.authentication_classes:
+            response['WWW-Authenticate'] = self.authentication_classes[0]().authenticate_header(self.request)
+        return response
+
+    async def read_data(self, request):
+        """Cuerpo JSON o formulario; el multipart se lee en un hilo para no bloquear el event loop."""
+        if request.content_type == 'application/json':
+            try:
+                return json.loads(request.body or b'{}')
+            except ValueError as exc:
+                raise ParseError(f'JSON inválido: {exc}')
+        return await sync_to_async(lambda: request.POST, thread_sensitive=False)()
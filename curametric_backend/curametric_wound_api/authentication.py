@@ -0,0 +1,91 @@
+"""
+Autenticación JWT sin consultar la tabla de usuarios en cada petición.
+
+JWTAuthentication carga el User completo en cada llamada, aunque los ViewSets
+solo necesitan request.user.id para filtrar por created_by. Con
+JWT_STATELESS_AUTH=True se usa StatelessJWTAuthentication: el usuario se arma
+con los claims del token y el User completo solo se carga (desde una caché TTL)
+si algo pide otro atributo, p. ej. /users/me/ o IsAdminUser.
+
+Como no se lee el usuario, desactivarlo no invalida los tokens ya emitidos
+hasta que vencen; solo lo notan las vistas que cargan el User completo.
+"""
+import threading
+
+from cachetools import TTLCache
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.utils.functional import cached_property
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+_users = None
+_lock = threading.Lock()
+
+
+def _get_user_cache():
+    global _users
+    with _lock:
+        if _users is None:
+            _users = TTLCache(maxsize=settings.AUTH_USER_CACHE_SIZE, ttl=settings.AUTH_USER_CACHE_SECONDS)
+        return _users
+
+
+def get_cached_user(user_id):
+    users = _get_user_cache()
+    with _lock:
+        user = users.get(user_id)
+    if user is None:
+        user = User.objects.filter(id=user_id, is_active=True).first()
+        if user is None:
+            raise AuthenticationFailed('Usuario no encontrado o inactivo.')
+        with _lock:
+            users[user_id] = user
+    return user
+
+
+def forget_cached_user(user_id):
+    with _lock:
+        if _users is not None:
+            _users.pop(user_id, None)
+
+
+def reset_user_cache():
+    global _users
+    with _lock:
+        _users = None
+
+
+class CachedTokenUser(TokenUser):
+    """id y pk salen del token; cualquier otro atributo, del User en caché."""
+
+    @cached_property
+    def user(self):
+        return get_cached_user(self.id)
+
+    @cached_property
+    def username(self):
+        return self.user.username
+
+    @cached_property
+    def is_staff(self):
+        return self.user.is_staff
+
+    @cached_property
+    def is_superuser(self):
+        return self.user.is_superuser
+
+    def __getattr__(self, attr):
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        return getattr(self.user, attr)
+
+
+class StatelessJWTAuthentication(JWTStatelessUserAuthentication):
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken('El token no identifica al usuario.')
+        return CachedTokenUser(validated_token)
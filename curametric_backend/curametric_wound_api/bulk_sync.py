@@ -0,0 +1,175 @@
+"""
+Sincronización en lote para la app sin conexión.
+
+El cliente envía en una sola petición los pacientes, heridas y curaciones
+registrados offline:
+
+    {
+      "patients":   [{"client_id": "p1", "first_name": ...}],
+      "wounds":     [{"client_id": "w1", "patient_client_id": "p1", ...}],
+      "woundcares": [{"client_id": "c1", "wound_client_id": "w1", ...},
+                     {"id": 42, "care_notes": "..."}]
+    }
+
+Los elementos con "id" actualizan un registro existente del usuario; el resto
+se crean. Un elemento puede referirse a su padre por id ("patient", "wound")
+o por el client_id de un elemento creado en la misma petición.
+
+Cada sección se valida completa y se escribe con un bulk_create y un
+bulk_update, todo dentro de una transacción. Los elementos inválidos no
+detienen al resto: se informan en el resultado de su posición.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Patient, Wound, WoundCare
+from .response_cache import invalidate
+from .wound_summary import rebuild_summaries
+from .serializers import PatientSerializer, WoundSerializer, WoundCareSerializer
+
+# (sección, modelo, serializer, campo padre, sección del padre)
+SECTIONS = [
+    ('patients', Patient, PatientSerializer, None, None),
+    ('wounds', Wound, WoundSerializer, 'patient', 'patients'),
+    ('woundcares', WoundCare, WoundCareSerializer, 'wound', 'wounds'),
+]
+
+# Campos que asigna el servidor (las fotos van por los endpoints de subida)
+SERVER_FIELDS = ('created_by', 'updated_by', 'wound_photo')
+
+CREATED = 'created'
+UPDATED = 'updated'
+ERROR = 'error'
+
+
+def invalid_sections(payload):
+    """Secciones enviadas que no son una lista (p. ej. {"patients": 5})."""
+    return [section for section, *_ in SECTIONS if payload.get(section) is not None and not isinstance(payload[section], list)]
+
+
+def count_items(payload):
+    return sum(len(payload.get(section) or []) for section, *_ in SECTIONS)
+
+
+def _as_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _error(result, errors):
+    result.update(status=ERROR, errors=errors)
+    return result
+
+
+def _sync_section(user, items, model, serializer_class, parent_field, parent_refs, context):
+    """Valida y escribe una sección. Devuelve (resultados, {client_id: objeto creado})."""
+    dicts = [item for item in items if isinstance(item, dict)]
+    ids = [_as_id(item.get('id')) for item in dicts]
+    existing = model.objects.filter(created_by_id=user.id, id__in=[i for i in ids if i]).in_bulk()
+
+    parents = {}
+    if parent_field:
+        parent_model = model._meta.get_field(parent_field).related_model
+        parent_ids = [_as_id(item.get(parent_field)) for item in dicts]
+        parents = parent_model.objects.filter(created_by_id=user.id, id__in=[i for i in parent_ids if i]).in_bulk()
+
+    now = timezone.now()
+    results, refs = [], {}
+    to_create, to_update, update_fields = [], [], set()
+    previous_parents = set()
+
+    for item in items:
+        if not isinstance(item, dict):
+            results.append(_error({'client_id': None}, {'non_field_errors': ['Formato inválido.']}))
+            continue
+        result = {'client_id': item.get('client_id')}
+        results.append(result)
+
+        instance = None
+        if item.get('id') is not None:
+            instance = existing.get(_as_id(item['id']))
+            if instance is None:
+                _error(result, {'id': ['No encontrado.']})
+                continue
+
+        parent = None
+        if parent_field:
+            client_ref = item.get(f'{parent_field}_client_id')
+            referenced = client_ref is not None or item.get(parent_field) is not None
+            if client_ref is not None:
+                parent = parent_refs.get(client_ref)
+            elif item.get(parent_field) is not None:
+                parent = parents.get(_as_id(item[parent_field]))
+            # Al crear el padre es obligatorio; al actualizar, solo si se envía
+            if parent is None and (instance is None or referenced):
+                _error(result, {parent_field: ['Referencia no encontrada.']})
+                continue
+
+        serializer = serializer_class(instance, data=item, partial=instance is not None, context=context)
+        # El padre y los campos del servidor se resuelven aquí, sin una consulta por elemento
+        for name in (parent_field, *SERVER_FIELDS):
+            serializer.fields.pop(name, None)
+        if not serializer.is_valid():
+            _error(result, serializer.errors)
+            continue
+
+        data = serializer.validated_data
+        if parent is not None:
+            data[parent_field] = parent
+        if instance is None:
+            obj = model(**data, created_by_id=user.id, updated_by_id=user.id)
+            to_create.append((result, obj))
+            if result['client_id'] is not None:
+                refs[result['client_id']] = obj
+        else:
+            if parent_field:
+                previous_parents.add(getattr(instance, f'{parent_field}_id'))
+            for name, value in data.items():
+                setattr(instance, name, value)
+            # bulk_update no aplica auto_now
+            instance.updated_by_id = user.id
+            instance.updated_at = now
+            update_fields.update(data)
+            to_update.append((result, instance))
+
+    if model is Patient:
+        # bulk_create/bulk_update no pasan por Patient.save()
+        for _, obj in to_create + to_update:
+            obj.refresh_search_name()
+        if update_fields & {'first_name', 'last_name'}:
+            update_fields.add('search_name')
+    if to_create:
+        model.objects.bulk_create([obj for _, obj in to_create])
+        for result, obj in to_create:
+            result.update(id=obj.id, status=CREATED)
+    if to_update:
+        fields = [*sorted(update_fields), 'updated_by', 'updated_at']
+        model.objects.bulk_update([obj for _, obj in to_update], fields)
+        for result, obj in to_update:
+            result.update(id=obj.id, status=UPDATED)
+    if to_create or to_update:
+        # bulk_create/bulk_update no envían post_save
+        invalidate(user.id, model._meta.model_name)
+    if model is WoundCare and (to_create or to_update):
+        rebuild_summaries(previous_parents | {obj.wound_id for _, obj in to_create + to_update})
+
+    return results, refs
+
+
+def bulk_sync(user, payload, context=None):
+    """Aplica el lote y devuelve {sección: [resultado por elemento, en el mismo orden]}."""
+    context = context or {}
+    results, refs = {}, {}
+    with transaction.atomic():
+        for section, model, serializer_class, parent_field, parent_section in SECTIONS:
+            results[section], refs[section] = _sync_section(
+                user, payload.get(section) or [], model, serializer_class,
+                parent_field, refs.get(parent_section, {}), context,
+            )
+    return results
+
+
+def has_errors(results):
+    return any(result['status'] == ERROR for items in results.values() for result in items)
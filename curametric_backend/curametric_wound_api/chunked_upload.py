@@ -0,0 +1,136 @@
+"""
+Subidas reanudables de fotos: iniciar, enviar partes indicando su offset y
+finalizar. Las partes se anexan a un archivo local; si la conexión se corta,
+el cliente consulta el offset guardado y continúa desde ahí.
+
+Cada parte se lee primero a un archivo temporal (spool_chunk), sin conexión a
+la base ocupada por una transacción; el bloqueo de la fila se toma después,
+solo para verificar el offset y copiar el archivo local.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import ChunkedUpload
+from .photo_pipeline import enqueue_staged_photo
+
+
+class ChunkedUploadError(Exception):
+    pass
+
+
+class OffsetMismatch(ChunkedUploadError):
+    def __init__(self, expected):
+        super().__init__(f'Offset esperado: {expected}')
+        self.expected = expected
+
+
+def part_path(upload):
+    return os.path.join(settings.PHOTO_STAGING_ROOT, 'chunks', f'{upload.id}.part')
+
+
+def spool_chunk(stream, limit):
+    """
+    Lee la parte a un archivo temporal, hasta `limit` bytes. Devuelve
+    (archivo, error): si la lectura se interrumpe o excede el límite, el
+    archivo conserva lo recibido hasta ese momento.
+    """
+    os.makedirs(settings.PHOTO_STAGING_ROOT, exist_ok=True)
+    spool = tempfile.TemporaryFile(dir=settings.PHOTO_STAGING_ROOT)
+    received = 0
+    error = None
+    try:
+        while block := stream.read(settings.PHOTO_UPLOAD_BLOCK_SIZE):
+            if received + len(block) > limit:
+                error = ChunkedUploadError('La parte excede el tamaño declarado.')
+                break
+            spool.write(block)
+            received += len(block)
+    except Exception as e:
+        error = ChunkedUploadError(f'Conexión interrumpida: {e}')
+    spool.seek(0)
+    return spool, error
+
+
+def append_chunk(upload, spool, offset, error=None):
+    """
+    Anexa la parte leída por spool_chunk desde `offset` y guarda el nuevo
+    offset; después levanta `error`, si la lectura lo tuvo. `upload` debe
+    venir bloqueada con select_for_update().
+    """
+    if offset != upload.offset:
+        raise OffsetMismatch(upload.offset)
+
+    path = part_path(upload)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'r+b' if os.path.exists(path) else 'wb') as part:
+        # Descartar bytes escritos después del último offset confirmado
+        part.seek(offset)
+        part.truncate()
+        shutil.copyfileobj(spool, part, settings.PHOTO_UPLOAD_BLOCK_SIZE)
+        written = part.tell()
+        part.flush()
+        os.fsync(part.fileno())
+
+    upload.offset = written
+    upload.save(update_fields=['offset', 'updated_at'])
+    if error is not None:
+        raise error
+    return written
+
+
+def finalize(upload):
+    """
+    Verifica el archivo completo y lo entrega al pipeline de subida. `upload`
+    debe venir bloqueada con select_for_update(); si ya se finalizó (un
+    reintento del cliente), devuelve la misma PhotoUpload.
+    """
+    if upload.status == ChunkedUpload.COMPLETE:
+        return upload.photo_upload
+    if upload.offset != upload.total_size:
+        raise ChunkedUploadError(f'Faltan bytes: recibidos {upload.offset} de {upload.total_size}.')
+
+    path = part_path(upload)
+    if not os.path.exists(path):
+        # Un finalize anterior movió el archivo y su transacción se revirtió (sweep_staging lo borra)
+        upload.offset = 0
+        upload.save(update_fields=['offset', 'updated_at'])
+        raise ChunkedUploadError('El archivo recibido se perdió; la subida debe reiniciarse.')
+    digest = hashlib.sha256()
+    with open(path, 'rb') as part:
+        while block := part.read(settings.PHOTO_UPLOAD_BLOCK_SIZE):
+            digest.update(block)
+    sha256 = digest.hexdigest()
+    if upload.sha256 and upload.sha256 != sha256:
+        os.remove(path)
+        upload.offset = 0
+        upload.save(update_fields=['offset', 'updated_at'])
+        raise ChunkedUploadError('El checksum no coincide; la subida debe reiniciarse.')
+
+    extension = os.path.splitext(upload.filename)[1]
+    staged_path = os.path.join(settings.PHOTO_STAGING_ROOT, f'{uuid.uuid4().hex}{extension}')
+    os.replace(path, staged_path)
+
+    upload.photo_upload = enqueue_staged_photo(upload.wound_care, staged_path, sha256, upload.total_size, upload.filename)
+    upload.status = ChunkedUpload.COMPLETE
+    upload.save(update_fields=['photo_upload', 'status', 'updated_at'])
+    return upload.photo_upload
+
+
+def expire_chunked_uploads(max_age=None):
+    """Elimina las subidas sin terminar que no recibieron partes en `max_age`."""
+    max_age = max_age or timedelta(hours=settings.CHUNKED_UPLOAD_EXPIRY_HOURS)
+    expired = ChunkedUpload.objects.filter(status=ChunkedUpload.ACTIVE, updated_at__lt=timezone.now() - max_age)
+    count = 0
+    for upload in expired:
+        if os.path.exists(part_path(upload)):
+            os.remove(part_path(upload))
+        upload.delete()
+        count += 1
+    return count
@@ -0,0 +1,154 @@
+"""
+Listados sin pasar por el serializer de DRF campo a campo.
+
+CompactSerializer compila una vez por petición los campos de lectura de un
+ModelSerializer (incluidos los anidados por source=, como woundData.patientData)
+en una tabla (clave, lookup, conversión). Las filas se leen con values() en una
+sola consulta y cada una se convierte recorriendo esa tabla: mismo JSON, con
+los mismos alias, sin instanciar modelos ni recorrer los campos de DRF.
+
+Las conversiones son las mismas de DRF (los tipos simples se resuelven en
+línea y el resto llama al to_representation del propio campo), así que la
+salida coincide byte a byte con la del serializer. Un serializer con campos que
+no salen de una columna (SerializerMethodField, source='*', source con puntos,
+propiedades) no se puede compilar.
+"""
+from datetime import date
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.settings import ISO_8601, api_settings
+
+
+def _identity(value):
+    return value
+
+
+def _is_iso(field, default):
+    output_format = getattr(field, 'format', default)
+    return output_format is not None and output_format.lower() == ISO_8601
+
+
+def _datetime_converter(field):
+    """DateTimeField.to_representation con la zona horaria resuelta una sola vez."""
+    tz = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if tz is None or not _is_iso(field, api_settings.DATETIME_FORMAT):
+        return field.to_representation
+
+    def convert(value):
+        if value.tzinfo is None:
+            return field.to_representation(value)
+        text = value.astimezone(tz).isoformat()
+        return text[:-6] + 'Z' if text.endswith('+00:00') else text
+    return convert
+
+
+def _converter(field, model_field):
+    if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+        return _identity  # values() ya trae el id
+    if isinstance(field, serializers.FileField):
+        # values() trae el nombre del archivo; la URL la arma el campo como siempre
+        return lambda name: field.to_representation(model_field.attr_class(None, model_field, name))
+    if type(field) is serializers.DateTimeField:
+        return _datetime_converter(field)
+    if type(field) is serializers.DateField and _is_iso(field, api_settings.DATE_FORMAT):
+        return date.isoformat
+    if type(field) is serializers.BooleanField:
+        return bool
+    if type(field) is serializers.IntegerField:
+        return int
+    if type(field) is serializers.FloatField:
+        return float
+    if type(field) is serializers.CharField:
+        return str
+    return field.to_representation
+
+
+def compile_fields(serializer, prefix=''):
+    """[(clave, lookup, conversión, campos anidados o None)] en el orden del serializer."""
+    model = serializer.Meta.model
+    entries = []
+    for key, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if field.source == '*' or len(field.source_attrs) != 1:
+            raise ImproperlyConfigured(f'{type(serializer).__name__}.{key}: source no compilable.')
+        try:
+            model_field = model._meta.get_field(field.source_attrs[0])
+        except FieldDoesNotExist:
+            raise ImproperlyConfigured(f'{type(serializer).__name__}.{key}: no es una columna de {model.__name__}.')
+        if not model_field.concrete or model_field.many_to_many:
+            raise ImproperlyConfigured(f'{type(serializer).__name__}.{key}: relación no compilable.')
+
+        lookup = prefix + model_field.name
+        if isinstance(field, serializers.BaseSerializer):
+            if isinstance(field, serializers.ListSerializer):
+                raise ImproperlyConfigured(f'{type(serializer).__name__}.{key}: listas anidadas no compilables.')
+            entries.append((key, lookup, None, compile_fields(field, lookup + '__')))
+        else:
+            entries.append((key, lookup, _converter(field, model_field), None))
+    return entries
+
+
+def _lookups(entries):
+    for _, lookup, _, nested in entries:
+        yield lookup
+        if nested is not None:
+            yield from _lookups(nested)
+
+
+def _represent(entries, row):
+    ret = {}
+    for key, lookup, convert, nested in entries:
+        value = row[lookup]
+        if value is None:
+            ret[key] = None
+        elif nested is not None:
+            ret[key] = _represent(nested, row)
+        else:
+            ret[key] = convert(value)
+    return ret
+
+
+class CompactSerializer:
+    """Solo lectura: `values(queryset)` y luego `to_representation(filas)`."""
+
+    def __init__(self, serializer):
+        if isinstance(serializer, serializers.ListSerializer):
+            serializer = serializer.child
+        self.entries = compile_fields(serializer)
+        self.lookups = list(dict.fromkeys(_lookups(self.entries)))
+
+    def values(self, queryset, extra=()):
+        """values() con las columnas del serializer más `extra` (p. ej. las del orden del keyset)."""
+        lookups = list(dict.fromkeys([*self.lookups, *extra]))
+        return queryset.prefetch_related(None).values(*lookups)
+
+    def to_representation(self, rows):
+        entries = self.entries
+        return [_represent(entries, row) for row in rows]
+
+
+class CompactListMixin:
+    """
+    `list` de un ViewSet con CompactSerializer en vez del serializer de DRF
+    (misma salida). Va después de StreamingListMixin: ?stream=1 sigue por DRF.
+    """
+    compact_list = True
+
+    def list(self, request, *args, **kwargs):
+        if not (self.compact_list and settings.API_COMPACT_LISTS):
+            return super().list(request, *args, **kwargs)
+
+        compact = CompactSerializer(self.get_serializer())
+        ordering = getattr(self, 'keyset_ordering', None) or getattr(self.paginator, 'ordering', ())
+        queryset = compact.values(
+            self.filter_queryset(self.get_queryset()),
+            extra=[field.lstrip('-') for field in ordering],
+        )
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(compact.to_representation(page))
+        return Response(compact.to_representation(queryset))
@@ -0,0 +1,129 @@
+"""
+Compresión de las respuestas de la API (la app móvil las recibe por red celular).
+
+WhiteNoise ya comprime los archivos estáticos; este middleware comprime solo
+las respuestas bajo API_COMPRESSION_PREFIX, con brotli si el cliente lo acepta
+y el paquete está instalado, o con gzip. Se omiten los cuerpos menores que
+API_COMPRESSION_MIN_SIZE (la cabecera y la CPU cuestan más de lo que se ahorra)
+y los formatos que ya vienen comprimidos (xlsx, parquet, imágenes). Las
+respuestas en streaming (?stream=1, exportación CSV) se comprimen bloque a bloque.
+
+La API se autentica con JWT en la cabecera Authorization, no con cookies ni
+tokens CSRF en el cuerpo, así que comprimir no la expone a BREACH.
+"""
+import gzip
+import importlib.util
+import io
+import re
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/msgpack', 'text/')
+_accept_re = re.compile(r'\s*([^\s;,]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?')
+
+
+def brotli_available():
+    return importlib.util.find_spec('brotli') is not None
+
+
+def accepted_encodings(header):
+    """{'gzip': 1.0, 'br': 0.5, ...} a partir de Accept-Encoding."""
+    encodings = {}
+    for item in header.split(','):
+        match = _accept_re.match(item)
+        if match is None:
+            continue
+        try:
+            quality = float(match[2]) if match[2] is not None else 1.0
+        except ValueError:
+            continue
+        encodings[match[1].lower()] = quality
+    return encodings
+
+
+def choose_encoding(header):
+    """'br', 'gzip' o None, según lo que acepta el cliente (br primero a igual q)."""
+    accepted = accepted_encodings(header)
+    candidates = ['br', 'gzip'] if brotli_available() else ['gzip']
+    best = None
+    for encoding in candidates:
+        quality = accepted.get(encoding, accepted.get('*', 0))
+        if quality > 0 and (best is None or quality > best[1]):
+            best = (encoding, quality)
+    return best and best[0]
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        import brotli
+        return brotli.compress(content, quality=settings.API_COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(content, compresslevel=settings.API_COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def compress_stream(chunks, encoding):
+    if encoding == 'br':
+        import brotli
+        compressor = brotli.Compressor(quality=settings.API_COMPRESSION_BROTLI_QUALITY)
+        for chunk in chunks:
+            # flush: cada bloque llega al cliente sin esperar al siguiente
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+        return
+
+    buffer = io.BytesIO()
+    with gzip.GzipFile(mode='wb', compresslevel=settings.API_COMPRESSION_GZIP_LEVEL, fileobj=buffer, mtime=0) as file:
+        for chunk in chunks:
+            file.write(chunk)
+            file.flush(zlib.Z_SYNC_FLUSH)
+            if data := buffer.getvalue():
+                yield data
+                buffer.seek(0)
+                buffer.truncate()
+    yield buffer.getvalue()
+
+
+class ApiCompressionMiddleware(MiddlewareMixin):
+    # MiddlewareMixin: funciona igual bajo WSGI y ASGI (sin forzar la cadena a un hilo)
+
+    def process_response(self, request, response):
+        if not request.path.startswith(settings.API_COMPRESSION_PREFIX) or not self.compressible(response):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                # Solo ocurre bajo ASGI con un iterador asíncrono; se envía sin comprimir
+                return response
+            response.streaming_content = compress_stream(response.streaming_content, encoding)
+            del response['Content-Length']
+        else:
+            if len(response.content) < settings.API_COMPRESSION_MIN_SIZE:
+                return response
+            compressed = compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        # Igual que GZipMiddleware: la ETag deja de ser fuerte porque cambian los bytes
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+    @staticmethod
+    def compressible(response):
+        if response.has_header('Content-Encoding') or response.status_code in (204, 304):
+            return False
+        content_type = response.get('Content-Type', '').split(';', 1)[0].strip().lower()
+        return content_type.startswith(COMPRESSIBLE_TYPES)
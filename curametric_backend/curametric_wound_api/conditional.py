@@ -0,0 +1,84 @@
+"""
+Peticiones condicionales (If-None-Match / If-Modified-Since) para los ViewSets.
+
+La ETag se calcula antes de serializar: en los listados con una sola consulta
+agregada (máximo updated_at y cantidad de filas, más los parámetros de la
+petición), en el detalle con el updated_at del objeto. Si coincide con la del
+cliente se responde 304 sin cuerpo.
+
+La ETag incluye el formato negociado (JSON o MessagePack) y se envía
+Vary: Accept, para que un 304 no reutilice un cuerpo en otro formato.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+
+class ConditionalGetMixin:
+    """
+    `etag_related` lista las relaciones que el serializer anida
+    (p. ej. ('wound', 'wound__patient')): sus updated_at también cuentan,
+    para que editar un paciente invalide el listado de sus curaciones.
+    """
+    etag_related = ()
+
+    def make_etag(self, *parts):
+        media_type = self.request.accepted_renderer.media_type
+        raw = ':'.join(str(part) for part in (self.basename, self.request.user.pk, media_type, *parts))
+        return quote_etag(hashlib.sha256(raw.encode()).hexdigest()[:32])
+
+    def list_etag(self, queryset):
+        timestamps = {
+            f'last_{index}': Max(f'{relation}__updated_at' if relation else 'updated_at')
+            for index, relation in enumerate(('', *self.etag_related))
+        }
+        stats = queryset.order_by().aggregate(count=Count('pk'), **timestamps)
+        params = sorted(self.request.query_params.lists())
+        return self.make_etag(*[stats[key] for key in sorted(stats)], params)
+
+    def object_timestamps(self, instance):
+        timestamps = [instance.updated_at]
+        for relation in self.etag_related:
+            related = instance
+            for name in relation.split('__'):
+                related = getattr(related, name)
+            timestamps.append(related.updated_at)
+        return timestamps
+
+    def get_required_fields(self):
+        # object_timestamps lee updated_at del objeto y de lo que anida, aunque ?fields= no los pida
+        required = super().get_required_fields()
+        if getattr(self, 'action', None) == 'retrieve':
+            required += ['updated_at', *(f'{relation}__updated_at' for relation in self.etag_related)]
+        return required
+
+    def conditional_response(self, response, etag, last_modified=None):
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = last_modified
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ['Accept'])
+        return response
+
+    def list(self, request, *args, **kwargs):
+        etag = self.list_etag(self.filter_queryset(self.get_queryset()))
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return self.conditional_response(not_modified, etag)
+        return self.conditional_response(super().list(request, *args, **kwargs), etag)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        timestamps = self.object_timestamps(instance)
+        etag = self.make_etag(instance.pk, *timestamps)
+        # Last-Modified: el cambio más reciente entre el objeto y lo que anida
+        last_modified = int(max(timestamps).timestamp())
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return self.conditional_response(not_modified, etag)
+
+        response = Response(self.get_serializer(instance).data)
+        return self.conditional_response(response, etag, http_date(last_modified))
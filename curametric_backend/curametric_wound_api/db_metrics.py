@@ -0,0 +1,75 @@
+"""
+Reutilización de conexiones a la base, por proceso.
+
+Se cuentan las peticiones (request_started) y las conexiones nuevas
+(connection_created; con pool, las que abrió el pool). Sin conexiones
+persistentes cada petición abre una y la razón de reutilización es ~0; con
+CONN_MAX_AGE o pool tiende a 1. Los hilos de subida de fotos también abren
+conexiones, así que la razón puede quedar algo por debajo del valor real.
+"""
+import os
+import threading
+
+from django.core.signals import request_started
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+_lock = threading.Lock()
+_counts = {'requests': 0, 'connections_opened': 0}
+
+
+def _increment(name):
+    with _lock:
+        _counts[name] += 1
+
+
+@receiver(request_started, dispatch_uid='db_metrics_request_started')
+def count_request(sender, **kwargs):
+    _increment('requests')
+
+
+@receiver(connection_created, dispatch_uid='db_metrics_connection_created')
+def count_connection(sender, connection, **kwargs):
+    if connection.alias == DEFAULT_DB_ALIAS:
+        _increment('connections_opened')
+
+
+def reset_connection_stats():
+    with _lock:
+        _counts.update(requests=0, connections_opened=0)
+
+
+def _pool_stats(connection):
+    if not connection.settings_dict['OPTIONS'].get('pool'):
+        return None
+    pool = connection.pool
+    if pool is None:
+        return None
+    stats = pool.get_stats()
+    return {
+        'size': stats.get('pool_size', 0),
+        'available': stats.get('pool_available', 0),
+        'max_size': pool.max_size,
+        'opened': stats.get('connections_num', 0),
+        'waiting': stats.get('requests_waiting', 0),
+        'timeouts': stats.get('requests_errors', 0),
+    }
+
+
+def connection_stats():
+    connection = connections[DEFAULT_DB_ALIAS]
+    pool = _pool_stats(connection)
+    with _lock:
+        requests = _counts['requests']
+        opened = pool['opened'] if pool is not None else _counts['connections_opened']
+    return {
+        'pid': os.getpid(),
+        'vendor': connection.vendor,
+        'conn_max_age': connection.settings_dict['CONN_MAX_AGE'],
+        'health_checks': connection.settings_dict['CONN_HEALTH_CHECKS'],
+        'requests': requests,
+        'connections_opened': opened,
+        'reuse_ratio': round(max(0.0, 1 - opened / requests), 3) if requests else None,
+        'pool': pool,
+    }
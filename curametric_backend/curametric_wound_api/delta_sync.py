@@ -0,0 +1,128 @@
+"""
+Sincronización incremental: devuelve solo lo que cambió desde la última vez.
+
+Por cada modelo el cliente guarda la marca (watermark) recibida y la reenvía:
+
+    GET /api/sync/?patients=<marca>&wounds=<marca>&woundcares=<marca>
+
+    {"patients": {"changed": [...], "deleted": [ids], "watermark": "...", "has_more": false}, ...}
+
+Sin marca se devuelve todo (sin tombstones). Los cambios se recorren por
+(updated_at, id) y los borrados por (deleted_at, id) desde DeletionLog,
+en bloques de SYNC_PAGE_SIZE; con has_more el cliente repite la petición.
+El cliente aplica primero "changed" y luego "deleted".
+
+updated_at se fija al guardar pero la fila se ve recién al confirmar la
+transacción (ATOMIC_REQUESTS, bulk_sync): una fila confirmada tarde puede
+quedar con un updated_at menor que la marca ya entregada. Por eso solo se
+entregan filas con updated_at (o deleted_at) anterior a now() - DELTA_SYNC_LAG;
+las más recientes salen en la sincronización siguiente.
+"""
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .models import DeletionLog, Patient, Wound, WoundCare
+from .pagination import keyset_filter
+from .query_utils import optimize_queryset
+from .serializers import PatientSerializer, WoundSerializer, WoundCareSerializer
+
+SECTIONS = [
+    ('patients', Patient, PatientSerializer),
+    ('wounds', Wound, WoundSerializer),
+    ('woundcares', WoundCare, WoundCareSerializer),
+]
+
+CHANGED_ORDERING = ('updated_at', 'id')
+DELETED_ORDERING = ('deleted_at', 'id')
+
+
+def _position(instance, ordering):
+    return [getattr(instance, field) for field in ordering]
+
+
+def encode_watermark(changed, deleted):
+    values = {
+        key: [value.isoformat() if hasattr(value, 'isoformat') else value for value in position]
+        for key, position in (('c', changed), ('d', deleted)) if position
+    }
+    return urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_watermark(encoded, model, name):
+    """Devuelve (posición en cambios, posición en borrados); None si falta."""
+    try:
+        values = json.loads(urlsafe_b64decode(encoded.encode()))
+        positions = []
+        for key, field_model, ordering in (('c', model, CHANGED_ORDERING), ('d', DeletionLog, DELETED_ORDERING)):
+            position = values.get(key)
+            if position is not None:
+                fields = [field_model._meta.get_field(field) for field in ordering]
+                if len(position) != len(fields):
+                    raise ValueError
+                position = [field.to_python(value) for field, value in zip(fields, position)]
+            positions.append(position)
+        return positions
+    except Exception:
+        raise ValidationError({name: 'Marca de sincronización inválida.'})
+
+
+def _changes(user, model, serializer_class, position, limit, context, cutoff):
+    queryset = model.objects.filter(created_by_id=user.id, updated_at__lte=cutoff).order_by(*CHANGED_ORDERING)
+    if position is not None:
+        queryset = queryset.filter(keyset_filter(CHANGED_ORDERING, position))
+    queryset = optimize_queryset(queryset, serializer_class, required=CHANGED_ORDERING)
+    rows = list(queryset[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if rows:
+        position = _position(rows[-1], CHANGED_ORDERING)
+    return serializer_class(rows, many=True, context=context).data, position, has_more
+
+
+def _deletions(user, model, position, limit, initial, cutoff):
+    queryset = DeletionLog.objects.filter(
+        created_by_id=user.id, model_name=model._meta.model_name, deleted_at__lte=cutoff,
+    )
+    if initial:
+        # Primera sincronización: el cliente no tiene nada que borrar
+        latest = queryset.order_by(*[f'-{field}' for field in DELETED_ORDERING]).first()
+        return [], _position(latest, DELETED_ORDERING) if latest else None, False
+
+    if position is not None:
+        queryset = queryset.filter(keyset_filter(DELETED_ORDERING, position))
+    logs = list(queryset.order_by(*DELETED_ORDERING)[:limit + 1])
+    has_more = len(logs) > limit
+    logs = logs[:limit]
+    if logs:
+        position = _position(logs[-1], DELETED_ORDERING)
+    return [log.object_id for log in logs], position, has_more
+
+
+def delta_sync(user, params, context=None):
+    """Devuelve {sección: {changed, deleted, watermark, has_more}} para los tres modelos."""
+    limit = settings.SYNC_PAGE_SIZE
+    cutoff = timezone.now() - timedelta(seconds=settings.DELTA_SYNC_LAG)
+    results = {}
+    for name, model, serializer_class in SECTIONS:
+        watermark = params.get(name)
+        changed_position, deleted_position = (
+            decode_watermark(watermark, model, name) if watermark else (None, None)
+        )
+        changed, changed_position, more_changes = _changes(
+            user, model, serializer_class, changed_position, limit, context or {}, cutoff,
+        )
+        deleted, deleted_position, more_deletions = _deletions(
+            user, model, deleted_position, limit, initial=not watermark, cutoff=cutoff,
+        )
+        results[name] = {
+            'changed': changed,
+            'deleted': deleted,
+            'watermark': encode_watermark(changed_position, deleted_position),
+            'has_more': more_changes or more_deletions,
+        }
+    return results
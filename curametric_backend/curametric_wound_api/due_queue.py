@@ -0,0 +1,58 @@
+"""
+Cola de curaciones pendientes (vencidas, de hoy y próximas).
+
+La próxima curación de cada herida es el wound_next_care de su última
+curación, que WoundSummary ya guarda en next_care_date. La cola lee esa tabla
+por el índice (created_by, next_care_date, wound), sin recorrer el historial
+de curaciones, y trae herida y paciente con un JOIN en la misma consulta.
+"""
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .filters import parse_id_param
+from .models import WoundSummary
+
+OVERDUE = 'overdue'
+TODAY = 'today'
+UPCOMING = 'upcoming'
+STATUSES = (OVERDUE, TODAY, UPCOMING)
+
+# Valor por defecto de WoundCare.wound_next_care: la curación no fijó próxima fecha
+NO_NEXT_CARE = date(1900, 1, 1)
+
+
+def care_status(next_care_date, today):
+    if next_care_date < today:
+        return OVERDUE
+    if next_care_date == today:
+        return TODAY
+    return UPCOMING
+
+
+def due_queryset(user_id, params, today=None):
+    """
+    Heridas con curación pendiente, ordenadas por fecha. ?status= limita a un
+    estado; ?days= fija cuántos días hacia adelante cuentan como próximos.
+    """
+    today = today or timezone.localdate()
+    status = params.get('status') or None
+    if status is not None and status not in STATUSES:
+        raise ValidationError({'status': f"Debe ser uno de: {', '.join(STATUSES)}."})
+    days = parse_id_param(params, 'days')
+    if days is None:
+        days = settings.DUE_CARE_UPCOMING_DAYS
+
+    queryset = WoundSummary.objects.filter(created_by_id=user_id, next_care_date__gt=NO_NEXT_CARE)
+    if status == OVERDUE:
+        queryset = queryset.filter(next_care_date__lt=today)
+    elif status == TODAY:
+        queryset = queryset.filter(next_care_date=today)
+    elif status == UPCOMING:
+        queryset = queryset.filter(next_care_date__gt=today, next_care_date__lte=today + timedelta(days=days))
+    else:
+        queryset = queryset.filter(next_care_date__lte=today + timedelta(days=days))
+
+    return queryset.select_related('wound__patient').order_by('next_care_date', 'wound_id')
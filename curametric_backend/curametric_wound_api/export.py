@@ -0,0 +1,174 @@
+"""
+Exportación de curaciones para auditorías (CSV, Excel y Parquet).
+
+Las filas salen de una sola consulta values_list que ya trae aplanados los
+datos de la herida y del paciente, y se leen con iterator(chunk_size=...)
+(cursor del lado del servidor en PostgreSQL), así que la memoria no depende del
+tamaño de la exportación:
+
+- csv: se envía bloque a bloque mientras se lee la consulta.
+- xlsx (openpyxl): el libro se escribe en modo write_only a un archivo
+  temporal y luego se envía; Excel admite hasta 1.048.576 filas.
+- parquet (pyarrow): un row group por bloque, enviado apenas se escribe.
+
+openpyxl y pyarrow están en requirements.txt; en un entorno sin ellos el
+formato correspondiente responde 501.
+"""
+import csv
+import importlib.util
+import io
+import tempfile
+from collections import namedtuple
+from itertools import islice
+
+from django.conf import settings
+from django.utils import timezone
+
+# (encabezado, lookup, tipo)
+COLUMNS = [
+    ('patient_id', 'wound__patient_id', 'int'),
+    ('first_name', 'wound__patient__first_name', 'str'),
+    ('last_name', 'wound__patient__last_name', 'str'),
+    ('rut', 'wound__patient__rut', 'str'),
+    ('birth_date', 'wound__patient__dob', 'date'),
+    ('wound_id', 'wound_id', 'int'),
+    ('wound_location', 'wound__wound_location', 'str'),
+    ('wound_origin', 'wound__wound_origin', 'str'),
+    ('wound_origin_date', 'wound__wound_origin_date', 'date'),
+    ('care_id', 'id', 'int'),
+    ('care_date', 'care_date', 'date'),
+    ('height', 'wound_height', 'float'),
+    ('width', 'wound_width', 'float'),
+    ('depth', 'wound_depth', 'float'),
+    ('granulation_tissue', 'wound_granulation_tissue', 'float'),
+    ('slough', 'wound_sloughed_tissue', 'float'),
+    ('necrotic_tissue', 'wound_necrotic_tissue', 'float'),
+    ('exudate_amount', 'wound_exudate_quantity', 'str'),
+    ('exudate_type', 'wound_exudate_quality', 'str'),
+    ('edema', 'edema', 'str'),
+    ('wound_pain', 'wound_pain', 'str'),
+    ('surrounding_skin', 'surrounding_skin', 'str'),
+    ('borders', 'wound_borders', 'str'),
+    ('debridement', 'wound_debridement', 'bool'),
+    ('primary_dressing', 'wound_primary_dressing', 'str'),
+    ('secondary_dressing', 'wound_secondary_dressing', 'str'),
+    ('skin_protection', 'skin_protection', 'str'),
+    ('wound_cleaning_solution', 'wound_cleaning_solution', 'str'),
+    ('next_care_date', 'wound_next_care', 'date'),
+    ('care_notes', 'wound_care_notes', 'str'),
+    ('photo_status', 'photo_status', 'str'),
+    ('created_at', 'created_at', 'datetime'),
+    ('updated_at', 'updated_at', 'datetime'),
+]
+HEADERS = [header for header, _, _ in COLUMNS]
+# Mismo orden que el índice (created_by, wound, care_date)
+ORDERING = ('wound_id', 'care_date', 'id')
+FILE_CHUNK_SIZE = 64 * 1024
+
+
+def export_rows(queryset):
+    """Tuplas en el orden de COLUMNS, leídas por bloques de EXPORT_CHUNK_SIZE."""
+    lookups = [lookup for _, lookup, _ in COLUMNS]
+    return queryset.order_by(*ORDERING).values_list(*lookups).iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+
+
+def batches(rows):
+    size = settings.EXPORT_CHUNK_SIZE
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def csv_stream(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM: Excel abre el CSV como UTF-8 (tildes y ñ)
+    buffer.write('\ufeff')
+    writer.writerow(HEADERS)
+    for batch in batches(rows):
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # Sin filas: solo el encabezado
+        yield buffer.getvalue()
+
+
+def _excel_value(value):
+    # openpyxl no acepta datetimes con zona horaria
+    if hasattr(value, 'tzinfo') and value.tzinfo is not None:
+        return timezone.localtime(value).replace(tzinfo=None)
+    return value
+
+
+def xlsx_stream(rows):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Curaciones')
+    sheet.append(HEADERS)
+    for row in rows:
+        sheet.append([_excel_value(value) for value in row])
+    with tempfile.TemporaryFile() as file:
+        workbook.save(file)
+        file.seek(0)
+        while chunk := file.read(FILE_CHUNK_SIZE):
+            yield chunk
+
+
+class _Sink(io.RawIOBase):
+    """Destino de pyarrow que acumula lo escrito hasta que el generador lo envía."""
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.buffer += data
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        return data
+
+
+def parquet_stream(rows):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    types = {
+        'int': pa.int64(), 'float': pa.float64(), 'str': pa.string(), 'bool': pa.bool_(),
+        'date': pa.date32(), 'datetime': pa.timestamp('us', tz='UTC'),
+    }
+    schema = pa.schema([(header, types[kind]) for header, _, kind in COLUMNS])
+    sink = _Sink()
+    writer = pq.ParquetWriter(sink, schema)
+    for batch in batches(rows):
+        columns = [pa.array(values, type=field.type) for values, field in zip(zip(*batch), schema)]
+        writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+ExportFormat = namedtuple('ExportFormat', 'extension content_type stream requires')
+
+FORMATS = {
+    'csv': ExportFormat('csv', 'text/csv; charset=utf-8', csv_stream, None),
+    'xlsx': ExportFormat(
+        'xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', xlsx_stream, 'openpyxl',
+    ),
+    'parquet': ExportFormat('parquet', 'application/vnd.apache.parquet', parquet_stream, 'pyarrow'),
+}
+
+
+def is_available(export_format):
+    return export_format.requires is None or importlib.util.find_spec(export_format.requires) is not None
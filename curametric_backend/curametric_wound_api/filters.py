@@ -0,0 +1,54 @@
+from datetime import date
+
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+
+def parse_id_param(params, name):
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({name: 'Debe ser un número entero.'})
+
+
+def parse_date_param(params, name):
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValidationError({name: 'Fecha inválida, use el formato AAAA-MM-DD.'})
+
+
+class QueryParamFilterBackend(BaseFilterBackend):
+    """
+    Filtra según los parámetros declarados en la vista:
+
+      filter_fields = {'patient': 'patient_id'}          → ?patient=<id>
+      date_range_fields = {'care_date': 'care_date'}     → ?care_date_after=&care_date_before=
+
+    Los rangos de fecha son inclusivos.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+        lookups = {}
+
+        for param, field in getattr(view, 'filter_fields', {}).items():
+            value = parse_id_param(params, param)
+            if value is not None:
+                lookups[field] = value
+
+        for param, field in getattr(view, 'date_range_fields', {}).items():
+            after = parse_date_param(params, f'{param}_after')
+            before = parse_date_param(params, f'{param}_before')
+            if after is not None:
+                lookups[f'{field}__gte'] = after
+            if before is not None:
+                lookups[f'{field}__lte'] = before
+
+        return queryset.filter(**lookups) if lookups else queryset
@@ -0,0 +1,143 @@
+"""
+Pool de conexiones FTP persistentes, sin dependencias de Django para que
+también lo use el script standalone upload.py.
+"""
+import ftplib
+import threading
+import time
+from contextlib import contextmanager
+
+
+class FTPConnectionPool:
+    """
+    Reutiliza sesiones FTP ya autenticadas entre subidas.
+
+    - Como máximo `max_size` conexiones abiertas; quien pida una más espera.
+    - Las conexiones inactivas por más de `max_idle` segundos se cierran.
+    - Una conexión que estuvo inactiva más de `health_check_after` segundos se
+      valida con NOOP antes de entregarla.
+    - Las carpetas remotas que ya se sabe que existen se recuerdan, así una
+      subida a una carpeta conocida es un único STOR con ruta absoluta.
+    """
+
+    def __init__(self, host, user, password, base_path='/', max_size=4, max_idle=60,
+                 health_check_after=5, timeout=30, port=21):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.base_path = '/' + base_path.strip('/') if base_path.strip('/') else ''
+        self.max_idle = max_idle
+        self.health_check_after = health_check_after
+        self.timeout = timeout
+        self._idle = []  # [(ftp, último uso)], la más reciente al final
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._known_dirs = set()
+        self.stats = {'connects': 0, 'reuses': 0, 'discarded': 0}
+
+    def _connect(self):
+        ftp = ftplib.FTP(timeout=self.timeout)
+        ftp.connect(self.host, self.port)
+        ftp.login(self.user, self.password)
+        self._count('connects')
+        return ftp
+
+    def _count(self, stat):
+        with self._lock:
+            self.stats[stat] += 1
+
+    @staticmethod
+    def _close(ftp):
+        try:
+            ftp.quit()
+        except Exception:
+            ftp.close()
+
+    def _evict_idle(self, now):
+        with self._lock:
+            expired = [ftp for ftp, last_used in self._idle if now - last_used > self.max_idle]
+            self._idle = [(ftp, last_used) for ftp, last_used in self._idle if now - last_used <= self.max_idle]
+        for ftp in expired:
+            self._close(ftp)
+
+    def _checkout(self):
+        now = time.monotonic()
+        self._evict_idle(now)
+        while True:
+            with self._lock:
+                ftp, last_used = self._idle.pop() if self._idle else (None, None)
+            if ftp is None:
+                # Fuera del lock: un login lento no frena a los demás (el semáforo limita el total)
+                return self._connect()
+            if now - last_used <= self.health_check_after:
+                self._count('reuses')
+                return ftp
+            try:
+                ftp.voidcmd('NOOP')
+                self._count('reuses')
+                return ftp
+            except ftplib.all_errors:
+                self._count('discarded')
+                self._close(ftp)
+
+    @contextmanager
+    def connection(self):
+        """Entrega una conexión del pool; si falla durante el uso se descarta."""
+        self._slots.acquire()
+        try:
+            ftp = self._checkout()
+            try:
+                yield ftp
+            except BaseException:
+                self._count('discarded')
+                self._close(ftp)
+                raise
+            with self._lock:
+                self._idle.append((ftp, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    def ensure_dir(self, ftp, subfolder):
+        """Crea (si hace falta) base_path/subfolder y devuelve su ruta absoluta."""
+        path = self.base_path
+        for folder in subfolder.strip('/').split('/'):
+            if not folder:
+                continue
+            path = f'{path}/{folder}'
+            if path in self._known_dirs:
+                continue
+            try:
+                ftp.cwd(path)
+            except ftplib.error_perm:
+                ftp.mkd(path)
+            with self._lock:
+                self._known_dirs.add(path)
+        return path or '/'
+
+    def forget_dirs(self, prefix=''):
+        with self._lock:
+            self._known_dirs = {path for path in self._known_dirs if not path.startswith(prefix)}
+
+    def store(self, file, filename, subfolder, blocksize=8192):
+        """Sube `file` (objeto con read()) a subfolder/filename y devuelve la ruta relativa."""
+        relative = f"{subfolder.strip('/')}/{filename}" if subfolder.strip('/') else filename
+        with self.connection() as ftp:
+            directory = self.ensure_dir(ftp, subfolder)
+            try:
+                ftp.storbinary(f"STOR {directory.rstrip('/')}/{filename}", file, blocksize)
+            except ftplib.error_perm:
+                # La carpeta en caché pudo haberse borrado en el servidor
+                self.forget_dirs(directory)
+                if not hasattr(file, 'seek'):
+                    raise
+                file.seek(0)
+                directory = self.ensure_dir(ftp, subfolder)
+                ftp.storbinary(f"STOR {directory.rstrip('/')}/{filename}", file, blocksize)
+        return relative
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for ftp, _ in idle:
+            self._close(ftp)
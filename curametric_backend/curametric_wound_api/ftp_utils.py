@@ -1,33 +1,50 @@
-import ftplib
+import threading
 from django.conf import settings
-from io import BytesIO
+from .ftp_pool import FTPConnectionPool
 
-def upload_to_ftp(file, filename, subfolder):
-    """
-    Sube un archivo al servidor FTP de HostGator y devuelve la URL pública.
-    """
-    try:
-        # Conectar al servidor FTP
-        ftp = ftplib.FTP(settings.FTP_HOST, settings.FTP_USER, settings.FTP_PASS)
-        ftp.cwd(settings.FTP_MEDIA_PATH)  # Ir a la carpeta de destino
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_ftp_pool():
+    """Pool de conexiones FTP del proceso, creado en el primer uso."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = FTPConnectionPool(
+                settings.FTP_HOST,
+                settings.FTP_USER,
+                settings.FTP_PASS,
+                base_path=settings.FTP_MEDIA_PATH,
+                max_size=settings.FTP_POOL_SIZE,
+                max_idle=settings.FTP_POOL_MAX_IDLE,
+            )
+        return _pool
 
-        # Crear subcarpeta si no existe
-        for folder in subfolder.split('/'):
-            if folder not in ftp.nlst():
-                ftp.mkd(folder)
-            ftp.cwd(folder)
 
-        # Leer el archivo en bytes
-        file_buffer = BytesIO(file.read())
+def reset_ftp_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close_all()
+        _pool = None
 
-        # Subir el archivo al FTP
-        ftp.storbinary(f"STOR {filename}", file_buffer)
 
-        # Cerrar conexión
-        ftp.quit()
+def store_file(file, filename, subfolder):
+    """
+    Sube un archivo al servidor FTP y devuelve la ruta relativa.
+    A diferencia de upload_to_ftp, propaga el error para que quien llama pueda reintentar.
+    El archivo se envía por bloques de PHOTO_UPLOAD_BLOCK_SIZE, sin copiarlo a memoria.
+    """
+    return get_ftp_pool().store(file, filename, subfolder, blocksize=settings.PHOTO_UPLOAD_BLOCK_SIZE)
 
-        return f"{subfolder}/{filename}"  # Retornar la URL relativa
 
+def upload_to_ftp(file, filename, subfolder):
+    """
+    Sube un archivo al servidor FTP de HostGator y devuelve la URL pública.
+    """
+    try:
+        return store_file(file, filename, subfolder)
     except Exception as e:
         print("Error subiendo archivo a FTP:", e)
-        return None
\ No newline at end of file
+        return None
@@ -0,0 +1,173 @@
+"""
+Verificación de ID tokens de Google sin ir a Google en cada login.
+
+- Los certificados de firma se piden con una sesión HTTP compartida (conexiones
+  reutilizadas) y se guardan el tiempo que indica su Cache-Control max-age.
+- Los tokens ya verificados se recuerdan por su SHA-256 durante
+  GOOGLE_TOKEN_CACHE_SECONDS, sin pasar de su propio `exp`.
+
+averify_google_token es la variante para vistas asíncronas: los certificados
+se piden con httpx sin bloquear el event loop y se guardan en la misma caché.
+"""
+import hashlib
+import re
+import ssl
+import threading
+import time
+from collections import namedtuple
+
+import certifi
+import httpx
+import requests
+from cachetools import TTLCache
+from django.conf import settings
+from google.auth import exceptions
+from google.auth.transport import requests as google_requests
+from google.oauth2 import id_token
+
+GOOGLE_ISSUERS = ('accounts.google.com', 'https://accounts.google.com')
+MAX_AGE_RE = re.compile(r'(?:^|,)\s*max-age\s*=\s*(\d+)', re.IGNORECASE)
+
+
+def cache_max_age(headers):
+    """Segundos que se puede reutilizar la respuesta según Cache-Control (0 = no guardar)."""
+    cache_control = headers.get('Cache-Control', '')
+    if 'no-store' in cache_control.lower() or 'no-cache' in cache_control.lower():
+        return 0
+    match = MAX_AGE_RE.search(cache_control)
+    return int(match.group(1)) if match else 0
+
+
+# Lo mínimo que google-auth lee de una respuesta de transporte
+CertsResponse = namedtuple('CertsResponse', 'status headers data')
+
+
+class CachingRequest(google_requests.Request):
+    """Transporte de google-auth que guarda las respuestas GET según Cache-Control."""
+
+    def __init__(self, session=None):
+        super().__init__(session=session or requests.Session())
+        self._responses = {}
+        self._lock = threading.Lock()
+        self.fetches = 0
+        # Cargar los certificados de CA cuesta ~50 ms: un solo contexto TLS para todos los clientes httpx
+        self._ssl_context = ssl.create_default_context(cafile=certifi.where())
+
+    def __call__(self, url, method='GET', body=None, headers=None, timeout=120, **kwargs):
+        if method != 'GET':
+            return super().__call__(url, method, body, headers, timeout, **kwargs)
+
+        cached = self.cached(url)
+        if cached is not None:
+            return cached
+
+        response = super().__call__(url, method, body, headers, timeout, **kwargs)
+        self.fetches += 1
+        self.store(url, response)
+        return response
+
+    def cached(self, url):
+        with self._lock:
+            cached = self._responses.get(url)
+            if cached is not None and cached[0] > time.monotonic():
+                return cached[1]
+        return None
+
+    def store(self, url, response):
+        max_age = cache_max_age(response.headers)
+        if response.status == 200 and max_age:
+            with self._lock:
+                self._responses[url] = (time.monotonic() + max_age, response)
+
+    async def afetch(self, url, timeout=120):
+        """GET asíncrono con la misma caché que __call__."""
+        cached = self.cached(url)
+        if cached is not None:
+            return cached
+        try:
+            async with httpx.AsyncClient(timeout=timeout, verify=self._ssl_context) as client:
+                raw = await client.get(url)
+        except httpx.HTTPError as exc:
+            raise exceptions.TransportError(exc) from exc
+        response = CertsResponse(raw.status_code, raw.headers, raw.content)
+        self.fetches += 1
+        self.store(url, response)
+        return response
+
+    def clear(self):
+        with self._lock:
+            self._responses.clear()
+
+
+_transport = None
+_verified = None
+_lock = threading.Lock()
+
+
+def get_transport():
+    global _transport
+    with _lock:
+        if _transport is None:
+            _transport = CachingRequest()
+        return _transport
+
+
+def _get_verified_cache():
+    global _verified
+    with _lock:
+        if _verified is None:
+            _verified = TTLCache(
+                maxsize=settings.GOOGLE_TOKEN_CACHE_SIZE,
+                ttl=settings.GOOGLE_TOKEN_CACHE_SECONDS,
+            )
+        return _verified
+
+
+def reset_google_auth_caches():
+    global _transport, _verified
+    with _lock:
+        _transport = None
+        _verified = None
+
+
+def _cache_key(token, audience):
+    if not token:
+        raise ValueError('Token vacío')
+    return hashlib.sha256(f'{audience}:{token}'.encode()).hexdigest()
+
+
+def _already_verified(key):
+    verified = _get_verified_cache()
+    with _lock:
+        idinfo = verified.get(key)
+    if idinfo is not None and idinfo.get('exp', 0) > time.time():
+        return idinfo
+    return None
+
+
+def _verify(token, audience, key, transport):
+    idinfo = id_token.verify_token(token, transport, audience=audience, certs_url=settings.GOOGLE_CERTS_URL)
+    if idinfo['iss'] not in GOOGLE_ISSUERS:
+        raise exceptions.GoogleAuthError(f"Emisor inválido: {idinfo['iss']}")
+
+    verified = _get_verified_cache()
+    with _lock:
+        verified[key] = idinfo
+    return idinfo
+
+
+def verify_google_token(token, audience):
+    """Equivalente a id_token.verify_oauth2_token, con certificados y tokens en caché."""
+    key = _cache_key(token, audience)
+    return _already_verified(key) or _verify(token, audience, key, get_transport())
+
+
+async def averify_google_token(token, audience):
+    """verify_google_token sin bloquear: solo la descarga de certificados es E/S."""
+    key = _cache_key(token, audience)
+    idinfo = _already_verified(key)
+    if idinfo is not None:
+        return idinfo
+    certs = await get_transport().afetch(settings.GOOGLE_CERTS_URL)
+    # La firma se valida contra los certificados ya descargados, sin más red
+    return _verify(token, audience, key, lambda url, method='GET', **kwargs: certs)
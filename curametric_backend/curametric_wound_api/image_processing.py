@@ -0,0 +1,36 @@
+"""
+Generación de versiones reducidas de las fotos de curaciones.
+
+No depende de Django para poder ejecutarse en un ProcessPoolExecutor sin
+cargar la aplicación en cada proceso hijo.
+"""
+import os
+
+from PIL import Image, ImageOps
+
+EXTENSIONS = {'WEBP': '.webp', 'JPEG': '.jpg'}
+
+
+def build_renditions(source_path, output_dir, sizes, image_format='WEBP', quality=80):
+    """
+    Crea una versión por cada entrada de `sizes` ({'thumb': 320, ...}) con el
+    lado mayor limitado a ese tamaño, la orientación EXIF aplicada y sin
+    metadatos. Devuelve {nombre: ruta local}.
+    """
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    extension = EXTENSIONS[image_format]
+    renditions = {}
+
+    with Image.open(source_path) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ('RGB', 'RGBA') or image_format == 'JPEG':
+            image = image.convert('RGB')
+
+        # De mayor a menor: cada versión se reduce a partir de la anterior
+        for name, max_side in sorted(sizes.items(), key=lambda item: -item[1]):
+            image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+            path = os.path.join(output_dir, f'{stem}_{name}{extension}')
+            image.save(path, image_format, quality=quality)
+            renditions[name] = path
+
+    return renditions
@@ -0,0 +1,114 @@
+"""
+Utilidades compartidas por los comandos benchmark_*: base de datos desechable,
+datos sembrados, medición de tiempos y servidores en subprocesos.
+"""
+import os
+import socket
+import statistics
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import override_settings
+
+from curametric_wound_api.models import Patient, Wound, WoundCare
+
+
+@contextmanager
+def benchmark_database(verbosity=0):
+    """
+    Crea una base de datos de prueba para no sembrar datos en la real. La caché
+    de respuestas se desactiva para medir la consulta y la serialización.
+    """
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=verbosity, autoclobber=True, serialize=False)
+    no_cache = override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'api': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+    })
+    try:
+        with no_cache:
+            yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+
+
+def seed(patients, wounds_per_patient, cares_per_wound, username='bench', batch_size=5000):
+    """Siembra pacientes, heridas y curaciones con bulk_create y devuelve el usuario."""
+    user = User.objects.create_user(username=username, password='bench')
+    audit = {'created_by': user, 'updated_by': user}
+
+    Patient.objects.bulk_create(
+        [Patient(first_name=f'Paciente {i}', last_name='Prueba', rut=f'{i}-K', **audit) for i in range(patients)],
+        batch_size=batch_size,
+    )
+    patient_ids = Patient.objects.filter(created_by=user).values_list('id', flat=True)
+    Wound.objects.bulk_create(
+        [Wound(patient_id=pid, wound_location=f'zona {w}', **audit) for pid in patient_ids for w in range(wounds_per_patient)],
+        batch_size=batch_size,
+    )
+
+    start = date(2024, 1, 1)
+    batch = []
+    for wound_id in Wound.objects.filter(created_by=user).values_list('id', flat=True).iterator():
+        for c in range(cares_per_wound):
+            batch.append(WoundCare(
+                wound_id=wound_id,
+                care_date=start + timedelta(days=3 * c),
+                wound_next_care=start + timedelta(days=3 * c + 3),
+                wound_height=max(0.5, 10 - 0.3 * c),
+                wound_width=max(0.5, 8 - 0.2 * c),
+                wound_depth=1,
+                **audit,
+            ))
+            if len(batch) >= batch_size:
+                WoundCare.objects.bulk_create(batch)
+                batch = []
+    if batch:
+        WoundCare.objects.bulk_create(batch)
+    return user
+
+
+def measure(func, repeat=5):
+    """Mediana en milisegundos de `repeat` ejecuciones de func()."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise CommandError(f'El servidor terminó con código {process.returncode}')
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise CommandError(f'El servidor no abrió el puerto {port}')
+
+
+def production_env(database_url, **extra):
+    """Variables para levantar el proyecto con la configuración de producción (DEBUG=False) en local."""
+    return {
+        **os.environ,
+        'DEBUG': 'False',
+        'DATABASE_URL': database_url,
+        'ALLOWED_HOSTS_DEPLOY': '127.0.0.1',
+        'CORS_ORIGIN_WHITELIST_DEPLOY': 'http://127.0.0.1',
+        'CSRF_TRUSTED_ORIGIN_DEPLOY': 'http://127.0.0.1',
+        **extra,
+    }
@@ -0,0 +1,189 @@
+"""
+Prueba de carga: google-login y upload-wound-photo bajo gunicorn (WSGI, como
+en el Procfile) contra uvicorn (ASGI), con el mismo número de procesos.
+
+Todo es local y desechable: una base SQLite temporal, un sustituto de los
+certificados de Google que tarda --upstream-latency-ms en responder (y no deja
+cachearlos, así que cada login sale a la red) y clientes que suben la foto a
+--client-kbps, como desde una red celular. La subida al FTP va en segundo plano
+y no entra en la medición.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPConnection
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import rsa
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from google.auth import crypt, jwt
+
+from ._benchmark import free_port, production_env, wait_for_port
+
+CLIENT_ID = 'benchmark-asgi'
+
+
+class CertsHandler(BaseHTTPRequestHandler):
+    body = b'{}'
+    latency = 0.0
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(self.body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+def multipart(fields, file_field, filename, payload):
+    boundary = uuid.uuid4().hex
+    parts = [
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        for name, value in fields.items()
+    ]
+    parts.append(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{file_field}"; filename="{filename}"\r\n'
+        f'Content-Type: application/octet-stream\r\n\r\n'.encode() + payload + b'\r\n'
+    )
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return f'multipart/form-data; boundary={boundary}', b''.join(parts)
+
+
+def send(port, path, content_type, body, kbps=None, authorization=None, block_size=16 * 1024):
+    """POST con el cuerpo enviado a `kbps` (None = lo más rápido posible); devuelve (estado, segundos)."""
+    start = time.perf_counter()
+    connection = HTTPConnection('127.0.0.1', port, timeout=120)
+    try:
+        connection.putrequest('POST', path)
+        connection.putheader('Content-Type', content_type)
+        connection.putheader('Content-Length', str(len(body)))
+        if authorization:
+            connection.putheader('Authorization', authorization)
+        connection.endheaders()
+        for offset in range(0, len(body), block_size):
+            block = body[offset:offset + block_size]
+            connection.send(block)
+            if kbps:
+                time.sleep(len(block) * 8 / (kbps * 1000))
+        response = connection.getresponse()
+        response.read()
+        return response.status, time.perf_counter() - start
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = 'Peticiones por segundo de google-login y upload-wound-photo: gunicorn WSGI contra uvicorn ASGI.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help='Procesos de cada servidor')
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument('--requests', type=int, default=64, help='Peticiones por endpoint y servidor')
+        parser.add_argument('--upstream-latency-ms', type=int, default=200)
+        parser.add_argument('--photo-kb', type=int, default=256)
+        parser.add_argument('--client-kbps', type=int, default=4000)
+
+    def handle(self, *args, **options):
+        public_key, private_key = rsa.newkeys(1024)
+        signer = crypt.RSASigner.from_string(private_key.save_pkcs1().decode(), key_id='k1')
+        CertsHandler.body = json.dumps({'k1': public_key.save_pkcs1().decode()}).encode()
+        CertsHandler.latency = options['upstream_latency_ms'] / 1000
+        certs = ThreadingHTTPServer(('127.0.0.1', 0), CertsHandler)
+        certs.daemon_threads = True
+        threading.Thread(target=certs.serve_forever, daemon=True).start()
+
+        with tempfile.TemporaryDirectory() as workdir:
+            env = production_env(
+                f'sqlite:///{workdir}/db.sqlite3',
+                GOOGLE_CLIENT_ID_WEB=CLIENT_ID,
+                GOOGLE_CERTS_URL=f'http://127.0.0.1:{certs.server_port}/certs',
+                PHOTO_STAGING_ROOT=os.path.join(workdir, 'staging'),
+                FTP_HOST='127.0.0.1',
+            )
+            care_id, token = self.prepare_database(env)
+
+            def login():
+                now = int(time.time())
+                token = jwt.encode(signer, {
+                    'iss': 'https://accounts.google.com', 'aud': CLIENT_ID, 'email': 'carga@example.com',
+                    'iat': now, 'exp': now + 3600, 'jti': uuid.uuid4().hex,
+                }).decode()
+                return 'application/json', json.dumps({'token': token}).encode(), None, None
+
+            photo = os.urandom(options['photo_kb'] * 1024)
+
+            def upload():
+                content_type, body = multipart({'wound_care_id': care_id}, 'file', 'foto.jpg', photo)
+                return content_type, body, options['client_kbps'], f'Bearer {token}'
+
+            servers = {
+                'gunicorn (WSGI)': [sys.executable, '-m', 'gunicorn', 'core.wsgi', '--workers', str(options['workers'])],
+                'uvicorn (ASGI)': [sys.executable, '-m', 'uvicorn', 'core.asgi:application', '--workers', str(options['workers'])],
+            }
+            self.stdout.write(
+                f'{"servidor":<16} {"endpoint":<22} {"ok":>5} {"req/s":>8} {"p50":>9} {"p95":>9}'
+            )
+            for name, command in servers.items():
+                port = free_port()
+                bind = ['--bind', f'127.0.0.1:{port}'] if 'gunicorn' in command else ['--host', '127.0.0.1', '--port', str(port)]
+                process = subprocess.Popen(
+                    [*command, *bind], cwd=settings.BASE_DIR, env=env,
+                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                )
+                try:
+                    wait_for_port(port, process)
+                    for path, make_request in (('/api/google-login/', login), ('/api/upload-wound-photo/', upload)):
+                        self.run_load(name, port, path, make_request, options)
+                finally:
+                    process.terminate()
+                    process.wait(timeout=30)
+        certs.shutdown()
+
+    def prepare_database(self, env):
+        """Migra la base temporal y crea una curación para las subidas; devuelve su id y un JWT de su dueño."""
+        manage = [sys.executable, 'manage.py']
+        subprocess.run([*manage, 'migrate', '--verbosity', '0'], cwd=settings.BASE_DIR, env=env, check=True, capture_output=True)
+        script = (
+            'from django.contrib.auth.models import User\n'
+            'from curametric_wound_api.models import Patient, Wound, WoundCare\n'
+            'user = User.objects.create_user("carga", password="carga")\n'
+            'audit = {"created_by": user, "updated_by": user}\n'
+            'patient = Patient.objects.create(first_name="Carga", last_name="Prueba", **audit)\n'
+            'wound = Wound.objects.create(patient=patient, wound_location="talón", **audit)\n'
+            'print("CARE_ID", WoundCare.objects.create(wound=wound, care_date="2025-03-01", **audit).id)\n'
+            'from rest_framework_simplejwt.tokens import AccessToken\n'
+            'print("TOKEN", AccessToken.for_user(user))\n'
+        )
+        result = subprocess.run(
+            [*manage, 'shell', '-c', script], cwd=settings.BASE_DIR, env=env, check=True, capture_output=True, text=True,
+        )
+        values = dict(line.split(maxsplit=1) for line in result.stdout.splitlines() if line.startswith(('CARE_ID', 'TOKEN')))
+        return values['CARE_ID'], values['TOKEN']
+
+    def run_load(self, name, port, path, make_request, options):
+        requests = [make_request() for _ in range(options['requests'])]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(options['concurrency']) as pool:
+            results = list(pool.map(lambda request: send(port, path, *request), requests))
+        elapsed = time.perf_counter() - start
+
+        ok = sum(1 for code, _ in results if code < 300)
+        latencies = sorted(seconds * 1000 for _, seconds in results)
+        p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+        self.stdout.write(
+            f'{name:<16} {path:<22} {ok:>5} {len(results) / elapsed:>8.1f} '
+            f'{statistics.median(latencies):>6.0f} ms {p95:>6.0f} ms'
+        )
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from curametric_wound_api.authentication import StatelessJWTAuthentication, reset_user_cache
+from curametric_wound_api.views import PatientViewSet, WoundCareViewSet
+
+from ._benchmark import benchmark_database, measure, seed
+
+
+class Command(BaseCommand):
+    help = 'Compara latencia y consultas por petición entre JWTAuthentication y StatelessJWTAuthentication.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--patients', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            user = seed(options['patients'], 1, 1)
+            header = f'Bearer {AccessToken.for_user(user)}'
+            factory = APIRequestFactory()
+            reset_user_cache()
+
+            patient_id = user.patients_created.order_by('id').values_list('id', flat=True).first()
+            cases = [
+                (f'/api/patients/{patient_id}/', PatientViewSet, {'get': 'retrieve'}, {'pk': patient_id}),
+                ('/api/woundcares/', WoundCareViewSet, {'get': 'list'}, {}),
+            ]
+
+            self.stdout.write(f'{"endpoint":<22} {"autenticación":<30} {"consultas":>9} {"latencia":>11}')
+            for path, viewset, actions, kwargs in cases:
+                for authentication in (JWTAuthentication, StatelessJWTAuthentication):
+                    view = viewset.as_view(actions, authentication_classes=[authentication])
+
+                    def run():
+                        request = factory.get(path, HTTP_AUTHORIZATION=header)
+                        response = view(request, **kwargs).render()
+                        assert response.status_code == 200, response.status_code
+
+                    run()
+                    with CaptureQueriesContext(connection) as queries:
+                        run()
+                    latency = measure(run, options['repeat'])
+                    self.stdout.write(
+                        f'{path:<22} {authentication.__name__:<30} {len(queries):>9} {latency:>8.2f} ms'
+                    )
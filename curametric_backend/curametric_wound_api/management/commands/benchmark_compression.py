@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.test import Client
+from rest_framework_simplejwt.tokens import AccessToken
+
+from curametric_wound_api.compression import brotli_available
+from curametric_wound_api.renderers import MessagePackRenderer
+
+from ._benchmark import benchmark_database, measure, seed
+
+
+class Command(BaseCommand):
+    help = 'Tamaño y latencia de los listados de pacientes, heridas y curaciones: JSON/MessagePack, sin comprimir, gzip y brotli.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--patients', type=int, default=50)
+        parser.add_argument('--wounds-per-patient', type=int, default=2)
+        parser.add_argument('--cares-per-wound', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=10)
+        parser.add_argument('--bandwidth-kbps', type=int, default=1500, help='Red celular simulada para el tiempo de transferencia')
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            user = seed(options['patients'], options['wounds_per_patient'], options['cares_per_wound'])
+            client = Client(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+
+            media_types = [('json', 'application/json')]
+            try:
+                MessagePackRenderer().render({})
+                media_types.append(('msgpack', MessagePackRenderer.media_type))
+            except ImportError:
+                self.stdout.write('msgpack no está instalado: se omite MessagePack')
+            encodings = ['identity', 'gzip', *(['br'] if brotli_available() else [])]
+            bytes_per_ms = options['bandwidth_kbps'] * 1000 / 8 / 1000
+
+            self.stdout.write(
+                f'{"endpoint":<18} {"formato":<8} {"codificación":<12} {"bytes":>10} {"servidor":>11} {"transferencia":>14}'
+            )
+            for path in ('/api/patients/', '/api/wounds/', '/api/woundcares/'):
+                for name, media_type in media_types:
+                    for encoding in encodings:
+                        def run():
+                            response = client.get(path, HTTP_ACCEPT=media_type, HTTP_ACCEPT_ENCODING=encoding)
+                            assert response.status_code == 200, response.status_code
+                            return response
+
+                        size = len(run().content)
+                        elapsed = measure(run, options['repeat'])
+                        self.stdout.write(
+                            f'{path:<18} {name:<8} {encoding:<12} {size:>10,} {elapsed:>8.1f} ms {size / bytes_per_ms:>11.1f} ms'
+                        )
@@ -0,0 +1,121 @@
+"""
+Peticiones por segundo con y sin reutilizar conexiones a la base.
+
+Levanta gunicorn con la configuración de producción (WEB_CONCURRENCY y
+GUNICORN_THREADS) contra una base de prueba creada junto a la configurada, y
+mide en cada modo de core/database.py: sin persistencia (DB_CONN_MAX_AGE=0),
+conexiones persistentes y, con PostgreSQL y psycopg[pool], el pool. Cada
+petición es un detalle de paciente autenticado con JWT (al menos una consulta).
+Al final de cada modo se muestra la reutilización que informa /api/metrics/
+(de un solo proceso).
+
+Con SQLite abrir una conexión es casi gratis; la diferencia se ve contra un
+PostgreSQL real, donde cada conexión nueva es un handshake TCP/TLS más la
+autenticación.
+"""
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPConnection
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ._benchmark import benchmark_database, free_port, production_env, seed, wait_for_port
+
+
+def database_url(settings_dict, vendor):
+    if vendor == 'sqlite':
+        return f"sqlite:///{settings_dict['NAME']}"
+    credentials = quote(settings_dict['USER'] or '')
+    if settings_dict['PASSWORD']:
+        credentials += ':' + quote(settings_dict['PASSWORD'])
+    host = settings_dict['HOST'] or 'localhost'
+    port = f":{settings_dict['PORT']}" if settings_dict['PORT'] else ''
+    return f"postgres://{credentials}@{host}{port}/{quote(settings_dict['NAME'])}"
+
+
+def get(port, path, header):
+    connection = HTTPConnection('127.0.0.1', port, timeout=60)
+    try:
+        connection.request('GET', path, headers={'Authorization': header})
+        response = connection.getresponse()
+        return response.status, response.read()
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = 'Peticiones por segundo sin conexiones persistentes, con CONN_MAX_AGE y con pool de psycopg.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--requests', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        with tempfile.TemporaryDirectory() as workdir:
+            if vendor == 'sqlite':
+                # La base de prueba en memoria no se puede compartir con los procesos de gunicorn
+                connection.settings_dict['TEST']['NAME'] = os.path.join(workdir, 'benchmark.sqlite3')
+                self.stdout.write('SQLite: abrir una conexión es casi gratis; mida contra PostgreSQL.')
+
+            with benchmark_database():
+                user = seed(10, 1, 1)
+                user.is_staff = True
+                user.save(update_fields=['is_staff'])
+                patient_id = user.patients_created.values_list('id', flat=True).first()
+                header = f'Bearer {AccessToken.for_user(user)}'
+
+                modes = [
+                    ('sin persistencia', {'DB_CONN_MAX_AGE': '0'}),
+                    ('persistentes', {'DB_CONN_MAX_AGE': '600', 'DB_CONN_HEALTH_CHECKS': 'True'}),
+                ]
+                if vendor == 'postgresql' and importlib.util.find_spec('psycopg_pool'):
+                    modes.append(('pool psycopg', {'DB_POOL': 'True'}))
+
+                self.stdout.write(f'{"modo":<18} {"req/s":>8} {"reutilización":>14} {"conexiones":>11}')
+                for name, extra in modes:
+                    env = production_env(
+                        database_url(connection.settings_dict, vendor),
+                        WEB_CONCURRENCY=str(options['workers']),
+                        GUNICORN_THREADS=str(options['threads']),
+                        PHOTO_STAGING_ROOT=os.path.join(workdir, 'staging'),
+                        **extra,
+                    )
+                    self.run_mode(name, env, f'/api/patients/{patient_id}/', header, options)
+
+    def run_mode(self, name, env, path, header, options):
+        port = free_port()
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', 'core.wsgi', '--bind', f'127.0.0.1:{port}'],
+            cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_for_port(port, process)
+            status, _ = get(port, path, header)
+            assert status == 200, status
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(options['concurrency']) as pool:
+                statuses = list(pool.map(lambda _: get(port, path, header)[0], range(options['requests'])))
+            elapsed = time.perf_counter() - start
+            assert set(statuses) == {200}, set(statuses)
+
+            stats = json.loads(get(port, '/api/metrics/', header)[1])['database']
+            self.stdout.write(
+                f'{name:<18} {len(statuses) / elapsed:>8.1f} {stats["reuse_ratio"]:>14} {stats["connections_opened"]:>11}'
+            )
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from curametric_wound_api.models import Wound, WoundCare
+from curametric_wound_api.views import DueCareViewSet
+from curametric_wound_api.wound_summary import rebuild_summaries
+
+from ._benchmark import benchmark_database, measure, seed
+
+
+def client_side(user):
+    """Lo que hace hoy el frontend: bajar todas las curaciones y quedarse con la última de cada herida."""
+    latest = {}
+    for care in WoundCare.objects.filter(created_by=user).order_by('care_date', 'id'):
+        latest[care.wound_id] = care
+    return sorted(latest.values(), key=lambda care: (care.wound_next_care, care.wound_id))[:50]
+
+
+def window_query(user):
+    """Última curación por herida con ROW_NUMBER() sobre el historial, sin tabla de resumen."""
+    latest = WoundCare.objects.filter(created_by=user).annotate(
+        row=Window(RowNumber(), partition_by=F('wound_id'), order_by=[F('care_date').desc(), F('id').desc()]),
+    ).filter(row=1)
+    return list(latest.select_related('wound__patient').order_by('wound_next_care', 'wound_id')[:50])
+
+
+class Command(BaseCommand):
+    help = 'Compara la cola de curaciones pendientes (WoundSummary) con una ventana sobre WoundCare.'
+
+    def add_arguments(self, parser):
+        # 10.000 pacientes × 2 heridas × 50 curaciones = 1.000.000 de curaciones
+        parser.add_argument('--patients', type=int, default=10000)
+        parser.add_argument('--wounds-per-patient', type=int, default=2)
+        parser.add_argument('--cares-per-wound', type=int, default=50)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            user = seed(options['patients'], options['wounds_per_patient'], options['cares_per_wound'])
+            # bulk_create no envía post_save: armar los resúmenes por bloques
+            wound_ids = list(Wound.objects.filter(created_by=user).values_list('id', flat=True))
+            for start in range(0, len(wound_ids), 1000):
+                rebuild_summaries(wound_ids[start:start + 1000])
+            self.stdout.write(f'{WoundCare.objects.count()} curaciones, {len(wound_ids)} heridas sembradas')
+
+            factory = APIRequestFactory()
+            view = DueCareViewSet.as_view({'get': 'list'})
+
+            def endpoint():
+                request = factory.get('/api/due-cares/', {'page_size': 50})
+                force_authenticate(request, user)
+                response = view(request).render()
+                assert response.status_code == 200, response.status_code
+
+            cases = [
+                ('todas las curaciones (cliente)', lambda: client_side(user), 1),
+                ('ROW_NUMBER() sobre WoundCare', lambda: window_query(user), options['repeat']),
+                ('/api/due-cares/ (WoundSummary)', endpoint, options['repeat']),
+            ]
+            for name, run, repeat in cases:
+                self.stdout.write(f'{name:<34} {measure(run, repeat):>10.1f} ms')
@@ -0,0 +1,68 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from curametric_wound_api.models import Wound, WoundCare
+from curametric_wound_api.views import WoundViewSet, WoundCareViewSet
+
+from ._benchmark import benchmark_database, measure, seed
+
+
+class Command(BaseCommand):
+    help = 'Compara la latencia de los listados con y sin filtros de paciente/herida e índices compuestos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--patients', type=int, default=1000)
+        parser.add_argument('--wounds-per-patient', type=int, default=4)
+        parser.add_argument('--cares-per-wound', type=int, default=25)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            user = seed(options['patients'], options['wounds_per_patient'], options['cares_per_wound'])
+            wound = Wound.objects.filter(created_by=user).order_by('id').last()
+            total = WoundCare.objects.count()
+            self.stdout.write(f'{total} curaciones sembradas')
+
+            factory = APIRequestFactory()
+            wound_list = WoundViewSet.as_view({'get': 'list'})
+            care_list = WoundCareViewSet.as_view({'get': 'list'})
+
+            def call(view, path, params):
+                def run():
+                    request = factory.get(path, params)
+                    force_authenticate(request, user)
+                    view(request).render()
+                return run
+
+            cases = [
+                ('wounds sin filtro (antes)', call(wound_list, '/api/wounds/', {})),
+                ('wounds ?patient=', call(wound_list, '/api/wounds/', {'patient': wound.patient_id})),
+                ('woundcares ?wound=', call(care_list, '/api/woundcares/', {'wound': wound.id})),
+                ('woundcares ?patient=&care_date_after=', call(care_list, '/api/woundcares/', {
+                    'patient': wound.patient_id, 'care_date_after': '2024-02-01',
+                })),
+                ('woundcares ?next_care_after=&next_care_before=', call(care_list, '/api/woundcares/', {
+                    'next_care_after': '2024-01-10', 'next_care_before': '2024-01-12',
+                })),
+            ]
+
+            indexed = [(name, measure(run, options['repeat'])) for name, run in cases[1:]]
+
+            # Sin índices compuestos, para comparar contra el esquema anterior
+            index_models = [Wound, WoundCare]
+            with connection.schema_editor() as editor:
+                for model in index_models:
+                    for index in model._meta.indexes:
+                        editor.remove_index(model, index)
+            unindexed = [(name, measure(run, options['repeat'])) for name, run in cases[1:]]
+            with connection.schema_editor() as editor:
+                for model in index_models:
+                    for index in model._meta.indexes:
+                        editor.add_index(model, index)
+
+            name, run = cases[0]
+            self.stdout.write(f'{name:<48} {measure(run, 1):>10.1f} ms')
+            self.stdout.write(f'{"consulta":<48} {"sin índices":>12} {"con índices":>12}')
+            for (name, before), (_, after) in zip(unindexed, indexed):
+                self.stdout.write(f'{name:<48} {before:>9.1f} ms {after:>9.1f} ms')
@@ -0,0 +1,72 @@
+import ftplib
+import os
+import shutil
+import tempfile
+import threading
+import time
+from io import BytesIO
+
+from django.core.management.base import BaseCommand, CommandError
+
+from curametric_wound_api.ftp_pool import FTPConnectionPool
+
+
+def upload_without_pool(host, port, data, filename, subfolder):
+    """Patrón anterior: conexión, login, NLST/MKD por carpeta y QUIT en cada foto."""
+    ftp = ftplib.FTP()
+    ftp.connect(host, port)
+    ftp.login('bench', 'bench')
+    ftp.cwd('/')
+    for folder in subfolder.split('/'):
+        if folder not in ftp.nlst():
+            ftp.mkd(folder)
+        ftp.cwd(folder)
+    ftp.storbinary(f'STOR {filename}', BytesIO(data))
+    ftp.quit()
+
+
+class Command(BaseCommand):
+    help = 'Mide subidas por segundo a un servidor pyftpdlib local, con y sin el pool de conexiones.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--uploads', type=int, default=200)
+        parser.add_argument('--size', type=int, default=200 * 1024, help='Bytes por foto.')
+
+    def handle(self, *args, **options):
+        try:
+            from pyftpdlib.authorizers import DummyAuthorizer
+            from pyftpdlib.handlers import FTPHandler
+            from pyftpdlib.servers import ThreadedFTPServer
+        except ImportError:
+            raise CommandError('Este benchmark necesita pyftpdlib (pip install pyftpdlib).')
+
+        root = tempfile.mkdtemp()
+        authorizer = DummyAuthorizer()
+        authorizer.add_user('bench', 'bench', root, perm='elradfmw')
+        handler = type('BenchHandler', (FTPHandler,), {'authorizer': authorizer})
+        server = ThreadedFTPServer(('127.0.0.1', 0), handler)
+        host, port = server.address
+        threading.Thread(target=server.serve_forever, kwargs={'handle_exit': False}, daemon=True).start()
+
+        data = os.urandom(options['size'])
+        uploads = options['uploads']
+        subfolder = 'wound_photos/patient_1/wound_1'
+
+        try:
+            start = time.perf_counter()
+            for i in range(uploads):
+                upload_without_pool(host, port, data, f'plain_{i}.jpg', subfolder)
+            plain = uploads / (time.perf_counter() - start)
+
+            pool = FTPConnectionPool(host, 'bench', 'bench', base_path='/', port=port)
+            start = time.perf_counter()
+            for i in range(uploads):
+                pool.store(BytesIO(data), f'pooled_{i}.jpg', subfolder)
+            pooled = uploads / (time.perf_counter() - start)
+            pool.close_all()
+        finally:
+            server.close_all()
+            shutil.rmtree(root, ignore_errors=True)
+
+        self.stdout.write(f'sin pool: {plain:8.1f} subidas/s')
+        self.stdout.write(f'con pool: {pooled:8.1f} subidas/s ({pool.stats["connects"]} conexiones)')
@@ -0,0 +1,84 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import rsa
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from google.auth import crypt, jwt
+from google.auth.transport import requests as google_requests
+from google.oauth2 import id_token
+
+from curametric_wound_api.google_auth import reset_google_auth_caches, verify_google_token
+
+from ._benchmark import measure
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide la verificación de tokens de Google contra un endpoint de certificados local '
+        'con latencia simulada: transporte nuevo en cada login vs. certificados y tokens en caché.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--latency', type=int, default=80, help='Milisegundos de latencia del endpoint.')
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        public_key, private_key = rsa.newkeys(2048)
+        signer = crypt.RSASigner.from_string(private_key.save_pkcs1().decode(), key_id='bench')
+        body = json.dumps({'bench': public_key.save_pkcs1().decode()}).encode()
+        latency = options['latency'] / 1000
+
+        class CertsHandler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                time.sleep(latency)
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('Cache-Control', 'public, max-age=3600')
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), CertsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        certs_url = f'http://127.0.0.1:{server.server_port}/certs'
+
+        def make_token(number):
+            now = int(time.time())
+            payload = {
+                'iss': 'accounts.google.com', 'aud': 'bench', 'email': f'user{number}@example.com',
+                'iat': now, 'exp': now + 3600,
+            }
+            return jwt.encode(signer, payload).decode()
+
+        # Firmar fuera de la medición: cada login usa un token distinto
+        repeat = options['repeat']
+        tokens = iter([make_token(number) for number in range(2 * repeat + 2)])
+        new_token = tokens.__next__
+        same_token = new_token()
+        try:
+            with override_settings(GOOGLE_CERTS_URL=certs_url):
+                reset_google_auth_caches()
+                plain = measure(
+                    lambda: id_token.verify_token(new_token(), google_requests.Request(), 'bench', certs_url=certs_url),
+                    repeat,
+                )
+                verify_google_token(new_token(), 'bench')  # primera descarga de certificados
+                cached_certs = measure(lambda: verify_google_token(new_token(), 'bench'), repeat)
+                verify_google_token(same_token, 'bench')
+                cached_token = measure(lambda: verify_google_token(same_token, 'bench'), repeat)
+        finally:
+            reset_google_auth_caches()
+            server.shutdown()
+            server.server_close()
+
+        self.stdout.write(f'transporte nuevo por login:   {plain:8.2f} ms')
+        self.stdout.write(f'certificados en caché:        {cached_certs:8.2f} ms')
+        self.stdout.write(f'token ya verificado:          {cached_token:8.3f} ms')
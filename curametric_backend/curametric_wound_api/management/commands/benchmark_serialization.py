@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from curametric_wound_api.compact import CompactSerializer
+from curametric_wound_api.models import WoundCare
+from curametric_wound_api.query_utils import optimize_queryset
+from curametric_wound_api.renderers import ORJSONRenderer
+from curametric_wound_api.serializers import WoundCareSerializer
+
+from ._benchmark import benchmark_database, measure, seed
+
+
+class Command(BaseCommand):
+    help = 'Filas por segundo al listar curaciones: WoundCareSerializer + JSONRenderer contra values() + CompactSerializer + orjson.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--patients', type=int, default=100)
+        parser.add_argument('--wounds-per-patient', type=int, default=2)
+        parser.add_argument('--cares-per-wound', type=int, default=25)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            user = seed(options['patients'], options['wounds_per_patient'], options['cares_per_wound'])
+            request = APIRequestFactory().get('/api/woundcares/')
+            context = {'request': request}
+            queryset = WoundCare.objects.filter(created_by=user)
+            rows = queryset.count()
+
+            def drf():
+                cares = optimize_queryset(queryset.all(), WoundCareSerializer(context=context))
+                return JSONRenderer().render(WoundCareSerializer(cares, many=True, context=context).data)
+
+            def compact():
+                serializer = CompactSerializer(WoundCareSerializer(context=context))
+                return ORJSONRenderer().render(serializer.to_representation(serializer.values(queryset.all())))
+
+            assert drf() == compact(), 'Las dos salidas no coinciden'
+            self.stdout.write(f'{rows} curaciones, salida idéntica ({len(drf())} bytes)')
+            for name, run in (('WoundCareSerializer + JSONRenderer', drf), ('CompactSerializer + orjson', compact)):
+                elapsed = measure(run, options['repeat'])
+                self.stdout.write(f'{name:<36} {elapsed:>9.1f} ms {rows / elapsed * 1000:>12,.0f} filas/s')
@@ -0,0 +1,42 @@
+import statistics
+
+from django.core.management.base import BaseCommand
+
+from curametric_wound_api.models import Wound, WoundCare
+from curametric_wound_api.trajectory import rank_trajectories
+
+from ._benchmark import benchmark_database, measure, seed
+
+
+def python_rates(user):
+    """Lo que haría la vista sin NumPy: historial de cada herida como objetos y regresión en Python."""
+    rates = {}
+    for wound in Wound.objects.filter(created_by=user):
+        cares = list(WoundCare.objects.filter(wound=wound).order_by('care_date', 'id'))
+        if len(cares) < 2:
+            continue
+        days = [(care.care_date - cares[0].care_date).days for care in cares]
+        areas = [care.wound_height * care.wound_width for care in cares]
+        rates[wound.id] = statistics.linear_regression(days, areas).slope
+    return sorted(rates.items(), key=lambda item: item[1])
+
+
+class Command(BaseCommand):
+    help = 'Compara el ranking de heridas por tasa de cicatrización con NumPy contra un bucle sobre el ORM.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--patients', type=int, default=500)
+        parser.add_argument('--wounds-per-patient', type=int, default=2)
+        parser.add_argument('--cares-per-wound', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            user = seed(options['patients'], options['wounds_per_patient'], options['cares_per_wound'])
+            cares = WoundCare.objects.filter(created_by=user)
+            self.stdout.write(f'{cares.count()} curaciones sembradas')
+
+            python = measure(lambda: python_rates(user), options['repeat'])
+            vectorized = measure(lambda: rank_trajectories(cares), options['repeat'])
+            self.stdout.write(f'{"bucle sobre el ORM":<24} {python:>10.1f} ms')
+            self.stdout.write(f'{"NumPy (una consulta)":<24} {vectorized:>10.1f} ms')
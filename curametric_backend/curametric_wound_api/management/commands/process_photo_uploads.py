@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from curametric_wound_api.chunked_upload import expire_chunked_uploads
+from curametric_wound_api.photo_pipeline import process_due_uploads, sweep_staging
+
+
+class Command(BaseCommand):
+    help = (
+        'Sube las fotos en staging cuyo reintento ya venció, elimina las subidas por partes '
+        'abandonadas y los archivos en staging sin subida (ejecutar periódicamente o tras reiniciar).'
+    )
+
+    def handle(self, *args, **options):
+        results = process_due_uploads()
+        self.stdout.write(f'{len(results)} subidas procesadas: {results.count("done")} completadas')
+        self.stdout.write(f'{expire_chunked_uploads()} subidas por partes expiradas')
+        self.stdout.write(f'{sweep_staging()} archivos huérfanos borrados de staging')
@@ -0,0 +1,36 @@
+"""
+Middleware con soporte async.
+
+Bajo ASGI basta un middleware solo síncrono en la cadena para que Django pase
+toda la petición por su hilo síncrono, y las vistas async se ejecutan una
+detrás de otra. WhiteNoise 6 es solo síncrono: AsyncWhiteNoiseMiddleware sirve
+los mismos archivos y, en modo async, solo toca un hilo para entregar un
+archivo estático; el resto de las peticiones siguen en el event loop.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file, thread_sensitive=False)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve, thread_sensitive=False)(static_file, request)
+        return await self.get_response(request)
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('curametric_wound_api', '0004_fix_wound_fields'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['created_by', 'created_at'], name='patient_owner_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wound',
+            index=models.Index(fields=['created_by', 'patient'], name='wound_owner_patient_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='woundcare',
+            index=models.Index(fields=['created_by', 'wound', 'care_date'], name='woundcare_owner_wound_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='woundcare',
+            index=models.Index(fields=['created_by', 'wound_next_care'], name='woundcare_owner_next_idx'),
+        ),
+    ]
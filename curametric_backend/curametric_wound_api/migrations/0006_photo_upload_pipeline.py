@@ -0,0 +1,42 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('curametric_wound_api', '0005_owner_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='woundcare',
+            name='photo_status',
+            field=models.CharField(blank=True, choices=[('pending', 'Pending'), ('uploading', 'Uploading'), ('done', 'Done'), ('failed', 'Failed')], default='', max_length=10),
+        ),
+        migrations.CreateModel(
+            name='PhotoUpload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('staged_path', models.CharField(max_length=255)),
+                ('filename', models.CharField(max_length=255)),
+                ('subfolder', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('uploading', 'Uploading'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(auto_now_add=True)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('remote_path', models.CharField(blank=True, default='', max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('wound_care', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='photo_uploads', to='curametric_wound_api.woundcare')),
+            ],
+            options={
+                'verbose_name': 'Photo Upload',
+                'verbose_name_plural': 'Photo Uploads',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='photoupload_status_next_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('curametric_wound_api', '0006_photo_upload_pipeline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='photoupload',
+            name='sha256',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='photoupload',
+            name='size',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('curametric_wound_api', '0007_photo_upload_checksum'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='woundcare',
+            name='photo_renditions',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('curametric_wound_api', '0008_woundcare_photo_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredPhoto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('size', models.PositiveBigIntegerField(default=0)),
+                ('remote_path', models.CharField(max_length=255)),
+                ('renditions', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Stored Photo',
+                'verbose_name_plural': 'Stored Photos',
+                'ordering': ['created_at'],
+            },
+        ),
+    ]
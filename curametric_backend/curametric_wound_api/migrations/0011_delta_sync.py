@@ -0,0 +1,51 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('curametric_wound_api', '0010_chunked_upload'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletionLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_name', models.CharField(max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Deletion Log',
+                'verbose_name_plural': 'Deletion Logs',
+                'ordering': ['deleted_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['created_by', 'updated_at'], name='patient_owner_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wound',
+            index=models.Index(fields=['created_by', 'updated_at'], name='wound_owner_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='woundcare',
+            index=models.Index(fields=['created_by', 'updated_at'], name='woundcare_owner_updated_idx'),
+        ),
+        migrations.AddField(
+            model_name='deletionlog',
+            name='created_by',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deletions', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='deletionlog',
+            index=models.Index(fields=['created_by', 'model_name', 'deleted_at'], name='deletionlog_owner_model_idx'),
+        ),
+    ]
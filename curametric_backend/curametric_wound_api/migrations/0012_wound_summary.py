@@ -0,0 +1,94 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:35
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_summaries(apps, schema_editor):
+    """Resumen inicial de cada herida con curaciones (copia local de wound_summary)."""
+    WoundCare = apps.get_model('curametric_wound_api', 'WoundCare')
+    WoundSummary = apps.get_model('curametric_wound_api', 'WoundSummary')
+    wound_ids = WoundCare.objects.order_by().values_list('wound_id', flat=True).distinct()
+    summaries = []
+    for wound_id in wound_ids.iterator():
+        cares = WoundCare.objects.filter(wound_id=wound_id)
+        latest = cares.order_by('-care_date', '-id').first()
+        baseline = cares.order_by('care_date', 'id').first()
+        area = latest.wound_height * latest.wound_width
+        baseline_area = baseline.wound_height * baseline.wound_width
+        summaries.append(WoundSummary(
+            wound_id=wound_id,
+            created_by_id=latest.created_by_id,
+            care_count=cares.count(),
+            first_care_date=baseline.care_date,
+            last_care_date=latest.care_date,
+            next_care_date=latest.wound_next_care,
+            latest_care_id=latest.id,
+            latest_height=latest.wound_height,
+            latest_width=latest.wound_width,
+            latest_depth=latest.wound_depth,
+            latest_granulation_tissue=latest.wound_granulation_tissue,
+            latest_sloughed_tissue=latest.wound_sloughed_tissue,
+            latest_necrotic_tissue=latest.wound_necrotic_tissue,
+            latest_area=area,
+            latest_volume=area * latest.wound_depth,
+            baseline_area=baseline_area,
+            area_reduction_percent=(baseline_area - area) * 100 / baseline_area if baseline_area else None,
+        ))
+    WoundSummary.objects.bulk_create(summaries, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('curametric_wound_api', '0011_delta_sync'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WoundSummary',
+            fields=[
+                ('wound', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='curametric_wound_api.wound')),
+                ('care_count', models.PositiveIntegerField(default=0)),
+                ('first_care_date', models.DateField(blank=True, null=True)),
+                ('last_care_date', models.DateField(blank=True, null=True)),
+                ('next_care_date', models.DateField(blank=True, null=True)),
+                ('latest_height', models.FloatField(default=0)),
+                ('latest_width', models.FloatField(default=0)),
+                ('latest_depth', models.FloatField(default=0)),
+                ('latest_granulation_tissue', models.FloatField(default=0)),
+                ('latest_sloughed_tissue', models.FloatField(default=0)),
+                ('latest_necrotic_tissue', models.FloatField(default=0)),
+                ('latest_area', models.FloatField(default=0)),
+                ('latest_volume', models.FloatField(default=0)),
+                ('baseline_area', models.FloatField(default=0)),
+                ('area_reduction_percent', models.FloatField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Wound Summary',
+                'verbose_name_plural': 'Wound Summaries',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='woundcare',
+            index=models.Index(fields=['wound', 'care_date'], name='woundcare_wound_date_idx'),
+        ),
+        migrations.AddField(
+            model_name='woundsummary',
+            name='created_by',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='wound_summaries', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='woundsummary',
+            name='latest_care',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='curametric_wound_api.woundcare'),
+        ),
+        migrations.AddIndex(
+            model_name='woundsummary',
+            index=models.Index(fields=['created_by', 'next_care_date'], name='woundsummary_owner_next_idx'),
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
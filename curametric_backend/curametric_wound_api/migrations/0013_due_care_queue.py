@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('curametric_wound_api', '0012_wound_summary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='woundsummary',
+            name='woundsummary_owner_next_idx',
+        ),
+        migrations.AddIndex(
+            model_name='woundsummary',
+            index=models.Index(fields=['created_by', 'next_care_date', 'wound'], name='woundsummary_due_queue_idx'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:44
+
+import unicodedata
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+TRIGRAM_INDEX = 'patient_search_name_trgm_idx'
+
+
+def backfill_search_name(apps, schema_editor):
+    # Copia de search.patient_search_name: minúsculas, sin tildes ni espacios repetidos
+    Patient = apps.get_model('curametric_wound_api', 'Patient')
+    patients = []
+    for patient in Patient.objects.only('id', 'first_name', 'last_name').iterator():
+        decomposed = unicodedata.normalize('NFKD', f'{patient.first_name} {patient.last_name}')
+        stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+        patient.search_name = ' '.join(stripped.lower().split())
+        patients.append(patient)
+    Patient.objects.bulk_update(patients, ['search_name'], batch_size=1000)
+
+
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {TRIGRAM_INDEX} ON curametric_wound_api_patient '
+        'USING gin (search_name gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {TRIGRAM_INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('curametric_wound_api', '0013_due_care_queue'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Solo tiene efecto en PostgreSQL
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='patient',
+            name='rut_normalized',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.text.Upper(django.db.models.functions.text.Replace(django.db.models.functions.text.Replace('rut', models.Value('.'), models.Value('')), models.Value('-'), models.Value(''))), output_field=models.CharField(max_length=12)),
+        ),
+        migrations.AddField(
+            model_name='patient',
+            name='search_name',
+            field=models.CharField(default='', editable=False, max_length=201),
+        ),
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['created_by', 'rut_normalized'], name='patient_owner_rut_idx'),
+        ),
+        migrations.RunPython(backfill_search_name, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
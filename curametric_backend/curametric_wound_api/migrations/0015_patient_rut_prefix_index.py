@@ -0,0 +1,19 @@
+# Generated by Django 5.1.6 on 2026-10-18 13:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('curametric_wound_api', '0014_patient_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='patient',
+            index=models.Index(fields=['rut_normalized'], name='patient_rut_prefix_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
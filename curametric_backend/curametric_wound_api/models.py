@@ -1,17 +1,38 @@
 from django.db import models
+from django.db.models import Value
+from django.db.models.functions import Replace, Upper
 from django.contrib.auth.models import User
-from datetime import date, datetime
+from datetime import date
 import logging
-from .ftp_utils import upload_to_ftp
-import os
+import uuid
+
+from .search import patient_search_name
 
 
 logger = logging.getLogger(__name__)
 
+PHOTO_PENDING = 'pending'
+PHOTO_UPLOADING = 'uploading'
+PHOTO_DONE = 'done'
+PHOTO_FAILED = 'failed'
+PHOTO_STATUS_CHOICES = [
+    (PHOTO_PENDING, 'Pending'),
+    (PHOTO_UPLOADING, 'Uploading'),
+    (PHOTO_DONE, 'Done'),
+    (PHOTO_FAILED, 'Failed'),
+]
+
 class Patient(models.Model):
     first_name = models.CharField(max_length=100, blank=False, null=False, default='no name')
     last_name = models.CharField(max_length=100, blank=False, null=False, default='no last name')
     rut = models.CharField(max_length=12, blank=False, null=False, default='no rut')
+    # Ver search.py: nombre normalizado (lo mantiene save()) y RUT sin puntos ni guion
+    search_name = models.CharField(max_length=201, default='', editable=False)
+    rut_normalized = models.GeneratedField(
+        expression=Upper(Replace(Replace('rut', Value('.'), Value('')), Value('-'), Value(''))),
+        output_field=models.CharField(max_length=12),
+        db_persist=True,
+    )
     dob = models.DateField(default=date(1900, 1, 1), blank=False, null=False)
     chronic_diseases = models.JSONField(default=dict, blank=True, null=True)
     predispositions = models.JSONField(default=dict, blank=True, null=True)
@@ -23,10 +44,28 @@ class Patient(models.Model):
     def __str__(self):
         return f'{self.first_name} {self.last_name}'
 
+    def refresh_search_name(self):
+        self.search_name = patient_search_name(self.first_name, self.last_name)
+
+    def save(self, *args, **kwargs):
+        self.refresh_search_name()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'first_name', 'last_name'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'search_name'}
+        super().save(*args, **kwargs)
+
     class Meta:
         ordering = ['created_at']
         verbose_name = 'Patient'
         verbose_name_plural = 'Patients'
+        indexes = [
+            models.Index(fields=['created_by', 'created_at'], name='patient_owner_created_idx'),
+            models.Index(fields=['created_by', 'updated_at'], name='patient_owner_updated_idx'),
+            # El índice de trigramas sobre search_name se crea solo en PostgreSQL (migración 0014)
+            models.Index(fields=['created_by', 'rut_normalized'], name='patient_owner_rut_idx'),
+            # Con una collation distinta de C, PostgreSQL solo usa para LIKE 'prefijo%' un índice con varchar_pattern_ops
+            models.Index(fields=['rut_normalized'], opclasses=['varchar_pattern_ops'], name='patient_rut_prefix_idx'),
+        ]
 
 class Wound(models.Model):
     patient = models.ForeignKey(Patient, on_delete=models.CASCADE)
@@ -45,6 +84,10 @@ class Wound(models.Model):
         ordering = ['created_at']
         verbose_name = 'Wound'
         verbose_name_plural = 'Wounds'
+        indexes = [
+            models.Index(fields=['created_by', 'patient'], name='wound_owner_patient_idx'),
+            models.Index(fields=['created_by', 'updated_at'], name='wound_owner_updated_idx'),
+        ]
 
 class WoundCare(models.Model):
     wound = models.ForeignKey(Wound, on_delete=models.CASCADE)
@@ -74,22 +117,34 @@ class WoundCare(models.Model):
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='wound_cares_created')
     updated_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='wound_cares_updated')
     wound_ia_recomendation = models.JSONField(default=dict, blank=True, null=True)
+    photo_status = models.CharField(max_length=10, choices=PHOTO_STATUS_CHOICES, blank=True, default='')
+    photo_renditions = models.JSONField(default=dict, blank=True)
 
     def __str__(self):
         return f'{self.wound.patient.first_name} {self.wound.patient.last_name} - {self.wound.wound_location} - {self.care_date}'
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Herida al cargar: si la curación se mueve, wound_summary recalcula también la anterior
+        instance._loaded_wound_id = instance.__dict__.get('wound_id')
+        return instance
     
     def save(self, *args, **kwargs):
         try:
-            if self.wound_photo and not self.wound_photo.name.startswith('http'):
-                extension = os.path.splitext(self.wound_photo.name)[1]
-                filename = f"wound_care_photo_{datetime.now().strftime('%Y%m%d')}{extension}"
-                subfolder = f"wound_photos/patient_{self.wound.patient.id}/wound_{self.wound.id}"
-                file_url = upload_to_ftp(self.wound_photo, filename, subfolder)
-                if file_url:
-                    self.wound_photo = file_url
-                else:
-                    raise Exception("Error al subir la imagen a FTP")
+            # La foto nueva no se sube dentro de la transacción: se deja en staging
+            # local y un worker la envía al FTP después del commit.
+            photo = None
+            if self.wound_photo and not self.wound_photo._committed:
+                photo = self.wound_photo.file
+                self.wound_photo = None
+                self.photo_renditions = {}
+                self.photo_status = PHOTO_PENDING
             super().save(*args, **kwargs)
+            if photo is not None:
+                from .photo_pipeline import enqueue_photo
+
+                enqueue_photo(self, photo)
             logger.info(f"WoundCare {self.id} guardado correctamente.")
         except Exception as e:
             logger.error(f"Error al guardar WoundCare {self.id}: {e}")
@@ -98,4 +153,134 @@ class WoundCare(models.Model):
     class Meta:
         ordering = ['created_at']
         verbose_name = 'Wound Care'
-        verbose_name_plural = 'Wound Cares'
\ No newline at end of file
+        verbose_name_plural = 'Wound Cares'
+        indexes = [
+            models.Index(fields=['created_by', 'wound', 'care_date'], name='woundcare_owner_wound_date_idx'),
+            models.Index(fields=['created_by', 'wound_next_care'], name='woundcare_owner_next_idx'),
+            models.Index(fields=['created_by', 'updated_at'], name='woundcare_owner_updated_idx'),
+            models.Index(fields=['wound', 'care_date'], name='woundcare_wound_date_idx'),
+        ]
+
+class WoundSummary(models.Model):
+    """
+    Resumen de cicatrización por herida, mantenido al guardar o borrar curaciones
+    (ver wound_summary.py). Área = alto × ancho; volumen = área × profundidad.
+    """
+    wound = models.OneToOneField(Wound, on_delete=models.CASCADE, primary_key=True, related_name='summary')
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='wound_summaries')
+    care_count = models.PositiveIntegerField(default=0)
+    first_care_date = models.DateField(blank=True, null=True)
+    last_care_date = models.DateField(blank=True, null=True)
+    next_care_date = models.DateField(blank=True, null=True)
+    latest_care = models.ForeignKey(WoundCare, on_delete=models.SET_NULL, blank=True, null=True, related_name='+')
+    latest_height = models.FloatField(default=0)
+    latest_width = models.FloatField(default=0)
+    latest_depth = models.FloatField(default=0)
+    latest_granulation_tissue = models.FloatField(default=0)
+    latest_sloughed_tissue = models.FloatField(default=0)
+    latest_necrotic_tissue = models.FloatField(default=0)
+    latest_area = models.FloatField(default=0)
+    latest_volume = models.FloatField(default=0)
+    baseline_area = models.FloatField(default=0)
+    area_reduction_percent = models.FloatField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.wound_id}: {self.latest_area} cm² ({self.care_count} curaciones)'
+
+    class Meta:
+        verbose_name = 'Wound Summary'
+        verbose_name_plural = 'Wound Summaries'
+        indexes = [
+            # Cola de curaciones pendientes: rango de fechas y orden (next_care_date, wound) del keyset
+            models.Index(fields=['created_by', 'next_care_date', 'wound'], name='woundsummary_due_queue_idx'),
+        ]
+
+class DeletionLog(models.Model):
+    """Registro de borrados (tombstones) para la sincronización incremental."""
+    model_name = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='deletions')
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.model_name} {self.object_id}'
+
+    class Meta:
+        ordering = ['deleted_at']
+        verbose_name = 'Deletion Log'
+        verbose_name_plural = 'Deletion Logs'
+        indexes = [
+            models.Index(fields=['created_by', 'model_name', 'deleted_at'], name='deletionlog_owner_model_idx'),
+        ]
+
+class StoredPhoto(models.Model):
+    """Índice de deduplicación: una fila por contenido (SHA-256) ya almacenado."""
+    sha256 = models.CharField(max_length=64, unique=True)
+    size = models.PositiveBigIntegerField(default=0)
+    remote_path = models.CharField(max_length=255)
+    renditions = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.remote_path
+
+    class Meta:
+        ordering = ['created_at']
+        verbose_name = 'Stored Photo'
+        verbose_name_plural = 'Stored Photos'
+
+
+class PhotoUpload(models.Model):
+    """Foto en staging local pendiente de subir al almacenamiento remoto."""
+    wound_care = models.ForeignKey(WoundCare, on_delete=models.CASCADE, related_name='photo_uploads')
+    staged_path = models.CharField(max_length=255)
+    sha256 = models.CharField(max_length=64, blank=True, default='')
+    size = models.PositiveBigIntegerField(default=0)
+    filename = models.CharField(max_length=255)
+    subfolder = models.CharField(max_length=255)
+    status = models.CharField(max_length=10, choices=PHOTO_STATUS_CHOICES, default=PHOTO_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(auto_now_add=True)
+    last_error = models.TextField(blank=True, default='')
+    remote_path = models.CharField(max_length=255, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.filename} ({self.status})'
+
+    class Meta:
+        ordering = ['created_at']
+        verbose_name = 'Photo Upload'
+        verbose_name_plural = 'Photo Uploads'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='photoupload_status_next_idx'),
+        ]
+
+
+class ChunkedUpload(models.Model):
+    """Subida reanudable: los bytes llegan por partes y se anexan a un archivo local."""
+    ACTIVE = 'active'
+    COMPLETE = 'complete'
+    STATUS_CHOICES = [(ACTIVE, 'Active'), (COMPLETE, 'Complete')]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    wound_care = models.ForeignKey(WoundCare, on_delete=models.CASCADE, related_name='chunked_uploads')
+    filename = models.CharField(max_length=255)
+    total_size = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True, default='')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=ACTIVE)
+    photo_upload = models.ForeignKey(PhotoUpload, on_delete=models.SET_NULL, blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='chunked_uploads_created')
+
+    def __str__(self):
+        return f'{self.filename} ({self.offset}/{self.total_size})'
+
+    class Meta:
+        ordering = ['created_at']
+        verbose_name = 'Chunked Upload'
+        verbose_name_plural = 'Chunked Uploads'
@@ -0,0 +1,174 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.urls import replace_query_param
+
+
+def keyset_filter(ordering, values):
+    """
+    Condición "fila posterior al cursor" para un orden compuesto, p. ej.
+    ('created_at', 'id') → created_at > c OR (created_at = c AND id > i).
+    """
+    condition = Q()
+    equal = Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        condition |= equal & Q(**{f'{name}__{lookup}': value})
+        equal &= Q(**{name: value})
+    return condition
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginación por cursor (keyset) sobre `created_at` con `id` como desempate,
+    sin OFFSET. Se activa cuando el cliente envía ?page_size= o ?cursor=, de modo
+    que las pantallas que aún esperan una lista completa siguen funcionando.
+    """
+    ordering = ('created_at', 'id')
+    # False: pagina aunque el cliente no envíe ?page_size= ni ?cursor=
+    optional = True
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    def __init__(self):
+        self.page_size = getattr(settings, 'API_PAGE_SIZE', 50)
+        self.max_page_size = getattr(settings, 'API_MAX_PAGE_SIZE', 500)
+
+    def get_ordering(self, view):
+        return tuple(getattr(view, 'keyset_ordering', self.ordering))
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size,
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def encode_cursor(self, instance):
+        # isoformat() directo: el JSONEncoder de DRF trunca a milisegundos
+        # `instance` puede ser un modelo o una fila de values() (ver compact.py)
+        get = instance.get if isinstance(instance, dict) else lambda name: getattr(instance, name)
+        values = [get(field.lstrip('-')) for field in self.ordering]
+        values = [value.isoformat() if hasattr(value, 'isoformat') else value for value in values]
+        return urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def decode_cursor(self, request, queryset):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            values = json.loads(urlsafe_b64decode(encoded.encode()))
+            fields = [queryset.model._meta.get_field(field.lstrip('-')) for field in self.ordering]
+            if len(values) != len(fields):
+                raise ValueError
+            return [field.to_python(value) for field, value in zip(fields, values)]
+        except Exception:
+            raise NotFound('Cursor inválido.')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.optional and self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+
+        self.request = request
+        self.ordering = self.get_ordering(view)
+        self.page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        cursor = self.decode_cursor(request, queryset)
+        if cursor is not None:
+            queryset = queryset.filter(keyset_filter(self.ordering, cursor))
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        self.has_next = len(results) > self.page_size
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class RankedPagination(KeysetPagination):
+    """Keyset sobre la anotación `rank` (descendente) con `id` de desempate, p. ej. resultados de búsqueda."""
+    ordering = ('-rank', 'id')
+    optional = False
+
+    def get_ordering(self, view):
+        return self.ordering
+
+    def decode_cursor(self, request, queryset):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            rank, pk = json.loads(urlsafe_b64decode(encoded.encode()))
+            return [float(rank), int(pk)]
+        except Exception:
+            raise NotFound('Cursor inválido.')
+
+
+class StreamingListMixin:
+    """
+    ?stream=1 en un listado devuelve todas las filas como un arreglo JSON en
+    streaming, recorriendo el keyset por lotes en vez de paginar con OFFSET.
+    """
+    stream_query_param = 'stream'
+    stream_batch_size = 1000
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get(self.stream_query_param) in ('1', 'true'):
+            return self.stream_list(self.filter_queryset(self.get_queryset()))
+        return super().list(request, *args, **kwargs)
+
+    def iter_keyset_batches(self, queryset):
+        ordering = tuple(getattr(self, 'keyset_ordering', KeysetPagination.ordering))
+        queryset = queryset.order_by(*ordering)
+        cursor = None
+        while True:
+            batch_queryset = queryset if cursor is None else queryset.filter(keyset_filter(ordering, cursor))
+            batch = list(batch_queryset[:self.stream_batch_size])
+            if not batch:
+                return
+            yield batch
+            if len(batch) < self.stream_batch_size:
+                return
+            cursor = [getattr(batch[-1], field.lstrip('-')) for field in ordering]
+
+    def stream_list(self, queryset):
+        def rows():
+            yield '['
+            first = True
+            for batch in self.iter_keyset_batches(queryset):
+                for item in self.get_serializer(batch, many=True).data:
+                    yield ('' if first else ',') + json.dumps(item, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':'))
+                    first = False
+            yield ']'
+
+        return StreamingHttpResponse(rows(), content_type='application/json')
@@ -0,0 +1,370 @@
+"""
+Subida de fotos en segundo plano.
+
+La petición solo escribe los bytes en staging local y registra un PhotoUpload;
+tras el commit, un pool de hilos los sube al FTP junto con sus versiones reducidas
+(generadas en un pool de procesos) y actualiza WoundCare.wound_photo.
+Los fallos se reintentan con backoff exponencial hasta PHOTO_UPLOAD_MAX_ATTEMPTS.
+
+Las fotos se guardan por contenido (wound_photos/sha256/ab/cd/<sha256>.<ext>):
+una foto cuyo hash ya está en StoredPhoto no se vuelve a subir, solo se enlaza.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+import multiprocessing
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .ftp_utils import store_file
+from .image_processing import build_renditions
+from .models import (
+    PHOTO_DONE, PHOTO_FAILED, PHOTO_PENDING, PHOTO_UPLOADING,
+    PhotoUpload, StoredPhoto, WoundCare,
+)
+from .response_cache import invalidate, invalidate_rows
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_process_pool = None
+_executor_lock = threading.Lock()
+
+
+def content_subfolder(sha256):
+    return f"wound_photos/sha256/{sha256[:2]}/{sha256[2:4]}"
+
+
+class PhotoTooLarge(Exception):
+    pass
+
+
+class SizeLimitUploadHandler(FileUploadHandler):
+    """
+    Corta la lectura del cuerpo multipart en cuanto un archivo supera el
+    máximo, sin esperar a que termine de llegar.
+    """
+
+    def __init__(self, max_size, request=None):
+        super().__init__(request)
+        self.max_size = max_size
+        self.received = 0
+        self.exceeded = False
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > self.max_size:
+            self.exceeded = True
+            raise StopUpload(connection_reset=True)
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
+
+
+class HashingReader:
+    """Envuelve un archivo y calcula SHA-256 y tamaño a medida que se lee."""
+
+    def __init__(self, file):
+        self.file = file
+        self.hash = hashlib.sha256()
+        self.size = 0
+
+    def read(self, size=-1):
+        data = self.file.read(size)
+        self.hash.update(data)
+        self.size += len(data)
+        return data
+
+    def hexdigest(self):
+        return self.hash.hexdigest()
+
+
+def stage_photo(file):
+    """
+    Escribe el archivo subido en PHOTO_STAGING_ROOT por bloques, calculando el
+    SHA-256 al vuelo. Devuelve (ruta local, sha256, tamaño).
+    """
+    max_size = settings.PHOTO_MAX_UPLOAD_SIZE
+    if (getattr(file, 'size', None) or 0) > max_size:
+        raise PhotoTooLarge(file.size)
+
+    os.makedirs(settings.PHOTO_STAGING_ROOT, exist_ok=True)
+    extension = os.path.splitext(file.name)[1]
+    path = os.path.join(settings.PHOTO_STAGING_ROOT, f'{uuid.uuid4().hex}{extension}')
+    digest, size = hashlib.sha256(), 0
+    try:
+        with open(path, 'wb') as staged:
+            for chunk in file.chunks(settings.PHOTO_UPLOAD_BLOCK_SIZE):
+                size += len(chunk)
+                if size > max_size:
+                    raise PhotoTooLarge(size)
+                digest.update(chunk)
+                staged.write(chunk)
+            staged.flush()
+            os.fsync(staged.fileno())
+    except BaseException:
+        os.remove(path)
+        raise
+    return path, digest.hexdigest(), size
+
+
+def enqueue_photo(wound_care, file):
+    """
+    Deja la foto en staging, marca la curación como pendiente y agenda la subida.
+    Si el mismo contenido ya está almacenado, solo se enlaza a la curación.
+    """
+    staged_path, sha256, size = stage_photo(file)
+    return enqueue_staged_photo(wound_care, staged_path, sha256, size, file.name)
+
+
+def enqueue_staged_photo(wound_care, staged_path, sha256, size, original_name):
+    """
+    Como enqueue_photo, para un archivo que ya está en PHOTO_STAGING_ROOT. Si
+    falla, borra el archivo: sin PhotoUpload nadie lo subiría. Si la transacción
+    se revierte después, lo borra sweep_staging.
+    """
+    try:
+        return _enqueue_staged_photo(wound_care, staged_path, sha256, size, original_name)
+    except BaseException:
+        if os.path.exists(staged_path):
+            os.remove(staged_path)
+        raise
+
+
+def _enqueue_staged_photo(wound_care, staged_path, sha256, size, original_name):
+    upload = PhotoUpload.objects.create(
+        wound_care=wound_care,
+        staged_path=staged_path,
+        sha256=sha256,
+        size=size,
+        filename=f"{sha256}{os.path.splitext(original_name)[1].lower()}",
+        subfolder=content_subfolder(sha256),
+    )
+
+    stored = StoredPhoto.objects.filter(sha256=sha256).first()
+    if stored is not None:
+        complete_upload(upload, stored)
+        wound_care.wound_photo = stored.remote_path
+        wound_care.photo_renditions = stored.renditions
+        wound_care.photo_status = PHOTO_DONE
+        return upload
+
+    if wound_care.photo_status != PHOTO_PENDING:
+        wound_care.photo_status = PHOTO_PENDING
+        WoundCare.objects.filter(id=wound_care.id).update(photo_status=PHOTO_PENDING, updated_at=timezone.now())
+        invalidate(wound_care.created_by_id, 'woundcare')
+    transaction.on_commit(lambda: submit_upload(upload.id))
+    return upload
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.PHOTO_UPLOAD_WORKERS,
+                thread_name_prefix='photo-upload',
+            )
+        return _executor
+
+
+def _get_process_pool():
+    global _process_pool
+    with _executor_lock:
+        if _process_pool is None:
+            # spawn: hacer fork desde un proceso con hilos (gunicorn + pool) no es seguro
+            _process_pool = ProcessPoolExecutor(
+                max_workers=settings.PHOTO_PROCESSING_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _process_pool
+
+
+def make_renditions(staged_path):
+    """
+    Genera las versiones reducidas de la foto en el pool de procesos, para no
+    ocupar los workers de las peticiones. Devuelve {} si no es una imagen válida.
+    """
+    args = (
+        staged_path,
+        settings.PHOTO_STAGING_ROOT,
+        settings.PHOTO_RENDITION_SIZES,
+        settings.PHOTO_RENDITION_FORMAT,
+        settings.PHOTO_RENDITION_QUALITY,
+    )
+    try:
+        if settings.PHOTO_PROCESSING_WORKERS <= 0:
+            return build_renditions(*args)
+        return _get_process_pool().submit(build_renditions, *args).result()
+    except Exception as e:
+        logger.warning(f"No se pudieron generar versiones de {staged_path}: {e}")
+        return {}
+
+
+def rendition_filename(filename, local_path, name):
+    return f"{os.path.splitext(filename)[0]}_{name}{os.path.splitext(local_path)[1]}"
+
+
+def submit_upload(upload_id, delay=0):
+    """
+    Agenda process_upload en el pool. Con PHOTO_UPLOAD_WORKERS = 0 se ejecuta
+    en línea (tests y despliegues sin hilos); los reintentos quedan para
+    el comando process_photo_uploads.
+    """
+    if settings.PHOTO_UPLOAD_WORKERS <= 0:
+        if not delay:
+            process_upload(upload_id)
+        return
+    if delay:
+        timer = threading.Timer(delay, submit_upload, args=(upload_id,))
+        timer.daemon = True
+        timer.start()
+        return
+    _get_executor().submit(_run_in_worker, upload_id)
+
+
+def _run_in_worker(upload_id):
+    close_old_connections()
+    try:
+        process_upload(upload_id)
+    except Exception:
+        logger.exception(f"Error procesando PhotoUpload {upload_id}")
+    finally:
+        close_old_connections()
+
+
+def retry_delay(attempts):
+    return settings.PHOTO_UPLOAD_RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+
+
+def process_upload(upload_id):
+    """Sube una foto en staging. Devuelve el estado final del PhotoUpload."""
+    claimed = PhotoUpload.objects.filter(id=upload_id, status=PHOTO_PENDING).update(
+        status=PHOTO_UPLOADING, updated_at=timezone.now(),
+    )
+    if not claimed:
+        return None
+    upload = PhotoUpload.objects.get(id=upload_id)
+
+    # Otra subida con el mismo contenido pudo terminar mientras esta esperaba
+    stored = StoredPhoto.objects.filter(sha256=upload.sha256).first() if upload.sha256 else None
+    if stored is not None:
+        complete_upload(upload, stored)
+        return upload.status
+
+    local_renditions = {}
+    try:
+        with open(upload.staged_path, 'rb') as staged:
+            reader = HashingReader(staged)
+            remote_path = store_file(reader, upload.filename, upload.subfolder)
+        if upload.sha256 and reader.hexdigest() != upload.sha256:
+            raise IOError(f"Checksum distinto al del staging ({reader.hexdigest()})")
+
+        renditions = {'original': remote_path}
+        local_renditions = make_renditions(upload.staged_path)
+        for name, local_path in local_renditions.items():
+            with open(local_path, 'rb') as rendition:
+                renditions[name] = store_file(
+                    rendition, rendition_filename(upload.filename, local_path, name), upload.subfolder,
+                )
+    except Exception as e:
+        upload.attempts += 1
+        upload.last_error = str(e)
+        if upload.attempts >= settings.PHOTO_UPLOAD_MAX_ATTEMPTS:
+            upload.status = PHOTO_FAILED
+            upload.save(update_fields=['attempts', 'last_error', 'status', 'updated_at'])
+            WoundCare.objects.filter(id=upload.wound_care_id).update(
+                photo_status=PHOTO_FAILED, updated_at=timezone.now(),
+            )
+            invalidate_rows(WoundCare, id=upload.wound_care_id)
+            logger.error(f"PhotoUpload {upload.id} falló tras {upload.attempts} intentos: {e}")
+            return upload.status
+
+        delay = retry_delay(upload.attempts)
+        upload.status = PHOTO_PENDING
+        upload.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+        upload.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at', 'updated_at'])
+        logger.warning(f"PhotoUpload {upload.id} falló ({e}), reintento en {delay}s")
+        submit_upload(upload.id, delay=delay)
+        return upload.status
+    finally:
+        for local_path in local_renditions.values():
+            os.remove(local_path)
+
+    stored = StoredPhoto(sha256=upload.sha256, size=upload.size, remote_path=remote_path, renditions=renditions)
+    if upload.sha256:
+        stored, _ = StoredPhoto.objects.get_or_create(
+            sha256=upload.sha256,
+            defaults={'size': upload.size, 'remote_path': remote_path, 'renditions': renditions},
+        )
+    complete_upload(upload, stored)
+    return upload.status
+
+
+def complete_upload(upload, stored):
+    """Enlaza la foto almacenada a la curación y descarta el archivo en staging."""
+    upload.status = PHOTO_DONE
+    upload.remote_path = stored.remote_path
+    upload.save(update_fields=['status', 'remote_path', 'updated_at'])
+    WoundCare.objects.filter(id=upload.wound_care_id).update(
+        wound_photo=stored.remote_path,
+        photo_renditions=stored.renditions,
+        photo_status=PHOTO_DONE,
+        updated_at=timezone.now(),
+    )
+    invalidate_rows(WoundCare, id=upload.wound_care_id)
+    os.remove(upload.staged_path)
+
+
+def process_due_uploads(stale_after=timedelta(minutes=15)):
+    """
+    Procesa las subidas pendientes cuyo reintento ya venció. Las que quedaron
+    en 'uploading' por un worker caído se devuelven a 'pending'.
+    """
+    now = timezone.now()
+    PhotoUpload.objects.filter(status=PHOTO_UPLOADING, updated_at__lt=now - stale_after).update(status=PHOTO_PENDING)
+    due = PhotoUpload.objects.filter(status=PHOTO_PENDING, next_attempt_at__lte=now).values_list('id', flat=True)
+    return [process_upload(upload_id) for upload_id in list(due)]
+
+
+def sweep_staging(max_age=None):
+    """
+    Borra los archivos de PHOTO_STAGING_ROOT con más de `max_age` que ninguna
+    subida pendiente referencia: los deja una transacción revertida después de
+    escribir la foto. Devuelve cuántos borró.
+    """
+    if max_age is None:
+        max_age = timedelta(minutes=settings.PHOTO_STAGING_ORPHAN_MINUTES)
+    root = settings.PHOTO_STAGING_ROOT
+    if not os.path.isdir(root):
+        return 0
+    cutoff = time.time() - max_age.total_seconds()
+    with os.scandir(root) as entries:
+        old = [entry for entry in entries if entry.is_file() and entry.stat().st_mtime < cutoff]
+    if not old:
+        return 0
+
+    # complete_upload borra el archivo: solo las subidas sin terminar lo conservan
+    referenced = {
+        os.path.basename(path)
+        for path in PhotoUpload.objects.exclude(status=PHOTO_DONE).values_list('staged_path', flat=True)
+    }
+    count = 0
+    for entry in old:
+        if entry.name not in referenced:
+            os.remove(entry.path)
+            count += 1
+    return count
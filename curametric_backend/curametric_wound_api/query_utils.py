@@ -0,0 +1,102 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+def _plan(serializer, prefix=''):
+    """
+    Recorre los campos de lectura de un serializer y devuelve
+    (select_related, prefetch_related, only) para su modelo.
+
+    `only` es None cuando algún campo no se puede mapear a una columna
+    (propiedades, SerializerMethodField, source con puntos...), en cuyo caso
+    se cargan todas las columnas para no provocar consultas extra.
+    """
+    model = serializer.Meta.model
+    select, prefetch, only = [], [], []
+
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if field.source == '*' or len(field.source_attrs) != 1:
+            only = None
+            continue
+
+        try:
+            model_field = model._meta.get_field(field.source_attrs[0])
+        except FieldDoesNotExist:
+            only = None
+            continue
+
+        path = prefix + model_field.name
+
+        if isinstance(field, serializers.ListSerializer):
+            child = field.child
+            # El prefetch necesita la FK hacia el padre para emparejar filas
+            required = (model_field.field.name,) if model_field.one_to_many else ()
+            queryset = optimize_queryset(child.Meta.model._default_manager.all(), child, required)
+            prefetch.append(Prefetch(path, queryset=queryset))
+        elif isinstance(field, serializers.BaseSerializer):
+            if model_field.many_to_many or model_field.one_to_many:
+                prefetch.append(path)
+                continue
+            select.append(path)
+            if only is not None:
+                only.append(path)
+            nested_select, nested_prefetch, nested_only = _plan(field, path + '__')
+            select.extend(nested_select)
+            prefetch.extend(nested_prefetch)
+            if only is not None and nested_only is not None:
+                only.extend(nested_only)
+            else:
+                only = None
+        elif isinstance(field, serializers.ManyRelatedField) or model_field.many_to_many or model_field.one_to_many:
+            prefetch.append(path)
+        elif only is not None and model_field.concrete:
+            only.append(path)
+
+    return select, prefetch, only
+
+
+def optimize_queryset(queryset, serializer, required=()):
+    """
+    Aplica select_related/prefetch_related/only() a partir de los campos
+    anidados (source=) del serializer, para que listar no cueste 1 + N consultas.
+
+    `required` son columnas que se leen aunque el serializer no las muestre
+    (orden del keyset, updated_at de la ETag...); con '__' también se une la relación.
+    """
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    if isinstance(serializer, type):
+        serializer = serializer()
+
+    select, prefetch, only = _plan(serializer)
+    relations = [path.rsplit('__', 1)[0] for path in required if '__' in path]
+    select.extend(relation for relation in relations if relation not in select)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    if only:
+        queryset = queryset.only(*only, *relations, *required)
+    return queryset
+
+
+class OptimizedQuerysetMixin:
+    """
+    Optimiza el queryset de las acciones de lectura de un ViewSet según su serializer.
+    Las escrituras cargan el objeto completo para no guardar con campos diferidos.
+    """
+    optimized_actions = ('list', 'retrieve')
+
+    def get_required_fields(self):
+        """Columnas que la vista lee además de las del serializer: por defecto, las del orden del keyset."""
+        ordering = getattr(self, 'keyset_ordering', None) or getattr(self.paginator, 'ordering', ())
+        return [field.lstrip('-') for field in ordering]
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if getattr(self, 'action', None) in self.optimized_actions:
+            queryset = optimize_queryset(queryset, self.get_serializer(), self.get_required_fields())
+        return queryset
@@ -0,0 +1,157 @@
+"""
+Caché de respuestas serializadas por usuario (caché 'api' de settings.CACHES).
+
+Cada usuario tiene una versión por modelo ('patient', 'wound', 'woundcare').
+La clave de una respuesta incluye las versiones de los modelos que la vista
+serializa, así que guardar o borrar una fila solo cambia la versión de su
+dueño y de ese modelo: las entradas viejas dejan de usarse y el LRU las expulsa.
+
+Si la caché 'api' es DummyCache (sin API_CACHE_REDIS_URL) el mixin no hace
+nada: cada petición va a la base.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from rest_framework.response import Response
+
+CACHE_ALIAS = 'api'
+HITS_KEY = 'stats:hits'
+MISSES_KEY = 'stats:misses'
+# Encabezados que se guardan con la respuesta para poder contestar 304 desde la caché
+STORED_HEADERS = ('ETag', 'Last-Modified', 'Cache-Control', 'Vary')
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def cache_enabled():
+    return not isinstance(get_cache(), DummyCache)
+
+
+def version_key(user_id, model_name):
+    return f'v:{user_id}:{model_name}'
+
+
+def _new_version():
+    # Basada en el reloj y no en 1: si el LRU expulsa la versión, la nueva no
+    # coincide con la de entradas anteriores
+    return time.time_ns()
+
+
+def get_versions(user_id, model_names):
+    cache = get_cache()
+    keys = [version_key(user_id, name) for name in model_names]
+    versions = cache.get_many(keys)
+    missing = {key: _new_version() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def _bump(user_id, model_names):
+    cache = get_cache()
+    for name in model_names:
+        key = version_key(user_id, name)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _new_version(), timeout=None)
+
+
+def invalidate(user_id, *model_names):
+    """
+    Invalida las respuestas de `user_id` que dependen de `model_names`.
+    Se repite al confirmar la transacción: una lectura concurrente pudo guardar
+    en caché los datos anteriores al commit con la versión ya incrementada.
+    """
+    if not cache_enabled():
+        return
+    _bump(user_id, model_names)
+    transaction.on_commit(lambda: _bump(user_id, model_names))
+
+
+def invalidate_rows(model, **filters):
+    """Invalida por dueño las filas que cambian con un queryset.update()."""
+    if not cache_enabled():
+        return
+    owners = model.objects.filter(**filters).values_list('created_by_id', flat=True).distinct()
+    for owner_id in owners:
+        invalidate(owner_id, model._meta.model_name)
+
+
+def _count(key):
+    cache = get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Primera vez: si otro proceso la creó entre medio, incrementar la suya
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def cache_stats():
+    stats = get_cache().get_many([HITS_KEY, MISSES_KEY])
+    hits, misses = stats.get(HITS_KEY, 0), stats.get(MISSES_KEY, 0)
+    return {
+        'backend': settings.CACHES[CACHE_ALIAS]['BACKEND'].rsplit('.', 1)[-1],
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / (hits + misses), 3) if hits + misses else None,
+    }
+
+
+class ResponseCacheMixin:
+    """
+    Guarda en caché los listados y detalles de un ViewSet. `cache_dependencies`
+    enumera los modelos que aparecen en la respuesta (incluidos los anidados).
+    """
+    cache_dependencies = ()
+
+    def response_cache_key(self, request, kwargs):
+        model_names = self.cache_dependencies or (self.get_queryset().model._meta.model_name,)
+        versions = get_versions(request.user.pk, model_names)
+        raw = repr((
+            self.basename, self.action, kwargs.get(self.lookup_url_kwarg or self.lookup_field),
+            # La ETag guardada depende del formato negociado
+            request.accepted_renderer.media_type, versions, sorted(request.query_params.lists()),
+        ))
+        return f'r:{request.user.pk}:{hashlib.sha256(raw.encode()).hexdigest()}'
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if not cache_enabled():
+            return handler(request, *args, **kwargs)
+        cache = get_cache()
+        key = self.response_cache_key(request, kwargs)
+        cached = cache.get(key)
+        if cached is not None:
+            _count(HITS_KEY)
+            data, headers = cached
+            response = Response(data, headers=headers)
+            return get_conditional_response(
+                request,
+                etag=headers.get('ETag'),
+                last_modified=parse_http_date_safe(headers.get('Last-Modified', '')),
+                response=response,
+            )
+
+        _count(MISSES_KEY)
+        response = handler(request, *args, **kwargs)
+        # Solo respuestas DRF completas: ni 304 ni streaming
+        if isinstance(response, Response) and response.status_code == 200:
+            headers = {name: response[name] for name in STORED_HEADERS if response.has_header(name)}
+            cache.set(key, (response.data, headers), timeout=settings.API_CACHE_TIMEOUT)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
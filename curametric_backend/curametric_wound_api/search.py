@@ -0,0 +1,71 @@
+"""
+Búsqueda de pacientes por nombre y RUT.
+
+- Patient.search_name guarda "nombre apellido" en minúsculas y sin tildes, así
+  que "perez" encuentra a "Pérez" y "nunez" a "Núñez".
+- Patient.rut_normalized es una columna generada e indexada con el RUT sin
+  puntos ni guion ("12.345.678-k" → "12345678K").
+
+En PostgreSQL, search_name tiene un índice GIN de trigramas (pg_trgm): sirve
+para el LIKE '%...%' de cada palabra, para tolerar errores de tipeo
+(<%, similitud de palabras) y para ordenar por similitud. En SQLite (desarrollo)
+se buscan las mismas palabras con LIKE y se ordena por tipo de coincidencia.
+"""
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models import Case, FloatField, Q, Value, When
+from rest_framework.exceptions import ValidationError
+
+MIN_QUERY_LENGTH = 2
+RUT_RE = re.compile(r'\d{1,9}[0-9K]?')
+
+
+def normalize_text(value):
+    """Minúsculas, sin tildes ni espacios repetidos."""
+    decomposed = unicodedata.normalize('NFKD', value or '')
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(stripped.lower().split())
+
+
+def patient_search_name(first_name, last_name):
+    return normalize_text(f'{first_name} {last_name}')
+
+
+def normalize_rut(value):
+    return re.sub(r'[.\-\s]', '', value or '').upper()
+
+
+def search_patients(queryset, query):
+    """Filtra `queryset` por `query` y anota `rank` (mayor es mejor)."""
+    text = normalize_text(query)
+    if len(text) < MIN_QUERY_LENGTH:
+        raise ValidationError({'q': f'Ingrese al menos {MIN_QUERY_LENGTH} caracteres.'})
+
+    words = Q()
+    for word in text.split():
+        words &= Q(search_name__contains=word)
+    condition = words
+
+    rut = normalize_rut(query)
+    rut_rank = []
+    if RUT_RE.fullmatch(rut):
+        condition |= Q(rut_normalized__startswith=rut)
+        rut_rank = [When(rut_normalized=rut, then=Value(3.0)), When(rut_normalized__startswith=rut, then=Value(2.0))]
+
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import TrigramWordSimilarity
+
+        condition |= Q(search_name__trigram_word_similar=text)
+        name_rank = TrigramWordSimilarity(Value(text), 'search_name')
+    else:
+        name_rank = Case(
+            When(search_name=text, then=Value(1.0)),
+            When(search_name__startswith=text, then=Value(0.8)),
+            When(words, then=Value(0.5)),
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+    rank = Case(*rut_rank, default=name_rank, output_field=FloatField()) if rut_rank else name_rank
+    return queryset.filter(condition).annotate(rank=rank)
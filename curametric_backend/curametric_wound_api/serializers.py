@@ -1,6 +1,8 @@
+from django.conf import settings
 from rest_framework import serializers
-from .models import Patient, Wound, WoundCare
+from .models import Patient, Wound, WoundCare, PhotoUpload, ChunkedUpload, WoundSummary
 from django.contrib.auth.models import User
+from .due_queue import care_status
 
 
 class PatientSerializer(serializers.ModelSerializer):
@@ -15,6 +17,13 @@ class PatientSerializer(serializers.ModelSerializer):
         ]
 
 
+class PatientSearchSerializer(PatientSerializer):
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta(PatientSerializer.Meta):
+        fields = [*PatientSerializer.Meta.fields, 'rank']
+
+
 class WoundSerializer(serializers.ModelSerializer):
     patientData = PatientSerializer(read_only=True, source='patient')
 
@@ -23,6 +32,19 @@ class WoundSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class RenditionUrlsField(serializers.ReadOnlyField):
+    """{'thumb': ruta, ...} → {'thumb': URL, ...}, con la misma lógica que ImageField."""
+
+    def to_representation(self, value):
+        storage = WoundCare._meta.get_field('wound_photo').storage
+        request = self.context.get('request')
+        urls = {}
+        for name, path in (value or {}).items():
+            url = storage.url(path)
+            urls[name] = request.build_absolute_uri(url) if request is not None else url
+        return urls
+
+
 class WoundCareSerializer(serializers.ModelSerializer):
     woundData = WoundSerializer(read_only=True, source='wound')
 
@@ -41,6 +63,7 @@ class WoundCareSerializer(serializers.ModelSerializer):
     secondary_dressing = serializers.CharField(source='wound_secondary_dressing', allow_blank=True, required=False, default='')
     next_care_date = serializers.DateField(source='wound_next_care', required=False)
     care_notes = serializers.CharField(source='wound_care_notes', allow_blank=True, required=False, default='')
+    photo_renditions = RenditionUrlsField()
 
     class Meta:
         model = WoundCare
@@ -53,9 +76,81 @@ class WoundCareSerializer(serializers.ModelSerializer):
             'debridement', 'primary_dressing', 'secondary_dressing',
             'skin_protection', 'wound_cleaning_solution',
             'next_care_date', 'care_notes',
-            'wound_photo', 'wound_ia_recomendation',
+            'wound_photo', 'photo_status', 'photo_renditions', 'wound_ia_recomendation',
             'created_at', 'updated_at', 'created_by', 'updated_by',
         ]
+        read_only_fields = ['photo_status']
+
+    def validate_wound_photo(self, value):
+        if value and getattr(value, 'size', 0) > settings.PHOTO_MAX_UPLOAD_SIZE:
+            raise serializers.ValidationError('La imagen supera el tamaño máximo permitido.')
+        return value
+
+
+class WoundSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = WoundSummary
+        fields = [
+            'wound', 'care_count', 'first_care_date', 'last_care_date', 'next_care_date',
+            'latest_care', 'latest_height', 'latest_width', 'latest_depth',
+            'latest_granulation_tissue', 'latest_sloughed_tissue', 'latest_necrotic_tissue',
+            'latest_area', 'latest_volume', 'baseline_area', 'area_reduction_percent', 'updated_at',
+        ]
+        read_only_fields = fields
+
+
+class DuePatientSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Patient
+        fields = ['id', 'first_name', 'last_name', 'rut']
+
+
+class DueCareSerializer(serializers.ModelSerializer):
+    """Elemento de la cola de curaciones: la herida, su paciente y el estado respecto de `today` (contexto)."""
+    wound_location = serializers.CharField(source='wound.wound_location', read_only=True)
+    patient = DuePatientSerializer(source='wound.patient', read_only=True)
+    status = serializers.SerializerMethodField()
+
+    class Meta:
+        model = WoundSummary
+        fields = [
+            'wound', 'wound_location', 'patient', 'status', 'next_care_date', 'last_care_date',
+            'latest_care', 'care_count', 'latest_area', 'area_reduction_percent',
+        ]
+        read_only_fields = fields
+
+    def get_status(self, summary):
+        return care_status(summary.next_care_date, self.context['today'])
+
+
+class PhotoUploadSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PhotoUpload
+        fields = [
+            'id', 'wound_care', 'status', 'attempts', 'next_attempt_at',
+            'last_error', 'remote_path', 'created_at', 'updated_at',
+        ]
+        read_only_fields = fields
+
+
+class ChunkedUploadSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ChunkedUpload
+        fields = [
+            'id', 'wound_care', 'filename', 'total_size', 'sha256',
+            'offset', 'status', 'photo_upload', 'created_at', 'updated_at',
+        ]
+        read_only_fields = ['offset', 'status', 'photo_upload']
+
+    def validate_wound_care(self, value):
+        if value.created_by_id != self.context['request'].user.id:
+            raise serializers.ValidationError('WoundCare no encontrado.')
+        return value
+
+    def validate_total_size(self, value):
+        if not value or value > settings.PHOTO_MAX_UPLOAD_SIZE:
+            raise serializers.ValidationError('La imagen supera el tamaño máximo permitido.')
+        return value
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -0,0 +1,55 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .authentication import forget_cached_user
+from .models import DeletionLog, Patient, Wound, WoundCare
+from .response_cache import invalidate
+from .wound_summary import care_deleted, care_saved, care_saving
+
+
+@receiver(post_delete, sender=Patient)
+@receiver(post_delete, sender=Wound)
+@receiver(post_delete, sender=WoundCare)
+def log_deletion(sender, instance, origin=None, **kwargs):
+    # Al borrar el usuario también se borran sus registros: no hay a quién avisar
+    if isinstance(origin, User) or getattr(origin, 'model', None) is User:
+        return
+    DeletionLog.objects.create(
+        model_name=sender._meta.model_name,
+        object_id=instance.pk,
+        created_by_id=instance.created_by_id,
+    )
+
+
+@receiver(post_save, sender=Patient)
+@receiver(post_save, sender=Wound)
+@receiver(post_save, sender=WoundCare)
+@receiver(post_delete, sender=Patient)
+@receiver(post_delete, sender=Wound)
+@receiver(post_delete, sender=WoundCare)
+def invalidate_cached_responses(sender, instance, **kwargs):
+    invalidate(instance.created_by_id, sender._meta.model_name)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_user(sender, instance, **kwargs):
+    forget_cached_user(instance.pk)
+
+
+@receiver(pre_save, sender=WoundCare)
+def remember_previous_wound(sender, instance, **kwargs):
+    care_saving(instance)
+
+
+@receiver(post_save, sender=WoundCare)
+def update_wound_summary(sender, instance, created, **kwargs):
+    care_saved(instance, created)
+
+
+@receiver(post_delete, sender=WoundCare)
+def rebuild_wound_summary(sender, instance, origin=None, **kwargs):
+    # Si se borra la herida (o su paciente), el resumen se borra en cascada con ella
+    if isinstance(origin, WoundCare) or getattr(origin, 'model', None) is WoundCare:
+        care_deleted(instance)
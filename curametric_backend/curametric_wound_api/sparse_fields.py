@@ -0,0 +1,92 @@
+"""
+Campos a pedido en las lecturas: ?fields= y ?expand=.
+
+    ?fields=id,care_date,woundData.wound_location
+        Solo esos campos; con punto se eligen campos de un objeto anidado.
+    ?expand=woundData
+        Solo esos objetos anidados (woundData sin patientData). ?expand= vacío
+        no anida nada: quedan los ids ("wound", "patient"). Sin el parámetro se
+        anida todo, como siempre.
+
+Se podan los campos del serializer antes de usarlo, así que
+optimize_queryset (only/select_related) y CompactSerializer (values) cargan
+solo las columnas y los JOIN de lo que queda.
+"""
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+def parse_paths(value):
+    """'a,b.c' → {('a',), ('b', 'c')}; None si no se envió el parámetro."""
+    if value is None:
+        return None
+    return {tuple(part.split('.')) for part in value.split(',') if part.strip()} if value.strip() else set()
+
+
+def _children(paths, name):
+    """Subrutas bajo `name`; None si se pidió `name` completo."""
+    children = set()
+    for path in paths:
+        if path[0] != name:
+            continue
+        if len(path) == 1:
+            return None
+        children.add(path[1:])
+    return children
+
+
+def _unknown(serializer, paths, prefix):
+    for path in paths:
+        field = serializer.fields.get(path[0])
+        if field is None or (len(path) > 1 and not isinstance(field, serializers.Serializer)):
+            yield '.'.join((*prefix, *path))
+        elif len(path) > 1:
+            yield from _unknown(field, {path[1:]}, (*prefix, path[0]))
+
+
+def prune_serializer(serializer, fields=None, expand=None):
+    """Quita del serializer (y de sus anidados) lo que no piden `fields` / `expand`."""
+    errors = {}
+    for param, paths in ((FIELDS_PARAM, fields), (EXPAND_PARAM, expand)):
+        unknown = sorted(_unknown(serializer, paths or (), ()))
+        if unknown:
+            errors[param] = [f"Campos desconocidos: {', '.join(unknown)}."]
+    if errors:
+        raise ValidationError(errors)
+    _prune(serializer, fields, expand)
+
+
+def _prune(serializer, fields, expand):
+    if fields is not None:
+        wanted = {path[0] for path in fields}
+        for name in [name for name in serializer.fields if name not in wanted]:
+            serializer.fields.pop(name)
+
+    for name, field in list(serializer.fields.items()):
+        if not isinstance(field, serializers.Serializer):
+            continue
+        if expand is not None and name not in {path[0] for path in expand}:
+            serializer.fields.pop(name)
+            continue
+        _prune(
+            field,
+            None if fields is None else _children(fields, name),
+            None if expand is None else _children(expand, name) or set(),
+        )
+
+
+class SparseFieldsMixin:
+    """Aplica ?fields= / ?expand= al serializer de las acciones de lectura de un ViewSet."""
+    sparse_actions = ('list', 'retrieve')
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if getattr(self, 'action', None) in self.sparse_actions:
+            params = self.request.query_params
+            fields, expand = parse_paths(params.get(FIELDS_PARAM)), parse_paths(params.get(EXPAND_PARAM))
+            if fields is not None or expand is not None:
+                prune_serializer(getattr(serializer, 'child', serializer), fields, expand)
+        return serializer
@@ -1,3 +1,1795 @@
-from django.test import TestCase
+import asyncio
+import csv
+import ftplib
+import gzip
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import tracemalloc
+import unittest
+from datetime import date, timedelta
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.files import File
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import DatabaseError, IntegrityError, connection, connections, transaction
+from django.db.backends.signals import connection_created
+from django.utils import timezone
+import rsa
+from asgiref.sync import async_to_sync
+from google.auth import crypt, jwt
+from google.oauth2 import id_token
+from PIL import Image
+from rest_framework import serializers
+from rest_framework.exceptions import ErrorDetail
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.database import configure_connections
+
+from .authentication import StatelessJWTAuthentication, reset_user_cache
+from .chunked_upload import expire_chunked_uploads
+from .ftp_pool import FTPConnectionPool
+from .ftp_utils import reset_ftp_pool
+from .google_auth import reset_google_auth_caches
+from .models import ChunkedUpload, DeletionLog, Patient, PhotoUpload, StoredPhoto, Wound, WoundCare, WoundSummary
+from .photo_pipeline import enqueue_photo, process_due_uploads, sweep_staging
+from .query_utils import optimize_queryset
+from .response_cache import get_cache
+from .search import search_patients
+from .serializers import WoundCareSerializer
+from .compact import CompactSerializer
+from .db_metrics import reset_connection_stats
+from .renderers import ORJSONRenderer
+
+
+class WoundApiTestCase(TestCase):
+    """Datos base: un usuario con pacientes, heridas y curaciones."""
+
+    def setUp(self):
+        get_cache().clear()
+        self.user = User.objects.create_user(username='nurse', password='secret')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_patient(self, **kwargs):
+        kwargs.setdefault('first_name', 'Ana')
+        kwargs.setdefault('last_name', 'Pérez')
+        return Patient.objects.create(created_by=self.user, updated_by=self.user, **kwargs)
+
+    def create_wound(self, patient, **kwargs):
+        kwargs.setdefault('wound_location', 'talón')
+        return Wound.objects.create(patient=patient, created_by=self.user, updated_by=self.user, **kwargs)
+
+    def create_care(self, wound, **kwargs):
+        kwargs.setdefault('care_date', date(2025, 3, 1))
+        return WoundCare.objects.create(wound=wound, created_by=self.user, updated_by=self.user, **kwargs)
+
+    def seed(self, patients, wounds_per_patient=1, cares_per_wound=1):
+        for _ in range(patients):
+            patient = self.create_patient()
+            for _ in range(wounds_per_patient):
+                wound = self.create_wound(patient)
+                for _ in range(cares_per_wound):
+                    self.create_care(wound)
+
+
+class QueryOptimizationTests(WoundApiTestCase):
+    def test_plan_follows_nested_sources(self):
+        queryset = optimize_queryset(WoundCare.objects.all(), WoundCareSerializer)
+        self.assertEqual(queryset.query.select_related, {'wound': {'patient': {}}})
+
+    def assertListQueries(self, url, expected_rows):
+        # Listado + agregado de la ETag (ConditionalGetMixin)
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), expected_rows)
+
+    def test_list_query_count_is_constant(self):
+        self.seed(1)
+        self.assertListQueries('/api/patients/', 1)
+        self.assertListQueries('/api/wounds/', 1)
+        self.assertListQueries('/api/woundcares/', 1)
+
+        self.seed(4, wounds_per_patient=2, cares_per_wound=3)
+        self.assertListQueries('/api/patients/', 5)
+        self.assertListQueries('/api/wounds/', 9)
+        self.assertListQueries('/api/woundcares/', 25)
+
+    def test_nested_data_is_serialized(self):
+        patient = self.create_patient(first_name='Rosa')
+        self.create_care(self.create_wound(patient))
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/woundcares/')
+        self.assertEqual(response.json()[0]['woundData']['patientData']['first_name'], 'Rosa')
+
+
+class FilterTests(WoundApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.patient = self.create_patient()
+        self.wound = self.create_wound(self.patient)
+        self.other_wound = self.create_wound(self.create_patient())
+        self.early = self.create_care(self.wound, care_date=date(2025, 1, 10), wound_next_care=date(2025, 1, 17))
+        self.late = self.create_care(self.wound, care_date=date(2025, 2, 10), wound_next_care=date(2025, 2, 17))
+        self.other = self.create_care(self.other_wound, care_date=date(2025, 2, 11), wound_next_care=date(2025, 2, 18))
+
+    def ids(self, url, params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return [item['id'] for item in response.json()]
+
+    def test_wounds_filtered_by_patient(self):
+        self.assertEqual(self.ids('/api/wounds/', {'patient': self.patient.id}), [self.wound.id])
+
+    def test_woundcares_filtered_by_patient_and_wound(self):
+        self.assertEqual(self.ids('/api/woundcares/', {'patient': self.patient.id}), [self.early.id, self.late.id])
+        self.assertEqual(self.ids('/api/woundcares/', {'wound': self.other_wound.id}), [self.other.id])
+
+    def test_date_ranges_are_inclusive(self):
+        self.assertEqual(self.ids('/api/woundcares/', {'care_date_after': '2025-02-10'}), [self.late.id, self.other.id])
+        self.assertEqual(
+            self.ids('/api/woundcares/', {'next_care_after': '2025-01-01', 'next_care_before': '2025-02-17'}),
+            [self.early.id, self.late.id],
+        )
+
+    def test_invalid_params_are_rejected(self):
+        self.assertEqual(self.client.get('/api/woundcares/', {'care_date_after': '10-02-2025'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/wounds/', {'patient': 'abc'}).status_code, 400)
+
+
+class PaginationTests(WoundApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.seed(1, wounds_per_patient=1, cares_per_wound=7)
+        # Misma marca de tiempo en varias filas: el id desempata
+        first = WoundCare.objects.order_by('id')[2]
+        WoundCare.objects.filter(id__gt=first.id).update(created_at=first.created_at)
+        self.expected = list(WoundCare.objects.order_by('created_at', 'id').values_list('id', flat=True))
+
+    def test_cursor_walks_every_row_once(self):
+        ids, url, pages = [], '/api/woundcares/?page_size=3', 0
+        while url:
+            with self.assertNumQueries(2):
+                body = self.client.get(url).json()
+            ids.extend(item['id'] for item in body['results'])
+            url, pages = body['next'], pages + 1
+        self.assertEqual(ids, self.expected)
+        self.assertEqual(pages, 3)
+
+    def test_without_pagination_params_returns_plain_list(self):
+        self.assertEqual(len(self.client.get('/api/woundcares/').json()), 7)
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get('/api/woundcares/', {'cursor': 'nope'}).status_code, 404)
+
+    def test_stream_exports_all_rows(self):
+        from .views import WoundCareViewSet
+        with mock.patch.object(WoundCareViewSet, 'stream_batch_size', 2):
+            response = self.client.get('/api/woundcares/', {'stream': '1'})
+            body = json.loads(b''.join(response.streaming_content))
+        self.assertEqual([item['id'] for item in body], self.expected)
+
+
+class ConditionalRequestTests(WoundApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.patient = self.create_patient()
+        self.wound = self.create_wound(self.patient)
+        self.care = self.create_care(self.wound)
+
+    def get(self, url, etag=None, **headers):
+        if etag:
+            headers['HTTP_IF_NONE_MATCH'] = etag
+        return self.client.get(url, **headers)
+
+    def test_unchanged_list_is_not_modified(self):
+        etag = self.get('/api/woundcares/')['ETag']
+        get_cache().clear()  # sin caché de respuestas: solo la consulta agregada
+        with self.assertNumQueries(1):
+            response = self.get('/api/woundcares/', etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+
+    def test_list_etag_changes_with_rows_params_and_nested_data(self):
+        etag = self.get('/api/woundcares/')['ETag']
+        self.assertEqual(self.get(f'/api/woundcares/?wound={self.wound.id}', etag).status_code, 200)
+
+        self.patient.first_name = 'Rosa'
+        self.patient.save()
+        response = self.get('/api/woundcares/', etag)
+        self.assertEqual(response.status_code, 200)
+
+        etag = response['ETag']
+        self.create_care(self.wound).delete()
+        self.assertEqual(self.get('/api/woundcares/', etag).status_code, 304)
+        self.care.delete()
+        self.assertEqual(self.get('/api/woundcares/', etag).status_code, 200)
+
+    def test_detail_uses_etag_and_last_modified(self):
+        url = f'/api/woundcares/{self.care.id}/'
+        response = self.get(url)
+        self.assertEqual(self.get(url, response['ETag']).status_code, 304)
+        self.assertEqual(self.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+
+        self.care.wound_care_notes = 'editada'
+        self.care.save()
+        self.assertEqual(self.get(url, response['ETag']).status_code, 200)
+
+    def test_etag_is_per_user(self):
+        etag = self.get('/api/patients/')['ETag']
+        other = User.objects.create_user(username='other', password='x')
+        self.client.force_authenticate(other)
+        self.assertEqual(self.get('/api/patients/', etag).status_code, 200)
+
+
+# En producción la caché 'api' es Redis; en las pruebas, una LocMem del único proceso
+SHARED_API_CACHE = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'api': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'api-tests'},
+}
+
+
+@override_settings(CACHES=SHARED_API_CACHE)
+class ResponseCacheTests(WoundApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.patient = self.create_patient()
+        self.wound = self.create_wound(self.patient)
+        self.care = self.create_care(self.wound)
+        self.admin = User.objects.create_superuser(username='admin', password='x')
+
+    def stats(self):
+        self.client.force_authenticate(self.admin)
+        body = self.client.get('/api/metrics/').json()['response_cache']
+        self.client.force_authenticate(self.user)
+        return body
+
+    def test_repeated_reads_are_served_from_cache(self):
+        detail = f'/api/woundcares/{self.care.id}/'
+        first = self.client.get('/api/woundcares/').json()
+        etag = self.client.get(detail)['ETag']
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/woundcares/').json(), first)
+            self.assertEqual(self.client.get(detail).status_code, 200)
+            self.assertEqual(self.client.get(detail, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.stats(), {'backend': 'LocMemCache', 'hits': 3, 'misses': 2, 'hit_ratio': 0.6})
+
+    def test_keys_include_params(self):
+        self.create_care(self.create_wound(self.patient))
+        self.assertEqual(len(self.client.get('/api/woundcares/').json()), 2)
+        self.assertEqual(len(self.client.get('/api/woundcares/', {'wound': self.wound.id}).json()), 1)
+
+    def test_nested_model_change_invalidates_dependents_only(self):
+        self.client.get('/api/woundcares/')
+        self.client.get('/api/patients/')
+        self.wound.wound_location = 'sacro'
+        self.wound.save()
+        with self.assertNumQueries(0):
+            self.client.get('/api/patients/')
+        body = self.client.get('/api/woundcares/').json()
+        self.assertEqual(body[0]['woundData']['wound_location'], 'sacro')
+
+    def test_delete_and_bulk_writes_invalidate(self):
+        self.client.get('/api/woundcares/')
+        self.client.post('/api/sync/bulk/', {'woundcares': [{'id': self.care.id, 'care_notes': 'lote'}]}, format='json')
+        self.assertEqual(self.client.get('/api/woundcares/').json()[0]['care_notes'], 'lote')
+        self.client.delete(f'/api/woundcares/{self.care.id}/')
+        self.assertEqual(self.client.get('/api/woundcares/').json(), [])
+
+    def test_cache_is_per_user(self):
+        self.client.get('/api/patients/')
+        other = User.objects.create_user(username='other', password='x')
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get('/api/patients/').json(), [])
+
+    def test_metrics_require_admin(self):
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 403)
+
+
+class ResponseCacheDisabledTests(WoundApiTestCase):
+    def test_without_redis_every_read_hits_the_database(self):
+        care = self.create_care(self.create_wound(self.create_patient()))
+        self.client.get('/api/woundcares/')
+        # Otro proceso (otro worker o process_photo_uploads) cambia la fila
+        WoundCare.objects.filter(id=care.id).update(wound_care_notes='desde otro proceso')
+        self.assertEqual(self.client.get('/api/woundcares/').json()[0]['care_notes'], 'desde otro proceso')
+
+
+class StatelessAuthTests(WoundApiTestCase):
+    def setUp(self):
+        super().setUp()
+        auth_patch = mock.patch.object(APIView, 'authentication_classes', [StatelessJWTAuthentication])
+        auth_patch.start()
+        self.addCleanup(auth_patch.stop)
+        reset_user_cache()
+        self.addCleanup(reset_user_cache)
+        self.client = APIClient()
+        self.login(self.user)
+        self.wound = self.create_wound(self.create_patient())
+        self.create_care(self.wound)
+
+    def login(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+
+    def test_list_does_not_load_the_user(self):
+        get_cache().clear()
+        # Listado + agregado de la ETag; sin SELECT de auth_user
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/woundcares/')
+        self.assertEqual(len(response.json()), 1)
+
+    def test_writes_use_the_token_user_id(self):
+        response = self.client.post('/api/wounds/', {
+            'patient': self.wound.patient_id, 'wound_location': 'sacro',
+            'created_by': self.user.id, 'updated_by': self.user.id,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Wound.objects.get(id=response.json()['id']).created_by, self.user)
+
+    def test_full_user_is_loaded_once_and_refreshed_on_save(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get('/api/users/me/').json()['username'], 'nurse')
+        with self.assertNumQueries(0):
+            self.client.get('/api/profile/')
+        self.user.username = 'enfermera'
+        self.user.save()
+        self.assertEqual(self.client.get('/api/users/me/').json()['username'], 'enfermera')
+
+    def test_admin_permission_reads_the_full_user(self):
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 403)
+        self.login(User.objects.create_superuser(username='admin', password='x'))
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 200)
+
+    def test_deleted_user_is_rejected_when_needed(self):
+        self.user.delete()
+        self.assertEqual(self.client.get('/api/users/me/').status_code, 401)
+
+
+class FakeFTP:
+    """Servidor FTP en memoria que reemplaza a ftplib.FTP en los tests."""
+    files = {}
+    dirs = {'/m'}
+    commands = []
+    failures = 0
+    keep_data = True
+
+    @classmethod
+    def reset(cls):
+        cls.files, cls.dirs, cls.commands, cls.failures, cls.keep_data = {}, {'/m'}, [], 0, True
+
+    def __init__(self, host='', user='', passwd='', *args, **kwargs):
+        self.path = '/'
+
+    def connect(self, host='', port=0, *args, **kwargs):
+        FakeFTP.commands.append('CONNECT')
+
+    def _resolve(self, path):
+        return path.rstrip('/') if path.startswith('/') else f"{self.path.rstrip('/')}/{path}"
+
+    def login(self, user='', passwd=''):
+        FakeFTP.commands.append('LOGIN')
+
+    def voidcmd(self, cmd):
+        FakeFTP.commands.append(cmd)
+        return '200 OK'
+
+    def cwd(self, path):
+        FakeFTP.commands.append('CWD')
+        target = self._resolve(path)
+        if target not in FakeFTP.dirs:
+            raise ftplib.error_perm('550 No such directory')
+        self.path = target
+
+    def nlst(self):
+        FakeFTP.commands.append('NLST')
+        prefix = self.path.rstrip('/') + '/'
+        return [d[len(prefix):] for d in FakeFTP.dirs if d.startswith(prefix) and '/' not in d[len(prefix):]]
+
+    def mkd(self, path):
+        FakeFTP.commands.append('MKD')
+        FakeFTP.dirs.add(self._resolve(path))
+
+    def storbinary(self, cmd, fp, blocksize=8192, callback=None, rest=None):
+        FakeFTP.commands.append('STOR')
+        if FakeFTP.failures:
+            FakeFTP.failures -= 1
+            raise ftplib.error_temp('421 Service not available')
+        target = self._resolve(cmd.split(' ', 1)[1])
+        if target.rsplit('/', 1)[0] not in FakeFTP.dirs:
+            raise ftplib.error_perm('553 Could not create file')
+        chunks = []
+        while block := fp.read(blocksize):
+            if FakeFTP.keep_data:
+                chunks.append(block)
+        FakeFTP.files[target] = b''.join(chunks)
+
+    def quit(self):
+        FakeFTP.commands.append('QUIT')
+
+    close = quit
+
+
+def make_image(name='wound.png', size=(64, 48), image_format='PNG', orientation=None):
+    buffer = BytesIO()
+    image = Image.new('RGB', size, (200, 80, 80))
+    exif = Image.Exif()
+    if orientation:
+        exif[0x0112] = orientation
+    image.save(buffer, format=image_format, exif=exif)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type=f'image/{image_format.lower()}')
+
+
+class PhotoTestCase(WoundApiTestCase):
+    """Staging en un directorio temporal, subida en línea y FTP en memoria."""
+
+    def setUp(self):
+        super().setUp()
+        staging = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, staging, ignore_errors=True)
+        settings_override = override_settings(
+            PHOTO_STAGING_ROOT=staging, PHOTO_UPLOAD_WORKERS=0, PHOTO_UPLOAD_MAX_ATTEMPTS=3,
+            PHOTO_PROCESSING_WORKERS=0,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        FakeFTP.reset()
+        ftp_patch = mock.patch('ftplib.FTP', FakeFTP)
+        ftp_patch.start()
+        self.addCleanup(ftp_patch.stop)
+        reset_ftp_pool()
+        self.addCleanup(reset_ftp_pool)
+        self.staging = staging
+        self.wound = self.create_wound(self.create_patient())
+        self.care = self.create_care(self.wound)
+
+
+class PhotoPipelineTests(PhotoTestCase):
+    def upload(self, care=None):
+        care = care or self.care
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/api/upload-wound-photo/', {'wound_care_id': care.id, 'file': make_image()}, format='multipart',
+            )
+        self.assertEqual(response.status_code, 202)
+        return PhotoUpload.objects.get(id=response.json()['upload_id'])
+
+    def test_upload_with_atomic_requests(self):
+        # En producción ATOMIC_REQUESTS=True; la vista async queda fuera de esa transacción
+        with mock.patch.dict(connections.settings['default'], ATOMIC_REQUESTS=True):
+            upload = self.upload()
+        self.assertEqual(upload.status, 'done')
+
+    def test_invalid_token_is_rejected(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Bearer no-es-un-jwt')
+        response = client.post('/api/upload-wound-photo/', {'wound_care_id': self.care.id, 'file': make_image()}, format='multipart')
+        self.assertEqual(response.status_code, 401)
+        self.assertTrue(response['WWW-Authenticate'].startswith('Bearer'))
+        self.assertFalse(PhotoUpload.objects.exists())
+
+    def test_anonymous_upload_is_rejected(self):
+        response = APIClient().post('/api/upload-wound-photo/', {'wound_care_id': self.care.id, 'file': make_image()}, format='multipart')
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(PhotoUpload.objects.exists())
+
+    def test_other_users_care_is_not_found(self):
+        other = User.objects.create_user(username='other', password='x')
+        self.client.force_authenticate(other)
+        response = self.client.post('/api/upload-wound-photo/', {'wound_care_id': self.care.id, 'file': make_image()}, format='multipart')
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(PhotoUpload.objects.exists())
+        self.care.refresh_from_db()
+        self.assertEqual(self.care.photo_status, '')
+
+    def test_failed_enqueue_removes_staged_file(self):
+        with mock.patch.object(PhotoUpload.objects, 'create', side_effect=IntegrityError), self.assertRaises(IntegrityError):
+            enqueue_photo(self.care, make_image())
+        self.assertEqual(os.listdir(self.staging), [])
+
+    def test_orphaned_staging_files_are_swept(self):
+        pending = enqueue_photo(self.care, make_image())  # sin commit: queda pendiente con su archivo
+        try:
+            with transaction.atomic():
+                enqueue_photo(self.create_care(self.wound), make_image())
+                raise DatabaseError('rollback')
+        except DatabaseError:
+            pass
+        self.assertEqual(len(os.listdir(self.staging)), 2)
+
+        self.assertEqual(sweep_staging(), 0)  # todavía recientes
+        self.assertEqual(sweep_staging(max_age=timedelta(0)), 1)
+        self.assertEqual(os.listdir(self.staging), [os.path.basename(pending.staged_path)])
+
+    def test_upload_runs_after_commit(self):
+        upload = self.upload()
+        self.care.refresh_from_db()
+        self.assertEqual(upload.status, 'done')
+        self.assertEqual(self.care.photo_status, 'done')
+        self.assertEqual(self.care.wound_photo.name, upload.remote_path)
+        self.assertIn(f'/m/{upload.remote_path}', FakeFTP.files)
+        self.assertEqual(os.listdir(self.staging), [])
+
+    def test_woundcare_create_stages_photo(self):
+        data = {
+            'wound': self.wound.id, 'care_date': '2025-03-02', 'created_by': self.user.id,
+            'updated_by': self.user.id, 'wound_photo': make_image(),
+        }
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            response = self.client.post('/api/woundcares/', data, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['photo_status'], 'pending')
+        self.assertEqual(FakeFTP.files, {})
+
+        for callback in callbacks:
+            callback()
+        care = WoundCare.objects.get(id=response.json()['id'])
+        self.assertEqual(care.photo_status, 'done')
+        self.assertTrue(care.wound_photo.name.startswith('wound_photos/sha256/'))
+
+    def test_failed_upload_is_retried_with_backoff(self):
+        FakeFTP.failures = 1
+        upload = self.upload()
+        upload.refresh_from_db()
+        self.assertEqual((upload.status, upload.attempts), ('pending', 1))
+        self.assertGreater(upload.next_attempt_at, timezone.now())
+
+        PhotoUpload.objects.filter(id=upload.id).update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(process_due_uploads(), ['done'])
+
+    def test_upload_fails_after_max_attempts(self):
+        FakeFTP.failures = 3
+        upload = self.upload()
+        for _ in range(2):
+            PhotoUpload.objects.filter(id=upload.id).update(next_attempt_at=timezone.now())
+            process_due_uploads()
+        upload.refresh_from_db()
+        self.care.refresh_from_db()
+        self.assertEqual((upload.status, upload.attempts), ('failed', 3))
+        self.assertEqual(self.care.photo_status, 'failed')
+
+    def test_status_endpoint(self):
+        upload = self.upload()
+        body = self.client.get(f'/api/photo-uploads/{upload.id}/').json()
+        self.assertEqual((body['status'], body['remote_path']), ('done', upload.remote_path))
+
+        other = User.objects.create_user(username='other')
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get(f'/api/photo-uploads/{upload.id}/').status_code, 404)
+
+
+class FTPConnectionPoolTests(TestCase):
+    def setUp(self):
+        FakeFTP.reset()
+        ftp_patch = mock.patch('ftplib.FTP', FakeFTP)
+        ftp_patch.start()
+        self.addCleanup(ftp_patch.stop)
+        self.pool = FTPConnectionPool('ftp.local', 'user', 'pass', base_path='/m/', max_size=2)
+
+    def test_connection_and_directories_are_reused(self):
+        for i in range(3):
+            path = self.pool.store(BytesIO(b'data'), f'photo_{i}.jpg', 'wound_photos/patient_1/wound_2')
+            self.assertEqual(path, f'wound_photos/patient_1/wound_2/photo_{i}.jpg')
+
+        self.assertEqual(FakeFTP.commands.count('CONNECT'), 1)
+        self.assertEqual(FakeFTP.commands.count('MKD'), 3)
+        # Tras la primera subida cada foto es un único STOR
+        self.assertEqual(FakeFTP.commands[-2:], ['STOR', 'STOR'])
+        self.assertIn('/m/wound_photos/patient_1/wound_2/photo_2.jpg', FakeFTP.files)
+
+    def test_stale_connections_are_health_checked_and_evicted(self):
+        self.pool.store(BytesIO(b'data'), 'a.jpg', 'x')
+        self.pool.health_check_after = 0
+        with mock.patch('time.monotonic', return_value=time.monotonic() + 1):
+            self.pool.store(BytesIO(b'data'), 'b.jpg', 'x')
+        self.assertIn('NOOP', FakeFTP.commands)
+        self.assertEqual(self.pool.stats['connects'], 1)
+
+        with mock.patch('time.monotonic', return_value=time.monotonic() + self.pool.max_idle + 5):
+            self.pool.store(BytesIO(b'data'), 'c.jpg', 'x')
+        self.assertEqual(self.pool.stats['connects'], 2)
+
+    def test_slow_login_does_not_block_other_checkins(self):
+        connect, release = self.pool._connect, threading.Event()
+
+        def slow_connect():
+            release.wait(5)
+            return connect()
+
+        with self.pool.connection():
+            with mock.patch.object(self.pool, '_connect', slow_connect):
+                waiting = threading.Thread(target=self.pool.store, args=(BytesIO(b'data'), 'b.jpg', 'x'))
+                waiting.start()
+                time.sleep(0.05)
+                start = time.monotonic()
+        # La devolución al pool no esperó al login del otro hilo
+        self.assertLess(time.monotonic() - start, 1)
+        release.set()
+        waiting.join()
+        self.assertEqual(self.pool.stats['connects'], 2)
+
+    def test_failed_connection_is_discarded(self):
+        FakeFTP.failures = 1
+        with self.assertRaises(ftplib.error_temp):
+            self.pool.store(BytesIO(b'data'), 'a.jpg', 'x')
+        self.pool.store(BytesIO(b'data'), 'a.jpg', 'x')
+        self.assertEqual(self.pool.stats['connects'], 2)
+
+    def test_deleted_directory_is_recreated(self):
+        self.pool.store(BytesIO(b'data'), 'a.jpg', 'x/y')
+        FakeFTP.dirs -= {'/m/x', '/m/x/y'}
+        self.pool.store(BytesIO(b'data'), 'b.jpg', 'x/y')
+        self.assertIn('/m/x/y/b.jpg', FakeFTP.files)
+
+
+class StreamingUploadTests(PhotoTestCase):
+    def post_photo(self, payload):
+        file = SimpleUploadedFile('wound.jpg', payload, content_type='image/jpeg')
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                '/api/upload-wound-photo/', {'wound_care_id': self.care.id, 'file': file}, format='multipart',
+            )
+
+    def test_checksum_is_recorded_and_verified(self):
+        payload = os.urandom(200 * 1024)
+        response = self.post_photo(payload)
+        upload = PhotoUpload.objects.get(id=response.json()['upload_id'])
+        self.assertEqual((upload.sha256, upload.size), (hashlib.sha256(payload).hexdigest(), len(payload)))
+        self.assertEqual(upload.status, 'done')
+        self.assertEqual(FakeFTP.files[f'/m/{upload.remote_path}'], payload)
+
+    def test_size_cap_is_enforced_while_receiving(self):
+        with override_settings(PHOTO_MAX_UPLOAD_SIZE=1024):
+            self.assertEqual(self.post_photo(os.urandom(20 * 1024)).status_code, 413)
+            self.assertEqual(self.post_photo(os.urandom(200 * 1024)).status_code, 413)
+        self.assertFalse(PhotoUpload.objects.exists())
+        self.assertEqual(os.listdir(self.staging), [])
+
+    def test_malformed_content_length_is_rejected(self):
+        file = SimpleUploadedFile('wound.jpg', b'data', content_type='image/jpeg')
+        response = self.client.post(
+            '/api/upload-wound-photo/', {'wound_care_id': self.care.id, 'file': file}, format='multipart',
+            CONTENT_LENGTH='12abc',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(PhotoUpload.objects.exists())
+
+    def peak_memory(self, size):
+        """Pico de memoria (tracemalloc) de staging + subida de un archivo de `size` bytes."""
+        path = os.path.join(self.staging, f'source_{size}.jpg')
+        with open(path, 'wb') as source:
+            block = b'\0' * (1024 * 1024)
+            for _ in range(size // len(block)):
+                source.write(block)
+
+        FakeFTP.keep_data = False
+        with open(path, 'rb') as source, self.captureOnCommitCallbacks(execute=True):
+            tracemalloc.start()
+            upload = enqueue_photo(self.care, File(source, name='large.jpg'))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        upload.refresh_from_db()
+        self.assertEqual((upload.status, upload.size), ('done', size))
+        return peak
+
+    def test_peak_memory_does_not_grow_with_file_size(self):
+        with override_settings(PHOTO_MAX_UPLOAD_SIZE=64 * 1024 * 1024):
+            small = self.peak_memory(4 * 1024 * 1024)
+            large = self.peak_memory(32 * 1024 * 1024)
+        self.assertLess(large, 1024 * 1024)
+        self.assertLess(large, small + 256 * 1024)
+
+
+class PhotoRenditionTests(PhotoTestCase):
+    def upload(self, image):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/api/upload-wound-photo/', {'wound_care_id': self.care.id, 'file': image}, format='multipart',
+            )
+        self.care.refresh_from_db()
+        return response
+
+    def test_renditions_are_resized_and_oriented(self):
+        # Orientación EXIF 6: la cámara guardó la foto girada 90°
+        self.upload(make_image('wound.jpg', size=(2000, 1000), image_format='JPEG', orientation=6))
+        renditions = self.care.photo_renditions
+        self.assertEqual(set(renditions), {'original', 'screen', 'thumb'})
+        self.assertEqual(renditions['original'], self.care.wound_photo.name)
+        sha256 = PhotoUpload.objects.get().sha256
+        self.assertEqual(renditions['thumb'], f'wound_photos/sha256/{sha256[:2]}/{sha256[2:4]}/{sha256}_thumb.webp')
+
+        thumb = Image.open(BytesIO(FakeFTP.files[f"/m/{renditions['thumb']}"]))
+        screen = Image.open(BytesIO(FakeFTP.files[f"/m/{renditions['screen']}"]))
+        self.assertEqual((thumb.format, thumb.size), ('WEBP', (160, 320)))
+        self.assertEqual(screen.size, (640, 1280))
+        self.assertEqual(os.listdir(self.staging), [])
+
+    def test_serializer_exposes_rendition_urls(self):
+        self.upload(make_image())
+        body = self.client.get(f'/api/woundcares/{self.care.id}/').json()
+        self.assertTrue(body['photo_renditions']['thumb'].endswith(self.care.photo_renditions['thumb']))
+        self.assertTrue(body['photo_renditions']['thumb'].startswith('http'))
+
+    def test_non_image_keeps_only_original(self):
+        self.upload(SimpleUploadedFile('notes.jpg', b'not an image'))
+        self.assertEqual(list(self.care.photo_renditions), ['original'])
+
+    def test_renditions_run_in_process_pool(self):
+        with override_settings(PHOTO_PROCESSING_WORKERS=1):
+            self.upload(make_image(size=(800, 600)))
+        self.assertIn('thumb', self.care.photo_renditions)
+
+
+class ContentAddressedStorageTests(PhotoTestCase):
+    def upload(self, care, payload):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/api/upload-wound-photo/',
+                {'wound_care_id': care.id, 'file': SimpleUploadedFile('photo.JPG', payload)},
+                format='multipart',
+            )
+        return response.json()
+
+    def test_path_is_derived_from_content(self):
+        payload = os.urandom(1024)
+        sha256 = hashlib.sha256(payload).hexdigest()
+        self.upload(self.care, payload)
+        self.care.refresh_from_db()
+        self.assertEqual(self.care.wound_photo.name, f'wound_photos/sha256/{sha256[:2]}/{sha256[2:4]}/{sha256}.jpg')
+        self.assertEqual(StoredPhoto.objects.get().sha256, sha256)
+
+    def test_reupload_is_metadata_only(self):
+        payload = os.urandom(1024)
+        self.upload(self.care, payload)
+        stores = FakeFTP.commands.count('STOR')
+
+        other_care = self.create_care(self.wound, care_date=date(2025, 3, 5))
+        body = self.upload(other_care, payload)
+        self.assertEqual(body['status'], 'done')
+        self.assertEqual(FakeFTP.commands.count('STOR'), stores)
+
+        other_care.refresh_from_db()
+        self.care.refresh_from_db()
+        self.assertEqual(other_care.wound_photo.name, self.care.wound_photo.name)
+        self.assertEqual(other_care.photo_status, 'done')
+        self.assertEqual(StoredPhoto.objects.count(), 1)
+        self.assertEqual(os.listdir(self.staging), [])
+
+    def test_same_day_photos_do_not_overwrite_each_other(self):
+        self.upload(self.care, os.urandom(1024))
+        other_care = self.create_care(self.wound)
+        self.upload(other_care, os.urandom(1024))
+        self.care.refresh_from_db()
+        other_care.refresh_from_db()
+        self.assertNotEqual(self.care.wound_photo.name, other_care.wound_photo.name)
+        self.assertEqual(len(FakeFTP.files), 2)
+
+
+class ChunkedUploadTests(PhotoTestCase):
+    def start(self, payload, **extra):
+        data = {
+            'wound_care': self.care.id, 'filename': 'photo.jpg', 'total_size': len(payload),
+            'sha256': hashlib.sha256(payload).hexdigest(), **extra,
+        }
+        return self.client.post('/api/chunked-uploads/', data, format='json')
+
+    def put(self, upload_id, offset, chunk):
+        return self.client.put(
+            f'/api/chunked-uploads/{upload_id}/?offset={offset}', chunk, content_type='application/octet-stream',
+        )
+
+    def finalize(self, upload_id):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(f'/api/chunked-uploads/{upload_id}/finalize/')
+
+    def test_upload_resumes_from_saved_offset(self):
+        payload = os.urandom(300 * 1024)
+        upload_id = self.start(payload).json()['id']
+
+        self.assertEqual(self.put(upload_id, 0, payload[:100 * 1024]).json()['offset'], 100 * 1024)
+        # El cliente perdió la respuesta y reenvía desde un offset equivocado
+        response = self.put(upload_id, 0, payload[:100 * 1024])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['offset'], 100 * 1024)
+
+        offset = self.client.get(f'/api/chunked-uploads/{upload_id}/').json()['offset']
+        self.put(upload_id, offset, payload[offset:])
+
+        response = self.finalize(upload_id)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(ChunkedUpload.objects.get().status, 'complete')
+        self.care.refresh_from_db()
+        self.assertEqual(self.care.photo_status, 'done')
+        self.assertEqual(list(FakeFTP.files.values())[0], payload)
+
+    def test_finalize_retry_returns_same_photo_upload(self):
+        payload = os.urandom(1024)
+        upload_id = self.start(payload).json()['id']
+        self.put(upload_id, 0, payload)
+        first = self.finalize(upload_id)
+        # El cliente no recibió la respuesta y reintenta
+        retry = self.finalize(upload_id)
+        self.assertEqual(retry.status_code, 202)
+        self.assertEqual(retry.json()['upload_id'], first.json()['upload_id'])
+        self.assertEqual(PhotoUpload.objects.count(), 1)
+
+    def test_lost_part_file_restarts_upload(self):
+        payload = os.urandom(1024)
+        upload_id = self.start(payload).json()['id']
+        self.put(upload_id, 0, payload)
+        os.remove(os.path.join(self.staging, 'chunks', f'{upload_id}.part'))
+        response = self.finalize(upload_id)
+        self.assertEqual((response.status_code, response.json()['offset']), (400, 0))
+
+    def test_checksum_mismatch_restarts_upload(self):
+        payload = os.urandom(1024)
+        upload_id = self.start(payload, sha256='0' * 64).json()['id']
+        self.put(upload_id, 0, payload)
+        response = self.finalize(upload_id)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['offset'], 0)
+        self.assertEqual(FakeFTP.files, {})
+
+    def test_incomplete_upload_cannot_be_finalized(self):
+        payload = os.urandom(1024)
+        upload_id = self.start(payload).json()['id']
+        self.put(upload_id, 0, payload[:512])
+        self.assertEqual(self.finalize(upload_id).status_code, 400)
+        self.assertEqual(self.put(upload_id, 512, payload[512:] + b'extra').status_code, 400)
+
+    @override_settings(PHOTO_MAX_UPLOAD_SIZE=1024)
+    def test_total_size_is_capped(self):
+        self.assertEqual(self.start(os.urandom(2048)).status_code, 400)
+
+    def test_other_users_care_is_rejected(self):
+        other = User.objects.create_user(username='other', password='x')
+        self.care.created_by = other
+        self.care.save()
+        self.assertEqual(self.start(b'abc').status_code, 400)
+
+    def test_stale_uploads_expire(self):
+        upload_id = self.start(os.urandom(1024)).json()['id']
+        self.put(upload_id, 0, b'partial')
+        ChunkedUpload.objects.update(updated_at=timezone.now() - timedelta(days=2))
+        self.assertEqual(expire_chunked_uploads(), 1)
+        self.assertFalse(ChunkedUpload.objects.exists())
+        self.assertEqual(os.listdir(os.path.join(self.staging, 'chunks')), [])
+
+
+class BulkSyncTests(WoundApiTestCase):
+    def sync(self, payload):
+        return self.client.post('/api/sync/bulk/', payload, format='json')
+
+    def offline_day(self, visits):
+        return {
+            'patients': [{'client_id': 'p1', 'first_name': 'Rosa', 'last_name': 'Soto', 'rut': '1-9', 'birth_date': '1950-01-01'}],
+            'wounds': [{'client_id': 'w1', 'patient_client_id': 'p1', 'wound_location': 'sacro'}],
+            'woundcares': [
+                {'client_id': f'c{i}', 'wound_client_id': 'w1', 'care_date': '2025-03-01', 'width': i}
+                for i in range(visits)
+            ],
+        }
+
+    def test_creates_related_records_in_one_request(self):
+        response = self.sync(self.offline_day(3))
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual([item['status'] for item in body['woundcares']], ['created'] * 3)
+
+        care = WoundCare.objects.get(id=body['woundcares'][2]['id'])
+        self.assertEqual(care.wound_width, 2)
+        self.assertEqual(care.wound.id, body['wounds'][0]['id'])
+        self.assertEqual(care.wound.patient.first_name, 'Rosa')
+        self.assertEqual(care.created_by, self.user)
+        self.assertIsNotNone(care.created_at)
+
+    def test_query_count_does_not_grow_with_items(self):
+        # 5 de la sincronización + 3 para recalcular los resúmenes de las heridas
+        with self.assertNumQueries(8):
+            self.sync(self.offline_day(2))
+        with self.assertNumQueries(8):
+            self.sync(self.offline_day(20))
+
+    def test_partial_failures_are_reported_per_item(self):
+        care = self.create_care(self.create_wound(self.create_patient()))
+        payload = self.offline_day(2)
+        payload['woundcares'] += [
+            {'client_id': 'bad', 'wound_client_id': 'w1', 'care_date': 'ayer'},
+            {'client_id': 'orphan', 'wound_client_id': 'nope', 'care_date': '2025-03-01'},
+            {'id': care.id, 'care_notes': 'editada offline'},
+        ]
+        response = self.sync(payload)
+        self.assertEqual(response.status_code, 207)
+        results = response.json()['woundcares']
+        self.assertEqual([item['status'] for item in results], ['created', 'created', 'error', 'error', 'updated'])
+        self.assertIn('care_date', results[2]['errors'])
+        self.assertIn('wound', results[3]['errors'])
+
+        before = care.updated_at
+        care.refresh_from_db()
+        self.assertEqual(care.wound_care_notes, 'editada offline')
+        self.assertGreater(care.updated_at, before)
+        self.assertEqual(WoundCare.objects.count(), 3)
+
+    def test_other_users_records_are_not_touched(self):
+        other = User.objects.create_user(username='other', password='x')
+        patient = Patient.objects.create(created_by=other, updated_by=other)
+        wound = Wound.objects.create(patient=patient, created_by=other, updated_by=other)
+        care = WoundCare.objects.create(wound=wound, created_by=other, updated_by=other)
+        results = self.sync({
+            'wounds': [{'patient': patient.id, 'wound_location': 'brazo'}],
+            'woundcares': [{'id': care.id, 'care_notes': 'x'}],
+        }).json()
+        self.assertEqual(results['wounds'][0]['errors'], {'patient': ['Referencia no encontrada.']})
+        self.assertEqual(results['woundcares'][0]['errors'], {'id': ['No encontrado.']})
+
+    @override_settings(BULK_SYNC_MAX_ITEMS=5)
+    def test_item_limit(self):
+        self.assertEqual(self.sync(self.offline_day(4)).status_code, 400)
+
+    def test_sections_must_be_lists(self):
+        for payload in ({'patients': 5}, {'wounds': 'abc'}, {'woundcares': {'id': 1}}):
+            self.assertEqual(self.sync(payload).status_code, 400, payload)
+
+
+@override_settings(DELTA_SYNC_LAG=0)
+class DeltaSyncTests(WoundApiTestCase):
+    def sync(self, **watermarks):
+        response = self.client.get('/api/sync/', watermarks)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def watermarks(self, body):
+        return {name: section['watermark'] for name, section in body.items()}
+
+    def test_initial_sync_returns_everything(self):
+        self.seed(2, wounds_per_patient=2, cares_per_wound=2)
+        body = self.sync()
+        self.assertEqual(
+            [len(body[name]['changed']) for name in ('patients', 'wounds', 'woundcares')], [2, 4, 8],
+        )
+        self.assertEqual(body['woundcares']['deleted'], [])
+
+    def test_only_changes_since_watermark_are_returned(self):
+        patient = self.create_patient()
+        wound = self.create_wound(patient)
+        care = self.create_care(wound)
+        doomed = self.create_care(wound)
+        doomed.delete()
+        watermarks = self.watermarks(self.sync())
+
+        self.assertEqual(self.sync(**watermarks)['woundcares'], {
+            'changed': [], 'deleted': [], 'watermark': watermarks['woundcares'], 'has_more': False,
+        })
+
+        care.wound_care_notes = 'editada'
+        care.save()
+        new_care = self.create_care(wound)
+        other_wound = self.create_wound(patient)
+        cascaded = self.create_care(other_wound)
+        other_wound.delete()
+
+        body = self.sync(**watermarks)
+        self.assertEqual(body['patients']['changed'], [])
+        self.assertEqual(body['wounds']['changed'], [])
+        self.assertEqual(body['wounds']['deleted'], [cascaded.wound_id])
+        self.assertEqual([item['id'] for item in body['woundcares']['changed']], [care.id, new_care.id])
+        # Borrado en cascada: las curaciones de la herida también se informan
+        self.assertEqual(body['woundcares']['deleted'], [cascaded.id])
+        self.assertEqual(self.sync(**self.watermarks(body))['wounds']['deleted'], [])
+
+    @override_settings(SYNC_PAGE_SIZE=3)
+    def test_large_deltas_are_returned_in_blocks(self):
+        wound = self.create_wound(self.create_patient())
+        cares = [self.create_care(wound) for _ in range(7)]
+        WoundCare.objects.update(updated_at=timezone.now())  # mismo updated_at: desempata el id
+
+        seen, watermarks = [], {}
+        while True:
+            body = self.sync(**watermarks)
+            seen += [item['id'] for item in body['woundcares']['changed']]
+            watermarks = self.watermarks(body)
+            if not body['woundcares']['has_more']:
+                break
+        self.assertEqual(seen, [care.id for care in cares])
+
+    def test_rows_committed_late_are_not_skipped(self):
+        wound = self.create_wound(self.create_patient())
+        old = self.create_care(wound)
+        WoundCare.objects.filter(id=old.id).update(updated_at=timezone.now() - timedelta(minutes=5))
+        recent = self.create_care(wound)
+        WoundCare.objects.filter(id=recent.id).update(updated_at=timezone.now() - timedelta(seconds=2))
+        with override_settings(DELTA_SYNC_LAG=30):
+            body = self.sync()
+        # La curación reciente se retiene: una transacción abierta aún puede confirmar algo anterior
+        self.assertEqual([item['id'] for item in body['woundcares']['changed']], [old.id])
+
+        # Otra transacción confirma después de la sincronización una fila con updated_at menor
+        late = self.create_care(wound)
+        WoundCare.objects.filter(id=late.id).update(updated_at=timezone.now() - timedelta(seconds=3))
+        body = self.sync(**self.watermarks(body))
+        self.assertEqual([item['id'] for item in body['woundcares']['changed']], [late.id, recent.id])
+
+    def test_other_users_rows_are_excluded(self):
+        other = User.objects.create_user(username='other', password='x')
+        Patient.objects.create(created_by=other, updated_by=other).delete()
+        body = self.sync()
+        self.assertEqual(body['patients']['changed'], [])
+        self.assertEqual(self.sync(**self.watermarks(body))['patients']['deleted'], [])
+
+    def test_deleting_user_does_not_log_tombstones(self):
+        other = User.objects.create_user(username='other', password='x')
+        Patient.objects.create(created_by=other, updated_by=other)
+        other.delete()
+        self.assertFalse(DeletionLog.objects.exists())
+
+    def test_invalid_watermark(self):
+        self.assertEqual(self.client.get('/api/sync/', {'patients': 'xyz'}).status_code, 400)
+
+
+class WoundSummaryTests(WoundApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.patient = self.create_patient()
+        self.wound = self.create_wound(self.patient)
+
+    def measure(self, care_date, height, width, depth=1, **kwargs):
+        return self.create_care(
+            self.wound, care_date=care_date, wound_height=height, wound_width=width, wound_depth=depth, **kwargs,
+        )
+
+    def summary(self):
+        return WoundSummary.objects.get(wound=self.wound)
+
+    def test_new_care_updates_summary_in_place(self):
+        self.measure(date(2025, 3, 1), 4, 5)
+        with self.assertNumQueries(2):  # INSERT de la curación + UPDATE del resumen
+            latest = self.measure(date(2025, 3, 8), 2, 5, depth=2, wound_next_care=date(2025, 3, 15))
+
+        summary = self.summary()
+        self.assertEqual(summary.care_count, 2)
+        self.assertEqual(summary.latest_care_id, latest.id)
+        self.assertEqual(summary.latest_area, 10)
+        self.assertEqual(summary.latest_volume, 20)
+        self.assertEqual(summary.baseline_area, 20)
+        self.assertEqual(summary.area_reduction_percent, 50)
+        self.assertEqual(summary.first_care_date, date(2025, 3, 1))
+        self.assertEqual(summary.next_care_date, date(2025, 3, 15))
+
+    def test_backdated_care_becomes_baseline(self):
+        self.measure(date(2025, 3, 8), 3, 4)
+        self.measure(date(2025, 3, 1), 4, 4)
+        summary = self.summary()
+        self.assertEqual(summary.care_count, 2)
+        self.assertEqual(summary.last_care_date, date(2025, 3, 8))
+        self.assertEqual(summary.baseline_area, 16)
+        self.assertEqual(summary.area_reduction_percent, 25)
+
+    def test_editing_and_deleting_cares(self):
+        first = self.measure(date(2025, 3, 1), 4, 5)
+        latest = self.measure(date(2025, 3, 8), 2, 5)
+        latest.wound_height = 1
+        latest.save()
+        self.assertEqual(self.summary().latest_area, 5)
+
+        latest.delete()
+        summary = self.summary()
+        self.assertEqual((summary.care_count, summary.latest_care_id), (1, first.id))
+        self.assertEqual(summary.area_reduction_percent, 0)
+
+        first.delete()
+        self.assertFalse(WoundSummary.objects.exists())
+
+    def test_moving_care_rebuilds_both_summaries(self):
+        first = self.measure(date(2025, 3, 1), 4, 5, wound_next_care=date(2025, 3, 8))
+        moved = self.measure(date(2025, 3, 8), 2, 5, wound_next_care=date(2025, 3, 15))
+        target = self.create_wound(self.patient)
+        self.create_care(target, care_date=date(2025, 2, 1), wound_height=3, wound_width=3)
+
+        response = self.client.patch(f'/api/woundcares/{moved.id}/', {'wound': target.id}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        summary = self.summary()
+        self.assertEqual((summary.care_count, summary.latest_care_id), (1, first.id))
+        self.assertEqual(summary.next_care_date, date(2025, 3, 8))
+        target_summary = WoundSummary.objects.get(wound=target)
+        self.assertEqual((target_summary.care_count, target_summary.latest_care_id), (2, moved.id))
+        self.assertEqual(target_summary.next_care_date, date(2025, 3, 15))
+
+    def test_deleting_wound_removes_summary(self):
+        self.measure(date(2025, 3, 1), 4, 5)
+        self.wound.delete()
+        self.assertFalse(WoundSummary.objects.exists())
+
+    def test_endpoints(self):
+        self.measure(date(2025, 3, 1), 4, 5)
+        other_wound = self.create_wound(self.create_patient())
+        self.create_care(other_wound)
+        other = User.objects.create_user(username='other', password='x')
+        patient = Patient.objects.create(created_by=other, updated_by=other)
+        wound = Wound.objects.create(patient=patient, created_by=other, updated_by=other)
+        WoundCare.objects.create(wound=wound, created_by=other, updated_by=other)
+
+        self.assertEqual(len(self.client.get('/api/wound-summaries/').json()), 2)
+        body = self.client.get('/api/wound-summaries/', {'patient': self.patient.id}).json()
+        self.assertEqual([item['wound'] for item in body], [self.wound.id])
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/wounds/{self.wound.id}/summary/')
+        self.assertEqual(response.json()['latest_area'], 20)
+        self.assertEqual(self.client.get(f'/api/wounds/{wound.id}/summary/').status_code, 404)
+
+    def test_bulk_sync_keeps_summary_current(self):
+        care = self.measure(date(2025, 3, 1), 4, 5)
+        self.client.post('/api/sync/bulk/', {'woundcares': [
+            {'wound': self.wound.id, 'care_date': '2025-03-08', 'height': 2, 'width': 5},
+            {'id': care.id, 'height': 5},
+        ]}, format='json')
+        summary = self.summary()
+        self.assertEqual((summary.care_count, summary.latest_area, summary.baseline_area), (2, 10, 25))
+        self.assertEqual(summary.area_reduction_percent, 60)
+
+
+class TrajectoryTests(WoundApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.patient = self.create_patient()
+
+    def care_series(self, wound, areas, start=date(2025, 3, 1), step=7, **kwargs):
+        for index, area in enumerate(areas):
+            self.create_care(
+                wound, care_date=start + timedelta(days=step * index), wound_height=area, wound_width=1,
+                wound_depth=2, **kwargs,
+            )
+
+    def test_wound_trajectory(self):
+        wound = self.create_wound(self.patient)
+        self.care_series(wound, [10, 8, 6], wound_granulation_tissue=50)
+        with self.assertNumQueries(2):  # herida + columnas de las curaciones
+            response = self.client.get(f'/api/wounds/{wound.id}/trajectory/')
+        data = response.json()
+
+        self.assertEqual([point['area'] for point in data['points']], [10, 8, 6])
+        self.assertEqual([point['volume'] for point in data['points']], [20, 16, 12])
+        self.assertEqual([point['day'] for point in data['points']], [0, 7, 14])
+        self.assertAlmostEqual(data['healing_rate']['area_per_day'], -2 / 7, places=4)
+        # 10 - 2/7·d = 0 → día 35
+        self.assertEqual(data['projected_closure_date'], '2025-04-05')
+        self.assertEqual(data['tissue_trends']['granulation_tissue'], 0)
+        self.assertFalse(data['stalled'])
+
+    def test_exponential_healing_rate(self):
+        wound = self.create_wound(self.patient)
+        self.care_series(wound, [16, 8, 4, 2, 0])
+        data = self.client.get(f'/api/wounds/{wound.id}/trajectory/').json()
+        # La curación cerrada (área 0) no entra en el ajuste logarítmico
+        self.assertEqual(data['healing_rate']['weekly_reduction_percent'], 50)
+        self.assertIsNone(data['projected_closure_date'])
+
+    def test_single_care_has_no_rate(self):
+        wound = self.create_wound(self.patient)
+        self.care_series(wound, [5])
+        data = self.client.get(f'/api/wounds/{wound.id}/trajectory/').json()
+        self.assertIsNone(data['healing_rate']['area_per_day'])
+        self.assertIsNone(data['stalled'])
+        empty = self.create_wound(self.patient)
+        self.assertEqual(self.client.get(f'/api/wounds/{empty.id}/trajectory/').status_code, 404)
+
+    def test_batch_ranks_stalled_wounds_first(self):
+        healing, stalled, growing = (self.create_wound(self.patient) for _ in range(3))
+        self.care_series(healing, [10, 5, 2.5])
+        self.care_series(stalled, [10, 9.8, 9.7])
+        self.care_series(growing, [10, 12])
+        single = self.create_wound(self.create_patient())
+        self.care_series(single, [4])
+
+        with self.assertNumQueries(1):
+            data = self.client.get('/api/wounds/trajectories/').json()
+        self.assertEqual([item['wound'] for item in data], [growing.id, stalled.id, healing.id, single.id])
+        self.assertEqual([item['stalled'] for item in data], [True, True, False, None])
+
+        stalled_only = self.client.get('/api/wounds/trajectories/', {'stalled': 'true', 'patient': self.patient.id})
+        self.assertEqual([item['wound'] for item in stalled_only.json()], [growing.id, stalled.id])
+
+    def test_batch_matches_single_wound_results(self):
+        wounds = [self.create_wound(self.patient) for _ in range(3)]
+        for offset, wound in enumerate(wounds):
+            self.care_series(wound, [12 - offset, 9, 7 + offset, 4], step=5 + offset)
+        batch = {item['wound']: item for item in self.client.get('/api/wounds/trajectories/').json()}
+        for wound in wounds:
+            single = self.client.get(f'/api/wounds/{wound.id}/trajectory/').json()
+            single.pop('points')
+            self.assertEqual(batch[wound.id], single)
+
+    def test_other_users_wounds_are_hidden(self):
+        other = User.objects.create_user(username='other', password='x')
+        patient = Patient.objects.create(created_by=other, updated_by=other)
+        wound = Wound.objects.create(patient=patient, created_by=other, updated_by=other)
+        WoundCare.objects.create(wound=wound, created_by=other, updated_by=other)
+        self.assertEqual(self.client.get(f'/api/wounds/{wound.id}/trajectory/').status_code, 404)
+        self.assertEqual(self.client.get('/api/wounds/trajectories/').json(), [])
+
+
+class DueCareQueueTests(WoundApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.today = timezone.localdate()
+        self.patient = self.create_patient(rut='11-1')
+
+    def due_in(self, days, patient=None):
+        wound = self.create_wound(patient or self.patient)
+        self.create_care(wound, care_date=self.today - timedelta(days=30), wound_next_care=self.today - timedelta(days=20))
+        self.create_care(wound, care_date=self.today - timedelta(days=3), wound_next_care=self.today + timedelta(days=days))
+        return wound
+
+    def queue(self, **params):
+        response = self.client.get('/api/due-cares/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_latest_care_per_wound_defines_the_queue(self):
+        overdue, today, soon, later = self.due_in(-2), self.due_in(0), self.due_in(3), self.due_in(30)
+        self.create_care(self.create_wound(self.patient))  # sin próxima curación fijada
+
+        with self.assertNumQueries(1):
+            data = self.queue()
+        self.assertEqual([item['wound'] for item in data], [overdue.id, today.id, soon.id])
+        self.assertEqual([item['status'] for item in data], ['overdue', 'today', 'upcoming'])
+        self.assertEqual(data[0]['patient'], {'id': self.patient.id, 'first_name': 'Ana', 'last_name': 'Pérez', 'rut': '11-1'})
+        self.assertEqual(data[0]['wound_location'], 'talón')
+
+        self.assertEqual([item['wound'] for item in self.queue(status='overdue')], [overdue.id])
+        self.assertEqual([item['wound'] for item in self.queue(status='today')], [today.id])
+        self.assertEqual([item['wound'] for item in self.queue(status='upcoming', days=30)], [soon.id, later.id])
+
+    def test_filters_and_validation(self):
+        mine = self.due_in(0)
+        self.due_in(0, patient=self.create_patient())
+        other = User.objects.create_user(username='other', password='x')
+        patient = Patient.objects.create(created_by=other, updated_by=other)
+        wound = Wound.objects.create(patient=patient, created_by=other, updated_by=other)
+        WoundCare.objects.create(wound=wound, created_by=other, updated_by=other, wound_next_care=self.today)
+
+        self.assertEqual(len(self.queue()), 2)
+        self.assertEqual([item['wound'] for item in self.queue(patient=self.patient.id)], [mine.id])
+        self.assertEqual(self.client.get('/api/due-cares/', {'status': 'ayer'}).status_code, 400)
+
+    def test_keyset_pagination(self):
+        wounds = [self.due_in(offset % 3) for offset in range(7)]
+        expected = [wound.id for wound in sorted(wounds, key=lambda wound: (wound.summary.next_care_date, wound.id))]
+        seen, url = [], '/api/due-cares/?page_size=3'
+        while url:
+            with self.assertNumQueries(1):
+                body = self.client.get(url).json()
+            seen += [item['wound'] for item in body['results']]
+            url = body['next']
+        self.assertEqual(seen, expected)
+
+
+class PatientSearchTests(WoundApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.nunez = self.create_patient(first_name='José', last_name='Núñez', rut='12.345.678-k')
+        self.perez = self.create_patient(first_name='Ana', last_name='Pérez Soto', rut='9.876.543-2')
+        self.perezoso = self.create_patient(first_name='Pedro', last_name='Perezoso', rut='11.111.111-1')
+
+    def search(self, q, **params):
+        response = self.client.get('/api/patients/search/', {'q': q, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def ids(self, q, **params):
+        return [item['id'] for item in self.search(q, **params)['results']]
+
+    def test_search_name_is_kept_normalized(self):
+        self.assertEqual(self.nunez.search_name, 'jose nunez')
+        self.nunez.last_name = 'Ñandú'
+        self.nunez.save(update_fields=['last_name'])
+        self.nunez.refresh_from_db()
+        self.assertEqual((self.nunez.search_name, self.nunez.rut_normalized), ('jose nandu', '12345678K'))
+
+    def test_accent_insensitive_name_search(self):
+        self.assertEqual(self.ids('nunez'), [self.nunez.id])
+        self.assertEqual(self.ids('JOSÉ  Núñez'), [self.nunez.id])
+        self.assertEqual(self.ids('soto ana'), [self.perez.id])
+        # Coincidencia completa antes que parcial
+        self.assertEqual(self.ids('pérez'), [self.perez.id, self.perezoso.id])
+
+    def test_rut_search_ignores_dots_and_dash(self):
+        self.assertEqual(self.ids('12345678-K'), [self.nunez.id])
+        self.assertEqual(self.ids('12.345.678k'), [self.nunez.id])
+        self.assertEqual(self.ids('9876'), [self.perez.id])
+
+    def test_results_are_paginated_and_scoped_to_user(self):
+        for index in range(5):
+            self.create_patient(first_name=f'Marta {index}', last_name='Díaz')
+        other = User.objects.create_user(username='other', password='x')
+        Patient.objects.create(first_name='Marta', last_name='Díaz', created_by=other, updated_by=other)
+
+        ids, url = [], '/api/patients/search/?q=diaz&page_size=2'
+        while url:
+            with self.assertNumQueries(1):
+                body = self.client.get(url).json()
+            ids += [item['id'] for item in body['results']]
+            url = body['next']
+        self.assertEqual(len(ids), 5)
+        self.assertEqual(len(set(ids)), 5)
+
+    def test_bulk_sync_sets_search_name(self):
+        body = self.client.post('/api/sync/bulk/', {'patients': [
+            {'first_name': 'Inés', 'last_name': 'Muñoz', 'birth_date': '1950-01-01'},
+            {'id': self.perez.id, 'last_name': 'Peña'},
+        ]}, format='json').json()
+        self.assertEqual(self.ids('ines munoz'), [body['patients'][0]['id']])
+        self.assertEqual(self.ids('pena'), [self.perez.id])
+
+    def test_short_query_is_rejected(self):
+        self.assertEqual(self.client.get('/api/patients/search/', {'q': 'a'}).status_code, 400)
+
+    def test_trigram_expressions_are_built_for_postgresql(self):
+        from django.contrib.postgres.lookups import TrigramWordSimilar
+        from django.contrib.postgres.search import TrigramWordSimilarity
+
+        from .pagination import RankedPagination
+
+        def lookups(node):
+            for child in getattr(node, 'children', ()):
+                yield from lookups(child)
+            if not hasattr(node, 'children'):
+                yield type(node), node.lhs.target.name, node.rhs
+
+        # SQLite no compila estas expresiones: se revisa la consulta sin ejecutarla
+        with mock.patch.object(connection, 'vendor', 'postgresql'):
+            queryset = search_patients(Patient.objects.all(), 'Peres')
+        self.assertIn((TrigramWordSimilar, 'search_name', 'peres'), list(lookups(queryset.query.where)))
+        rank = queryset.query.annotations['rank']
+        self.assertIsInstance(rank, TrigramWordSimilarity)
+        self.assertEqual(rank.source_expressions[0].value, 'peres')
+        self.assertEqual(RankedPagination.ordering, ('-rank', 'id'))
+
+        with mock.patch.object(connection, 'vendor', 'postgresql'):
+            queryset = search_patients(Patient.objects.all(), '12.345')
+        # Con un RUT, el rango por RUT va primero y la similitud de trigramas queda por defecto
+        self.assertIsInstance(queryset.query.annotations['rank'].default, TrigramWordSimilarity)
+
+    @unittest.skipUnless(connection.vendor == 'postgresql', 'pg_trgm y varchar_pattern_ops son de PostgreSQL')
+    def test_postgresql_typos_and_rut_prefix_index(self):
+        self.assertIn(self.nunez.id, self.ids('jose nunes'))
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = Patient.objects.filter(rut_normalized__startswith='1234').explain()
+        self.assertRegex(plan, 'patient_(rut_prefix|owner_rut)_idx')
+
+
+def has_module(name):
+    return importlib.util.find_spec(name) is not None
+
+
+class ExportTests(WoundApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.patient = self.create_patient(first_name='Inés', last_name='Muñoz', rut='1-9')
+        self.wound = self.create_wound(self.patient)
+        self.cares = [
+            self.create_care(self.wound, care_date=date(2025, 3, day), wound_height=day, wound_care_notes='línea 1\nlínea 2')
+            for day in (1, 8, 15)
+        ]
+        other_wound = self.create_wound(self.create_patient())
+        self.create_care(other_wound)
+
+    def export(self, **params):
+        response = self.client.get('/api/woundcares/export/', params)
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content)
+
+    def test_csv_flattens_wound_and_patient_in_one_query(self):
+        with self.assertNumQueries(1):
+            response, content = self.export(patient=self.patient.id)
+        self.assertIn('attachment; filename="curaciones-', response['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(content.decode('utf-8-sig'))))
+        self.assertEqual([int(row['care_id']) for row in rows], [care.id for care in self.cares])
+        self.assertEqual(rows[0]['first_name'], 'Inés')
+        self.assertEqual(rows[0]['wound_location'], 'talón')
+        self.assertEqual(rows[2]['height'], '15.0')
+        self.assertEqual(rows[0]['care_notes'], 'línea 1\nlínea 2')
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_csv_is_streamed_in_chunks(self):
+        response = self.client.get('/api/woundcares/export/')
+        chunks = list(response.streaming_content)
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual(len(list(csv.reader(io.StringIO(b''.join(chunks).decode('utf-8-sig'))))), 5)
+
+    def peak_memory(self, rows):
+        WoundCare.objects.bulk_create(
+            WoundCare(wound=self.wound, created_by=self.user, updated_by=self.user, wound_care_notes='x' * 200)
+            for _ in range(rows)
+        )
+        response = self.client.get('/api/woundcares/export/')
+        tracemalloc.start()
+        size = sum(len(chunk) for chunk in response.streaming_content)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return size, peak
+
+    @override_settings(EXPORT_CHUNK_SIZE=100)
+    def test_csv_memory_does_not_grow_with_rows(self):
+        small_size, small = self.peak_memory(300)
+        large_size, large = self.peak_memory(3000)
+        self.assertGreater(large_size, small_size * 5)
+        self.assertLess(large, small * 2)
+
+    @unittest.skipUnless(has_module('openpyxl'), 'openpyxl no está instalado')
+    def test_xlsx(self):
+        from openpyxl import load_workbook
+        _, content = self.export(export_format='xlsx', wound=self.wound.id)
+        rows = list(load_workbook(io.BytesIO(content), read_only=True).active.values)
+        self.assertEqual(rows[0][:2], ('patient_id', 'first_name'))
+        self.assertEqual([row[9] for row in rows[1:]], [care.id for care in self.cares])
+
+    @unittest.skipUnless(has_module('pyarrow'), 'pyarrow no está instalado')
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_parquet(self):
+        import pyarrow.parquet as pq
+        _, content = self.export(export_format='parquet', wound=self.wound.id)
+        parquet = pq.ParquetFile(io.BytesIO(content))
+        self.assertEqual(parquet.metadata.num_row_groups, 2)
+        table = parquet.read()
+        self.assertEqual(table.column('care_id').to_pylist(), [care.id for care in self.cares])
+        self.assertEqual(table.column('care_date').to_pylist()[0], date(2025, 3, 1))
+
+    def test_unknown_or_unavailable_format(self):
+        self.assertEqual(self.client.get('/api/woundcares/export/', {'export_format': 'pdf'}).status_code, 400)
+        with mock.patch('importlib.util.find_spec', return_value=None):
+            response = self.client.get('/api/woundcares/export/', {'export_format': 'parquet'})
+        self.assertEqual(response.status_code, 501)
+
+
+class CompactSerializationTests(WoundApiTestCase):
+    def setUp(self):
+        super().setUp()
+        patient = self.create_patient(first_name='José\u2028', last_name='Núñez "Ñandú"', chronic_diseases={'dm2': True})
+        wound = self.create_wound(patient)
+        self.create_care(wound, wound_height=3.25, wound_width=1e-3, wound_care_notes='línea 1\nlínea 2\t😀', edema=None)
+        photo = self.create_care(wound, wound_debridement=True, wound_next_care=date(2025, 3, 8))
+        WoundCare.objects.filter(id=photo.id).update(
+            wound_photo='wound_photos/a b.jpg', photo_status='done',
+            photo_renditions={'thumb': 'wound_photos/renditions/a_thumb.webp'},
+        )
+        self.create_care(self.create_wound(self.create_patient()), wound_ia_recomendation={'texto': 'sí', 'n': [1, 2.5]})
+
+    def render(self, path, compact):
+        from .views import WoundCareViewSet
+        get_cache().clear()
+        renderers = [ORJSONRenderer] if compact else [JSONRenderer]
+        with override_settings(API_COMPACT_LISTS=compact), mock.patch.object(WoundCareViewSet, 'renderer_classes', renderers):
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return response.content
+
+    def test_output_is_byte_identical_to_drf(self):
+        for path in ('/api/woundcares/', '/api/woundcares/?page_size=2', f'/api/woundcares/?patient={Patient.objects.first().id}'):
+            drf, compact = self.render(path, False), self.render(path, True)
+            self.assertEqual(compact, drf, path)
+        self.assertIn(b'patientData', compact)
+        self.assertIn(b'a%20b.jpg', compact)
+
+    def test_exponent_floats_are_equivalent(self):
+        self.create_care(self.create_wound(self.create_patient()), wound_depth=1e-07, wound_width=1e16)
+        drf, compact = self.render('/api/woundcares/', False), self.render('/api/woundcares/', True)
+        # orjson escribe 1e-7 y 1e16 (DRF: 1e-07 y 1e+16); el valor es el mismo
+        self.assertIn(b'1e-07', drf)
+        self.assertIn(b'1e-7', compact)
+        self.assertEqual(json.loads(compact), json.loads(drf))
+
+    def test_cursor_pages_match(self):
+        body = json.loads(self.render('/api/woundcares/?page_size=2', True))
+        next_page = body['next'].split('testserver', 1)[1]
+        self.assertEqual(self.render(next_page, True), self.render(next_page, False))
+
+    def test_uncompilable_serializer_is_rejected(self):
+        from django.core.exceptions import ImproperlyConfigured
+
+        class WithMethod(WoundCareSerializer):
+            extra = serializers.SerializerMethodField()
+
+            class Meta(WoundCareSerializer.Meta):
+                fields = ['id', 'extra']
+
+            def get_extra(self, care):
+                return 1
+
+        with self.assertRaises(ImproperlyConfigured):
+            CompactSerializer(WithMethod())
+
+    def test_renderer_handles_drf_types(self):
+        data = {'when': timezone.now(), 1: Decimal('1.50'), 'error': ErrorDetail('mal', code='x')}
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+
+class SparseFieldsTests(WoundApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.patient = self.create_patient(chronic_diseases={'dm2': True})
+        self.wound = self.create_wound(self.patient)
+        self.seed(2, cares_per_wound=2)
+        self.care = self.create_care(self.wound, wound_height=2.5)
+
+    def get(self, path):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path)
+        return response, [query['sql'] for query in queries.captured_queries]
+
+    def test_fields_prune_output_and_columns(self):
+        response, queries = self.get('/api/woundcares/?fields=id,care_date,height')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()[0]), {'id', 'care_date', 'height'})
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn('JOIN', queries[-1])
+        self.assertNotIn('wound_care_notes', queries[-1])
+
+    def test_nested_fields(self):
+        response, queries = self.get(f'/api/woundcares/?wound={self.wound.id}&fields=id,woundData.wound_location')
+        self.assertEqual(response.json()[0], {'id': self.care.id, 'woundData': {'wound_location': 'talón'}})
+        self.assertNotIn('chronic_diseases', queries[-1])
+
+    def test_expand_keeps_only_listed_nesting(self):
+        care = self.client.get(f'/api/woundcares/{self.care.id}/?expand=woundData').json()
+        self.assertEqual(care['woundData']['patient'], self.patient.id)
+        self.assertNotIn('patientData', care['woundData'])
+
+        response, queries = self.get('/api/woundcares/?expand=')
+        self.assertNotIn('woundData', response.json()[0])
+        self.assertNotIn('chronic_diseases', queries[-1])
+        self.assertIn('patientData', self.client.get('/api/wounds/?expand=patientData').json()[0])
+
+    def test_retrieve_with_etag_does_not_add_queries(self):
+        response, queries = self.get(f'/api/woundcares/{self.care.id}/?fields=id&expand=')
+        self.assertEqual(response.json(), {'id': self.care.id})
+        self.assertEqual(len(queries), 1)
+        response = self.client.get(
+            f'/api/woundcares/{self.care.id}/?fields=id&expand=', HTTP_IF_NONE_MATCH=response['ETag'],
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_pages_with_fields(self):
+        response, queries = self.get('/api/patients/?page_size=2&fields=first_name')
+        body = response.json()
+        self.assertEqual(body['results'][0], {'first_name': 'Ana'})
+        self.assertEqual(len(queries), 2)
+        next_page = self.client.get(body['next'].split('testserver', 1)[1]).json()
+        self.assertEqual(len(next_page['results']), 1)
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get('/api/woundcares/?fields=id,nope,woundData.foo&expand=care_date.x')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('nope', response.json()['fields'][0])
+        self.assertIn('woundData.foo', response.json()['fields'][0])
+        self.assertIn('expand', response.json())
+
+
+class CompressionTests(WoundApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.seed(3, cares_per_wound=4)
+
+    def get(self, path, encoding, **extra):
+        get_cache().clear()
+        return self.client.get(path, HTTP_ACCEPT_ENCODING=encoding, **extra)
+
+    def test_gzip_list(self):
+        plain = self.get('/api/woundcares/', '')
+        response = self.get('/api/woundcares/', 'br;q=0.1, gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertNotIn('Content-Encoding', plain)
+
+    @unittest.skipUnless(has_module('brotli'), 'brotli no está instalado')
+    def test_brotli_is_preferred(self):
+        import brotli
+
+        plain = self.get('/api/woundcares/', '')
+        response = self.get('/api/woundcares/', 'gzip, deflate, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), plain.content)
+
+    def test_small_and_binary_responses_are_not_compressed(self):
+        patient = Patient.objects.first()
+        with override_settings(API_COMPRESSION_MIN_SIZE=10_000):
+            self.assertNotIn('Content-Encoding', self.get(f'/api/patients/{patient.id}/', 'gzip'))
+        self.assertNotIn('Content-Encoding', self.get('/api/woundcares/', 'gzip;q=0, identity'))
+
+    def test_conditional_get_with_weak_etag(self):
+        response = self.get('/api/woundcares/', 'gzip')
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        self.assertEqual(self.get('/api/woundcares/', 'gzip', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_streamed_export_is_compressed_in_chunks(self):
+        plain = b''.join(self.get('/api/woundcares/export/', '').streaming_content)
+        response = self.get('/api/woundcares/export/', 'gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), plain)
+
+    @unittest.skipUnless(has_module('msgpack'), 'msgpack no está instalado')
+    def test_msgpack_renderer(self):
+        import msgpack
+
+        data = self.get('/api/woundcares/?page_size=5', '').json()
+        response = self.get('/api/woundcares/?page_size=5', '', HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content), data)
+        self.assertLess(len(response.content), len(json.dumps(data)))
+
+    @unittest.skipUnless(has_module('msgpack'), 'msgpack no está instalado')
+    def test_etag_depends_on_format(self):
+        care = WoundCare.objects.first()
+        for path in ('/api/woundcares/', f'/api/woundcares/{care.id}/'):
+            etag = self.get(path, '')['ETag']
+            response = self.get(path, '', HTTP_ACCEPT='application/msgpack', HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('Accept', response['Vary'])
+
+
+class DatabaseConnectionTests(WoundApiTestCase):
+    def test_persistent_connections_by_default(self):
+        database = configure_connections({}, conn_max_age=600, health_checks=True)
+        self.assertEqual(database, {'CONN_MAX_AGE': 600, 'CONN_HEALTH_CHECKS': True})
+
+    def test_pool_is_sized_from_threads(self):
+        with mock.patch('importlib.util.find_spec', return_value=object()):
+            database = configure_connections(
+                {'OPTIONS': {'sslmode': 'require'}}, conn_max_age=600, health_checks=True, pool=True,
+                workers=3, threads=4, background_threads=2, max_connections=20,
+            )
+        self.assertEqual(database['CONN_MAX_AGE'], 0)
+        self.assertEqual(database['OPTIONS'], {'sslmode': 'require', 'pool': {'min_size': 1, 'max_size': 6, 'timeout': 10}})
+
+    def test_invalid_configurations(self):
+        from django.core.exceptions import ImproperlyConfigured
+
+        with mock.patch('importlib.util.find_spec', return_value=None), self.assertRaises(ImproperlyConfigured):
+            configure_connections({}, conn_max_age=0, health_checks=True, pool=True)
+        with self.assertRaises(ImproperlyConfigured):
+            configure_connections({}, conn_max_age=600, health_checks=True, workers=4, threads=8, max_connections=20)
+
+    def test_pgbouncer_disables_server_side_cursors(self):
+        database = configure_connections({}, conn_max_age=0, health_checks=False, pgbouncer=True)
+        self.assertTrue(database['DISABLE_SERVER_SIDE_CURSORS'])
+
+    def test_reuse_is_reported_in_metrics(self):
+        self.client.force_authenticate(User.objects.create_superuser(username='admin', password='x'))
+        reset_connection_stats()
+        self.addCleanup(reset_connection_stats)
+        self.client.get('/api/patients/')
+        connection_created.send(sender=type(connection), connection=connection)
+        self.client.get('/api/patients/')
+        self.client.get('/api/patients/')
+
+        stats = self.client.get('/api/metrics/').json()['database']
+        self.assertEqual((stats['requests'], stats['connections_opened']), (4, 1))
+        self.assertEqual(stats['reuse_ratio'], 0.75)
+        self.assertEqual(stats['pid'], os.getpid())
+        self.assertIsNone(stats['pool'])
+
+
+class CertsHandler(BaseHTTPRequestHandler):
+    """Sustituto local de https://www.googleapis.com/oauth2/v1/certs."""
+    certs = {}
+    cache_control = 'public, max-age=3600'
+    hits = []
+    delay = 0
+
+    def do_GET(self):
+        type(self).hits.append(self.path)
+        time.sleep(self.delay)
+        body = json.dumps(self.certs).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', self.cache_control)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class GoogleLoginTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        public_key, private_key = rsa.newkeys(1024)
+        cls.signer = crypt.RSASigner.from_string(private_key.save_pkcs1().decode(), key_id='k1')
+        CertsHandler.certs = {'k1': public_key.save_pkcs1().decode()}
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), CertsHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.certs_url = f'http://127.0.0.1:{cls.server.server_port}/oauth2/v1/certs'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        CertsHandler.hits = []
+        CertsHandler.cache_control = 'public, max-age=3600'
+        CertsHandler.delay = 0
+        settings_override = override_settings(GOOGLE_CERTS_URL=self.certs_url)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        client_patch = mock.patch('curametric_wound_api.views.GOOGLE_CLIENT_ID', 'client-id')
+        client_patch.start()
+        self.addCleanup(client_patch.stop)
+        reset_google_auth_caches()
+        self.addCleanup(reset_google_auth_caches)
+
+    def make_token(self, email='ana@example.com', audience='client-id'):
+        now = int(time.time())
+        payload = {
+            'iss': 'https://accounts.google.com', 'aud': audience, 'email': email,
+            'name': 'Ana', 'iat': now, 'exp': now + 3600,
+        }
+        return jwt.encode(self.signer, payload).decode()
+
+    def login(self, token):
+        return self.client.post('/api/google-login/', {'token': token}, content_type='application/json')
+
+    def test_certs_are_cached_for_max_age(self):
+        self.assertEqual(self.login(self.make_token()).status_code, 200)
+        self.assertEqual(self.login(self.make_token('rosa@example.com')).status_code, 200)
+        self.assertEqual(len(CertsHandler.hits), 1)
+        self.assertTrue(User.objects.filter(username='rosa@example.com').exists())
+
+    def test_uncacheable_certs_are_fetched_again(self):
+        CertsHandler.cache_control = 'no-store'
+        self.login(self.make_token())
+        self.login(self.make_token('rosa@example.com'))
+        self.assertEqual(len(CertsHandler.hits), 2)
+
+    def test_verified_token_is_not_verified_again(self):
+        token = self.make_token()
+        with mock.patch.object(id_token, 'verify_token', wraps=id_token.verify_token) as verify:
+            for _ in range(3):
+                self.assertEqual(self.login(token).status_code, 200)
+        self.assertEqual(verify.call_count, 1)
+
+    def test_concurrent_logins_do_not_wait_for_each_other(self):
+        CertsHandler.cache_control = 'no-store'
+        CertsHandler.delay = 0.5
+        tokens = [self.make_token(f'usuario{i}@example.com') for i in range(4)]
+        client = AsyncClient()
+
+        async def logins():
+            return await asyncio.gather(*(
+                client.post('/api/google-login/', {'token': token}, content_type='application/json') for token in tokens
+            ))
+
+        start = time.monotonic()
+        responses = async_to_sync(logins)()
+        # En serie serían 4 × 0,5 s esperando a los certificados
+        self.assertLess(time.monotonic() - start, 1.5)
+        self.assertEqual([response.status_code for response in responses], [200] * 4)
+        self.assertEqual(len(CertsHandler.hits), 4)
+        self.assertEqual(User.objects.filter(username__startswith='usuario').count(), 4)
+
+    def test_invalid_tokens_are_rejected(self):
+        self.assertEqual(self.login(self.make_token(audience='otra-app')).status_code, 400)
+        self.assertEqual(self.login(self.make_token()[:-4] + 'AAAA').status_code, 400)
+        self.assertEqual(self.login('').status_code, 400)
@@ -0,0 +1,166 @@
+"""
+Trayectoria de cicatrización calculada con NumPy.
+
+Las columnas de medidas de las curaciones se leen con una sola consulta
+values_list y se procesan como arreglos. Las regresiones se resuelven para
+todas las heridas a la vez con sumas agrupadas (np.bincount), así que el
+ranking de heridas estancadas no recorre objetos del ORM uno por uno.
+
+- Tasa lineal: pendiente del área (cm²/día).
+- Tasa logarítmica: pendiente de log(área) por día. De ella sale el
+  porcentaje de reducción semanal, que no depende del tamaño de la herida.
+- Cierre proyectado: el día en que la recta del área llega a 0.
+"""
+import math
+from datetime import date, timedelta
+
+import numpy as np
+from django.conf import settings
+
+COLUMNS = (
+    'wound_id', 'care_date', 'wound_height', 'wound_width', 'wound_depth',
+    'wound_granulation_tissue', 'wound_sloughed_tissue', 'wound_necrotic_tissue',
+)
+# Nombre en la respuesta (los mismos alias que WoundCareSerializer) → columna
+TISSUES = {
+    'granulation_tissue': 'wound_granulation_tissue',
+    'slough': 'wound_sloughed_tissue',
+    'necrotic_tissue': 'wound_necrotic_tissue',
+}
+
+
+def load_columns(queryset):
+    """Una consulta; devuelve {columna: ndarray} ordenado por herida y fecha, o None si no hay filas."""
+    rows = list(queryset.order_by('wound_id', 'care_date', 'id').values_list(*COLUMNS))
+    if not rows:
+        return None
+    columns = dict(zip(COLUMNS, zip(*rows)))
+    arrays = {name: np.asarray(values, dtype=np.float64) for name, values in columns.items() if name not in ('wound_id', 'care_date')}
+    arrays['wound_id'] = np.asarray(columns['wound_id'], dtype=np.int64)
+    arrays['day'] = np.asarray(columns['care_date'], dtype='datetime64[D]').astype(np.int64)
+    return arrays
+
+
+def grouped_fit(group, x, y, size, weights=None):
+    """Regresión lineal de y sobre x por grupo; NaN donde no hay al menos dos x distintos."""
+    weights = np.ones_like(x) if weights is None else weights
+    n = np.bincount(group, weights, minlength=size)
+    sx = np.bincount(group, weights * x, minlength=size)
+    sy = np.bincount(group, weights * y, minlength=size)
+    sxx = np.bincount(group, weights * x * x, minlength=size)
+    sxy = np.bincount(group, weights * x * y, minlength=size)
+    denominator = n * sxx - sx * sx
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = np.where(denominator > 0, (n * sxy - sx * sy) / denominator, np.nan)
+        intercept = (sy - slope * sx) / n
+    return slope, intercept
+
+
+def analyze(arrays):
+    """Métricas por herida para todas las heridas presentes en `arrays`."""
+    wounds, first, group = np.unique(arrays['wound_id'], return_index=True, return_inverse=True)
+    size = len(wounds)
+    last = np.append(first[1:], len(group)) - 1
+
+    days = arrays['day'] - arrays['day'][first][group]
+    area = arrays['wound_height'] * arrays['wound_width']
+    area_slope, area_intercept = grouped_fit(group, days, area, size)
+
+    # log(0) no existe: las curaciones con área 0 no entran en el ajuste logarítmico
+    measured = (area > 0).astype(np.float64)
+    log_area = np.log(np.where(area > 0, area, 1.0))
+    log_slope, _ = grouped_fit(group, days, log_area, size, weights=measured)
+    with np.errstate(over='ignore'):
+        weekly_reduction = (1 - np.exp(7 * log_slope)) * 100
+
+    # Cierre proyectado: corte de la recta con 0, nunca antes de la última curación
+    latest_area = area[last]
+    last_day = days[last]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        closure_day = np.maximum(np.ceil(-area_intercept / area_slope), last_day)
+    closure_day = np.where((area_slope < 0) & (latest_area > 0), closure_day, np.nan)
+
+    tissue_slopes = {
+        name: grouped_fit(group, days, arrays[column], size)[0] for name, column in TISSUES.items()
+    }
+
+    return {
+        'group': group,
+        'days': days,
+        'area': area,
+        'wounds': wounds,
+        'first': first,
+        'last': last,
+        'care_count': np.bincount(group, minlength=size),
+        'area_slope': area_slope,
+        'log_slope': log_slope,
+        'weekly_reduction': weekly_reduction,
+        'closure_day': closure_day,
+        'tissue_slopes': tissue_slopes,
+    }
+
+
+def _number(value, digits=4):
+    value = float(value)
+    return None if math.isnan(value) else round(value, digits)
+
+
+def _date(day):
+    return date(1970, 1, 1) + timedelta(days=int(day))
+
+
+def summary_for(result, arrays, index):
+    """Resumen JSON de la herida en la posición `index` del resultado de analyze()."""
+    first_day = arrays['day'][result['first'][index]]
+    closure_day = result['closure_day'][index]
+    weekly = _number(result['weekly_reduction'][index], 2)
+    return {
+        'wound': int(result['wounds'][index]),
+        'care_count': int(result['care_count'][index]),
+        'first_care_date': _date(first_day),
+        'last_care_date': _date(arrays['day'][result['last'][index]]),
+        'latest_area': _number(result['area'][result['last'][index]]),
+        'healing_rate': {
+            'area_per_day': _number(result['area_slope'][index]),
+            'log_area_per_day': _number(result['log_slope'][index], 6),
+            'weekly_reduction_percent': weekly,
+        },
+        'projected_closure_date': None if np.isnan(closure_day) else _date(first_day + closure_day),
+        'tissue_trends': {
+            name: _number(slopes[index]) for name, slopes in result['tissue_slopes'].items()
+        },
+        'stalled': None if weekly is None else weekly < settings.TRAJECTORY_STALLED_WEEKLY_REDUCTION,
+    }
+
+
+def wound_trajectory(queryset):
+    """Trayectoria de una herida: resumen más la serie de puntos (área, volumen, tejidos)."""
+    arrays = load_columns(queryset)
+    if arrays is None:
+        return None
+    result = analyze(arrays)
+    data = summary_for(result, arrays, 0)
+    area = result['area']
+    series = {
+        'care_date': [_date(day) for day in arrays['day'].tolist()],
+        'day': result['days'].tolist(),
+        'area': np.round(area, 4).tolist(),
+        'volume': np.round(area * arrays['wound_depth'], 4).tolist(),
+        **{name: arrays[column].tolist() for name, column in TISSUES.items()},
+    }
+    data['points'] = [dict(zip(series, values)) for values in zip(*series.values())]
+    return data
+
+
+def rank_trajectories(queryset):
+    """
+    Resumen de todas las heridas del queryset, de la más estancada (menor
+    reducción semanal) a la que mejor cicatriza; sin tasa calculable, al final.
+    """
+    arrays = load_columns(queryset)
+    if arrays is None:
+        return []
+    result = analyze(arrays)
+    weekly = result['weekly_reduction']
+    order = np.lexsort((result['wounds'], np.where(np.isnan(weekly), np.inf, weekly)))
+    return [summary_for(result, arrays, index) for index in order]
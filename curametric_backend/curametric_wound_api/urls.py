@@ -10,6 +10,13 @@ from .views import (
     UserCreateViewSet,
     UploadWoundPhotoView,
     GoogleLoginView,
+    PhotoUploadViewSet,
+    ChunkedUploadViewSet,
+    BulkSyncView,
+    DeltaSyncView,
+    MetricsView,
+    WoundSummaryViewSet,
+    DueCareViewSet,
 )
 
 router = DefaultRouter()
@@ -18,6 +25,10 @@ router.register(r'create_user', UserCreateViewSet, basename='create_user')
 router.register(r'patients', PatientViewSet)
 router.register(r'wounds', WoundViewSet)
 router.register(r'woundcares', WoundCareViewSet)
+router.register(r'wound-summaries', WoundSummaryViewSet)
+router.register(r'due-cares', DueCareViewSet, basename='due-cares')
+router.register(r'photo-uploads', PhotoUploadViewSet)
+router.register(r'chunked-uploads', ChunkedUploadViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -26,4 +37,7 @@ urlpatterns = [
     path('google-login/', GoogleLoginView.as_view(), name='google-login'),
     path('upload-wound-photo/', UploadWoundPhotoView.as_view(), name='upload-wound-photo'),
     path('profile/', UserProfileView.as_view(), name='user-profile'),
+    path('sync/', DeltaSyncView.as_view(), name='sync'),
+    path('sync/bulk/', BulkSyncView.as_view(), name='sync-bulk'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
 ]
@@ -1,54 +1,66 @@
-from rest_framework import viewsets, permissions
-from rest_framework.permissions import IsAuthenticated
-from .models import Patient, Wound, WoundCare
+from rest_framework import viewsets, status, mixins
+from .models import Patient, Wound, WoundCare, PhotoUpload, ChunkedUpload, WoundSummary
 from django.contrib.auth.models import User
-from .serializers import UserSerializer, PatientSerializer, WoundSerializer, WoundCareSerializer, UserCreateSerializer
+from .serializers import UserSerializer, PatientSerializer, WoundSerializer, WoundCareSerializer, UserCreateSerializer, PhotoUploadSerializer, ChunkedUploadSerializer, WoundSummarySerializer, DueCareSerializer, PatientSearchSerializer
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny, IsAuthenticated
-from google.auth.transport import requests
-from google.oauth2 import id_token
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from rest_framework_simplejwt.tokens import RefreshToken
 import os
 import environ
 from rest_framework.decorators import action
+from .query_utils import OptimizedQuerysetMixin
+from .filters import QueryParamFilterBackend, parse_id_param
+from .pagination import KeysetPagination, RankedPagination, StreamingListMixin
+from .compact import CompactListMixin
+from .sparse_fields import SparseFieldsMixin
+from .search import search_patients
+from .google_auth import averify_google_token
+from .async_api import AsyncAPIView
+from .conditional import ConditionalGetMixin
+from .response_cache import ResponseCacheMixin, cache_stats
+from .db_metrics import connection_stats
+from .trajectory import rank_trajectories, wound_trajectory
+from .due_queue import due_queryset
+from django.utils import timezone
+from django.http import JsonResponse, StreamingHttpResponse
+from .export import FORMATS as EXPORT_FORMATS, export_rows, is_available as is_export_available
 
 env = environ.Env()
 environ.Env.read_env()
 
-from curametric_backend.upload import upload_file
-
 GOOGLE_CLIENT_ID = os.environ.get("GOOGLE_CLIENT_ID_WEB")
 
-class GoogleLoginView(APIView):
-    permission_classes = [AllowAny]
+class GoogleLoginView(AsyncAPIView):
+    """Asíncrona: mientras se descargan los certificados de Google no se ocupa un worker."""
+    authentication_classes = []
 
-    def post(self, request):
-        token = request.data.get("token")
+    async def post(self, request):
+        token = (await self.read_data(request)).get("token")
         print("Token recibido:", token)
 
         try:
-            idinfo = id_token.verify_oauth2_token(token, requests.Request(), GOOGLE_CLIENT_ID)
+            idinfo = await averify_google_token(token, GOOGLE_CLIENT_ID)
             print("Info validada de Google:", idinfo)
 
             email = idinfo["email"]
             name = idinfo.get("name", "")
 
-            user, created = User.objects.get_or_create(username=email, defaults={"email": email, "first_name": name})
+            user, created = await User.objects.aget_or_create(username=email, defaults={"email": email, "first_name": name})
             if created:
                 print("Nuevo usuario creado:", user.username)
 
             refresh = RefreshToken.for_user(user)
-            return Response({"jwt": str(refresh.access_token)})
+            return JsonResponse({"jwt": str(refresh.access_token)})
 
         except Exception as e:
             print("Error al validar el token:", str(e))
-            return Response({"error": "Token inválido"}, status=400)
+            return JsonResponse({"error": "Token inválido"}, status=400)
         
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [IsAuthenticated]
 
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
     def me(self, request):
@@ -74,45 +86,145 @@ class UserCreateViewSet(viewsets.ModelViewSet):
             return Response(UserCreateSerializer(user).data)
         return Response(serializer.errors, status=400)
 
-class PatientViewSet(viewsets.ModelViewSet):
+class PatientViewSet(ResponseCacheMixin, ConditionalGetMixin, StreamingListMixin, SparseFieldsMixin, OptimizedQuerysetMixin, viewsets.ModelViewSet):
     queryset = Patient.objects.all()
     serializer_class = PatientSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    cache_dependencies = ('patient',)
     
     def get_queryset(self):
-        return Patient.objects.filter(created_by=self.request.user)
+        return Patient.objects.filter(created_by_id=self.request.user.id)
 
-class WoundViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """?q= nombre, apellido o RUT; resultados ordenados por relevancia y paginados."""
+        queryset = search_patients(self.get_queryset(), request.query_params.get('q', ''))
+        paginator = RankedPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        return paginator.get_paginated_response(PatientSearchSerializer(page, many=True).data)
+
+class WoundViewSet(ResponseCacheMixin, ConditionalGetMixin, StreamingListMixin, SparseFieldsMixin, OptimizedQuerysetMixin, viewsets.ModelViewSet):
     queryset = Wound.objects.all()
     serializer_class = WoundSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    etag_related = ('patient',)
+    cache_dependencies = ('wound', 'patient')
+    filter_backends = [QueryParamFilterBackend]
+    filter_fields = {'patient': 'patient_id'}
 
     def get_queryset(self):
-        return Wound.objects.filter(created_by=self.request.user)
+        return Wound.objects.filter(created_by_id=self.request.user.id)
 
     def perform_create(self, serializer):
-        serializer.save(created_by=self.request.user, updated_by=self.request.user)
+        serializer.save(created_by_id=self.request.user.id, updated_by_id=self.request.user.id)
+
+    @action(detail=True, methods=['get'])
+    def summary(self, request, pk=None):
+        summary = WoundSummary.objects.filter(wound_id=pk, created_by_id=request.user.id).first()
+        if summary is None:
+            return Response({"error": "La herida no tiene curaciones registradas."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(WoundSummarySerializer(summary).data)
+
+    @action(detail=True, methods=['get'])
+    def trajectory(self, request, pk=None):
+        wound = self.get_object()
+        data = wound_trajectory(WoundCare.objects.filter(wound_id=wound.id))
+        if data is None:
+            return Response({"error": "La herida no tiene curaciones registradas."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(data)
+
+    @action(detail=False, methods=['get'])
+    def trajectories(self, request):
+        """Todas las heridas del usuario, de la más estancada a la que mejor cicatriza."""
+        cares = WoundCare.objects.filter(created_by_id=request.user.id)
+        patient = parse_id_param(request.query_params, 'patient')
+        if patient is not None:
+            cares = cares.filter(wound__patient_id=patient)
+        data = rank_trajectories(cares)
+        if request.query_params.get('stalled') in ('1', 'true'):
+            data = [item for item in data if item['stalled']]
+        return Response(data)
 
-class WoundCareViewSet(viewsets.ModelViewSet):
+class WoundCareViewSet(ResponseCacheMixin, ConditionalGetMixin, StreamingListMixin, CompactListMixin, SparseFieldsMixin, OptimizedQuerysetMixin, viewsets.ModelViewSet):
     queryset = WoundCare.objects.all()
     serializer_class = WoundCareSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    etag_related = ('wound', 'wound__patient')
+    cache_dependencies = ('woundcare', 'wound', 'patient')
+    filter_backends = [QueryParamFilterBackend]
+    filter_fields = {'patient': 'wound__patient_id', 'wound': 'wound_id'}
+    date_range_fields = {'care_date': 'care_date', 'next_care': 'wound_next_care'}
     
     def get_queryset(self):
-        queryset = WoundCare.objects.filter(created_by=self.request.user)
-        wound_id = self.request.query_params.get('wound', None)
-        if wound_id is not None:
-            queryset = queryset.filter(wound_id=wound_id)
-        return queryset
+        return WoundCare.objects.filter(created_by_id=self.request.user.id)
     
     def perform_create(self, serializer):
         try:
-            serializer.save(created_by=self.request.user, updated_by=self.request.user)
+            serializer.save(created_by_id=self.request.user.id, updated_by_id=self.request.user.id)
         except Exception as e:
             print(f"Error al guardar WoundCare: {e}")
             raise e
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """?export_format=csv|xlsx|parquet, con los mismos filtros que el listado."""
+        name = request.query_params.get('export_format', 'csv')
+        export_format = EXPORT_FORMATS.get(name)
+        if export_format is None:
+            return Response(
+                {"error": f"Formato no soportado. Use uno de: {', '.join(EXPORT_FORMATS)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if not is_export_available(export_format):
+            return Response(
+                {"error": f"El formato {name} requiere instalar {export_format.requires} en el servidor."},
+                status=status.HTTP_501_NOT_IMPLEMENTED,
+            )
+
+        queryset = self.filter_queryset(WoundCare.objects.filter(created_by_id=request.user.id))
+        response = StreamingHttpResponse(export_format.stream(export_rows(queryset)), content_type=export_format.content_type)
+        filename = f'curaciones-{timezone.localdate().isoformat()}.{export_format.extension}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
     
 
+class WoundSummaryViewSet(viewsets.ReadOnlyModelViewSet):
+    """Resumen de cicatrización por herida, mantenido al guardar o borrar curaciones."""
+    queryset = WoundSummary.objects.all()
+    serializer_class = WoundSummarySerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [QueryParamFilterBackend]
+    filter_fields = {'patient': 'wound__patient_id'}
+    date_range_fields = {'next_care': 'next_care_date'}
+
+    def get_queryset(self):
+        return WoundSummary.objects.filter(created_by_id=self.request.user.id).order_by('next_care_date', 'wound_id')
+
+class DueCareViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    Cola de curaciones pendientes del usuario: ?status=overdue|today|upcoming,
+    ?days= (horizonte de las próximas), ?patient=, y ?page_size= / ?cursor=.
+    """
+    serializer_class = DueCareSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('next_care_date', 'wound_id')
+    filter_backends = [QueryParamFilterBackend]
+    filter_fields = {'patient': 'wound__patient_id'}
+
+    def get_queryset(self):
+        return due_queryset(self.request.user.id, self.request.query_params, self.today)
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), 'today': self.today}
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.today = timezone.localdate()
+
 class UserProfileView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -121,37 +233,199 @@ class UserProfileView(APIView):
         serializer = UserSerializer(user)
         return Response(serializer.data)
 
-from rest_framework import status
-from curametric_backend.upload import upload_file
+from django.conf import settings
+from .photo_pipeline import enqueue_staged_photo, stage_photo, PhotoTooLarge, SizeLimitUploadHandler
+from asgiref.sync import sync_to_async
+from django.db import transaction
+
+# Margen para los encabezados multipart y el resto de campos del formulario
+MULTIPART_OVERHEAD = 64 * 1024
+
+class UploadWoundPhotoView(AsyncAPIView):
+    """
+    Asíncrona: el multipart se lee y la foto se escribe en staging en un hilo
+    aparte, y el registro en la base va por sync_to_async; el FTP lo hace el worker.
+    """
+    permission_classes = [IsAuthenticated]
+
+    async def post(self, request, *args, **kwargs):
+        too_large = JsonResponse(
+            {"error": "La imagen supera el tamaño máximo permitido."},
+            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        )
+        max_size = settings.PHOTO_MAX_UPLOAD_SIZE
+        try:
+            content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            return JsonResponse({"error": "Content-Length inválido."}, status=status.HTTP_400_BAD_REQUEST)
+        if content_length > max_size + MULTIPART_OVERHEAD:
+            return too_large
+
+        # Cortar la subida apenas se pase del máximo, antes de terminar de recibirla
+        limiter = SizeLimitUploadHandler(max_size, request)
+        request.upload_handlers.insert(0, limiter)
 
-class UploadWoundPhotoView(APIView):
-    def post(self, request, *args, **kwargs):
         try:
             # Obtener el archivo de la solicitud
-            wound_care_id = request.data.get('wound_care_id')
+            wound_care_id = (await self.read_data(request)).get('wound_care_id')
             file = request.FILES.get('file')
 
+            if limiter.exceeded:
+                return too_large
             if not wound_care_id or not file:
-                return Response({"error": "Faltan parámetros obligatorios."}, status=status.HTTP_400_BAD_REQUEST)
+                return JsonResponse({"error": "Faltan parámetros obligatorios."}, status=status.HTTP_400_BAD_REQUEST)
 
             # Obtener el WoundCare correspondiente
-            wound_care = WoundCare.objects.get(id=wound_care_id)
-
-            # Subir el archivo al FTP
-            extension = os.path.splitext(file.name)[1]
-            filename = f"wound_care_photo_{wound_care_id}{extension}"
-            subfolder = f"wound_photos/patient_{wound_care.wound.patient.id}/wound_{wound_care.wound.id}"
-            file_url = upload_file(file, filename, subfolder)
+            wound_care = await WoundCare.objects.select_related('wound').aget(id=wound_care_id, created_by_id=request.user.id)
 
-            if not file_url:
-                return Response({"error": "Error al subir la imagen al servidor FTP."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            # Dejar la foto en staging; el worker la sube al FTP tras el commit
+            staged = await sync_to_async(stage_photo, thread_sensitive=False)(file)
+            upload = await sync_to_async(transaction.atomic(enqueue_staged_photo))(wound_care, *staged, file.name)
 
-            # Guardar la URL en el modelo
-            wound_care.wound_photo = file_url
-            wound_care.save()
-
-            return Response({"message": "Imagen subida correctamente.", "url": file_url}, status=status.HTTP_200_OK)
+            return JsonResponse(
+                {"message": "Imagen recibida, subida en curso.", "upload_id": upload.id, "status": upload.status},
+                status=status.HTTP_202_ACCEPTED,
+            )
         except WoundCare.DoesNotExist:
-            return Response({"error": "WoundCare no encontrado."}, status=status.HTTP_404_NOT_FOUND)
+            return JsonResponse({"error": "WoundCare no encontrado."}, status=status.HTTP_404_NOT_FOUND)
+        except PhotoTooLarge:
+            return too_large
         except Exception as e:
-            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+            return JsonResponse({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class PhotoUploadViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = PhotoUpload.objects.all()
+    serializer_class = PhotoUploadSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return PhotoUpload.objects.filter(wound_care__created_by_id=self.request.user.id)
+
+
+from io import BytesIO
+from .chunked_upload import append_chunk, finalize, spool_chunk, ChunkedUploadError, OffsetMismatch
+
+class ChunkedUploadViewSet(viewsets.GenericViewSet):
+    """
+    Subida reanudable de fotos:
+      POST   /chunked-uploads/                 → iniciar (wound_care, filename, total_size, sha256)
+      PUT    /chunked-uploads/<id>/?offset=N   → enviar una parte (cuerpo binario)
+      GET    /chunked-uploads/<id>/            → offset recibido, para reanudar
+      POST   /chunked-uploads/<id>/finalize/   → armar el archivo y subirlo
+
+    Fuera de ATOMIC_REQUESTS: una parte llega lento por la red celular y no
+    debe tener una transacción abierta mientras tanto.
+    """
+    queryset = ChunkedUpload.objects.all()
+    serializer_class = ChunkedUploadSerializer
+    permission_classes = [IsAuthenticated]
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        return transaction.non_atomic_requests(super().as_view(actions, **initkwargs))
+
+    def get_queryset(self):
+        return ChunkedUpload.objects.filter(created_by_id=self.request.user.id)
+
+    def create(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save(created_by_id=request.user.id)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def retrieve(self, request, pk=None):
+        return Response(self.get_serializer(self.get_object()).data)
+
+    def update(self, request, pk=None):
+        offset = request.query_params.get('offset', request.headers.get('Upload-Offset'))
+        try:
+            offset = int(offset)
+        except (TypeError, ValueError):
+            return Response({"error": "Falta el offset de la parte."}, status=status.HTTP_400_BAD_REQUEST)
+
+        upload = self.get_queryset().filter(pk=pk, status=ChunkedUpload.ACTIVE).first()
+        if upload is None:
+            return Response({"error": "Subida no encontrada."}, status=status.HTTP_404_NOT_FOUND)
+        if offset != upload.offset:
+            return Response({"error": str(OffsetMismatch(upload.offset)), "offset": upload.offset}, status=status.HTTP_409_CONFLICT)
+
+        # Leer el cuerpo antes de bloquear la fila; el bloqueo solo cubre la copia local
+        spool, read_error = spool_chunk(request.stream or BytesIO(), upload.total_size - offset)
+        with spool, transaction.atomic():
+            upload = self.get_queryset().select_for_update().filter(pk=pk, status=ChunkedUpload.ACTIVE).first()
+            if upload is None:
+                return Response({"error": "Subida no encontrada."}, status=status.HTTP_404_NOT_FOUND)
+            try:
+                append_chunk(upload, spool, offset, read_error)
+            except OffsetMismatch as e:
+                return Response({"error": str(e), "offset": e.expected}, status=status.HTTP_409_CONFLICT)
+            except ChunkedUploadError as e:
+                return Response({"error": str(e), "offset": upload.offset}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(upload).data)
+
+    @action(detail=True, methods=['post'])
+    def finalize(self, request, pk=None):
+        with transaction.atomic():
+            # Un reintento concurrente espera aquí y luego recibe la misma PhotoUpload
+            upload = self.get_queryset().select_for_update().filter(pk=pk).first()
+            if upload is None:
+                return Response({"error": "Subida no encontrada."}, status=status.HTTP_404_NOT_FOUND)
+            try:
+                photo_upload = finalize(upload)
+            except ChunkedUploadError as e:
+                return Response({"error": str(e), "offset": upload.offset}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            {"message": "Imagen recibida, subida en curso.", "upload_id": photo_upload.id, "status": photo_upload.status},
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+
+from .bulk_sync import bulk_sync, count_items, has_errors, invalid_sections
+
+class BulkSyncView(APIView):
+    """
+    Crea y actualiza en una sola transacción los pacientes, heridas y curaciones
+    registrados sin conexión. Responde 200 si todo se guardó, o 207 con los
+    errores de cada elemento (los demás se guardan igual).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        payload = request.data
+        if not isinstance(payload, dict):
+            return Response({"error": "Formato inválido."}, status=status.HTTP_400_BAD_REQUEST)
+        invalid = invalid_sections(payload)
+        if invalid:
+            return Response(
+                {"error": f"Formato inválido: {', '.join(invalid)} debe ser una lista."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if count_items(payload) > settings.BULK_SYNC_MAX_ITEMS:
+            return Response(
+                {"error": f"Máximo {settings.BULK_SYNC_MAX_ITEMS} elementos por petición."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        results = bulk_sync(request.user, payload, context={'request': request})
+        return Response(results, status=status.HTTP_207_MULTI_STATUS if has_errors(results) else status.HTTP_200_OK)
+
+
+from .delta_sync import delta_sync
+
+class DeltaSyncView(APIView):
+    """
+    Cambios y borrados desde la última sincronización, por modelo.
+    El cliente reenvía la marca recibida: ?patients=&wounds=&woundcares=
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response(delta_sync(request.user, request.query_params, context={'request': request}))
+
+
+class MetricsView(APIView):
+    """Contadores para monitoreo (solo administradores)."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response({"response_cache": cache_stats(), "database": connection_stats()})
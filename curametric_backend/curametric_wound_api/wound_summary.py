@@ -0,0 +1,137 @@
+"""
+Mantenimiento incremental de WoundSummary.
+
+El caso habitual, una curación nueva posterior a la última, se aplica con un
+solo UPDATE sobre la fila del resumen (contador con F(), sin leer el
+historial). Cualquier otro cambio (curación con fecha anterior, edición,
+borrado, cambio de herida) recalcula el resumen con consultas indexadas sobre (wound, care_date):
+la primera y la última curación y el total.
+"""
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, When
+from django.utils import timezone
+
+from .models import WoundCare, WoundSummary
+
+# Campo del resumen → campo de la última curación
+LATEST_FIELDS = {
+    'latest_height': 'wound_height',
+    'latest_width': 'wound_width',
+    'latest_depth': 'wound_depth',
+    'latest_granulation_tissue': 'wound_granulation_tissue',
+    'latest_sloughed_tissue': 'wound_sloughed_tissue',
+    'latest_necrotic_tissue': 'wound_necrotic_tissue',
+}
+
+
+def care_area(care):
+    return care.wound_height * care.wound_width
+
+
+def reduction_percent(baseline_area, area):
+    if not baseline_area:
+        return None
+    return (baseline_area - area) * 100 / baseline_area
+
+
+def latest_values(care):
+    area = care_area(care)
+    values = {field: getattr(care, source) for field, source in LATEST_FIELDS.items()}
+    values.update(
+        latest_care_id=care.id,
+        last_care_date=care.care_date,
+        next_care_date=care.wound_next_care,
+        latest_area=area,
+        latest_volume=area * care.wound_depth,
+    )
+    return values
+
+
+def rebuild_summaries(wound_ids):
+    """
+    Recalcula los resúmenes de varias heridas con un número fijo de consultas;
+    borra el de las que ya no tienen curaciones.
+    """
+    wound_ids = set(wound_ids)
+    if not wound_ids:
+        return
+    cares = WoundCare.objects.filter(wound_id=OuterRef('wound_id'))
+    stats = (
+        WoundCare.objects.filter(wound_id__in=wound_ids).order_by()
+        .values('wound_id')
+        .annotate(
+            care_count=Count('id'),
+            latest_id=Subquery(cares.order_by('-care_date', '-id').values('id')[:1]),
+            baseline_id=Subquery(cares.order_by('care_date', 'id').values('id')[:1]),
+        )
+    )
+    stats = {row['wound_id']: row for row in stats}
+    by_id = WoundCare.objects.in_bulk(
+        [row['latest_id'] for row in stats.values()] + [row['baseline_id'] for row in stats.values()]
+    )
+
+    summaries = []
+    for wound_id, row in stats.items():
+        latest, baseline = by_id[row['latest_id']], by_id[row['baseline_id']]
+        values = latest_values(latest)
+        summaries.append(WoundSummary(
+            wound_id=wound_id,
+            created_by_id=latest.created_by_id,
+            care_count=row['care_count'],
+            first_care_date=baseline.care_date,
+            baseline_area=care_area(baseline),
+            area_reduction_percent=reduction_percent(care_area(baseline), values['latest_area']),
+            updated_at=timezone.now(),
+            **values,
+        ))
+
+    empty = wound_ids - stats.keys()
+    if empty:
+        WoundSummary.objects.filter(wound_id__in=empty).delete()
+    if summaries:
+        update_fields = [field.name for field in WoundSummary._meta.concrete_fields if not field.primary_key]
+        WoundSummary.objects.bulk_create(
+            summaries, update_conflicts=True, unique_fields=['wound'], update_fields=update_fields,
+        )
+
+
+def rebuild_summary(wound_id):
+    rebuild_summaries([wound_id])
+
+
+def care_saving(care):
+    """
+    pre_save de WoundCare: recuerda la herida anterior. Las instancias leídas de
+    la base ya la traen (WoundCare.from_db); solo se consulta para una curación
+    con id armada a mano.
+    """
+    if getattr(care, '_loaded_wound_id', None) is None and care.pk is not None:
+        care._loaded_wound_id = WoundCare.objects.filter(pk=care.pk).values_list('wound_id', flat=True).first()
+
+
+def care_saved(care, created):
+    """post_save de WoundCare."""
+    previous_wound_id, care._loaded_wound_id = getattr(care, '_loaded_wound_id', None), care.wound_id
+    if previous_wound_id is not None and previous_wound_id != care.wound_id:
+        # La curación cambió de herida: los dos resúmenes cambian
+        rebuild_summaries([previous_wound_id, care.wound_id])
+        return
+    if created:
+        values = latest_values(care)
+        is_latest = Q(last_care_date__lt=care.care_date) | Q(last_care_date=care.care_date, latest_care_id__lt=care.id)
+        updated = WoundSummary.objects.filter(is_latest, wound_id=care.wound_id).update(
+            care_count=F('care_count') + 1,
+            area_reduction_percent=Case(
+                When(baseline_area__gt=0, then=(F('baseline_area') - values['latest_area']) * 100 / F('baseline_area')),
+                default=None,
+            ),
+            updated_at=timezone.now(),
+            **values,
+        )
+        if updated:
+            return
+    rebuild_summary(care.wound_id)
+
+
+def care_deleted(care):
+    """post_delete de WoundCare."""
+    rebuild_summary(care.wound_id)
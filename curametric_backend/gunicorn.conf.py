@@ -0,0 +1,6 @@
+# gunicorn lee este archivo desde el directorio de trabajo (Procfile: gunicorn core.wsgi).
+# Los mismos valores dimensionan las conexiones a la base en core/database.py.
+import os
+
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
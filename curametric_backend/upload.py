@@ -11,6 +11,8 @@ import ftplib
 import os
 import traceback
 
+from curametric_wound_api.ftp_pool import FTPConnectionPool
+
 FTP_HOST = os.environ.get("FTP_HOST", "")
 FTP_USER = os.environ.get("FTP_USER", "")
 FTP_PASS = os.environ.get("FTP_PASS", "")
@@ -19,25 +21,20 @@ FTP_DIR = os.environ.get("FTP_MEDIA_PATH", "/media/")
 LOCAL_FILE = os.path.join("media", "wound_photos", "test_photo.png")
 REMOTE_FILE = "test_upload.jpg"
 
+_pool = None
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        _pool = FTPConnectionPool(FTP_HOST, FTP_USER, FTP_PASS, base_path=FTP_DIR)
+    return _pool
+
 
 def upload_file(file=None, filename=None, subfolder=None):
     if file is not None and filename is not None:
         try:
-            ftp = ftplib.FTP(FTP_HOST)
-            ftp.login(FTP_USER, FTP_PASS)
-            ftp.cwd(FTP_DIR)
-
-            for folder in (subfolder or "").split('/'):
-                if not folder:
-                    continue
-                try:
-                    ftp.cwd(folder)
-                except ftplib.error_perm:
-                    ftp.mkd(folder)
-                    ftp.cwd(folder)
-
-            ftp.storbinary(f"STOR {filename}", file)
-            ftp.quit()
+            get_pool().store(file, filename, subfolder or "")
             url = f"{os.environ.get('FTP_BASE_URL', '')}/{subfolder}/{filename}"
             return url
         except Exception as e: